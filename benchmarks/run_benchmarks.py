@@ -0,0 +1,380 @@
+"""Benchmark the simulation and mortgage code.
+
+Times importing the package, ``distreturns``, ``Mortgage.amortize`` for each
+payment schedule and full ``RentOrOwn`` and ``ParameterizedRentOrOwn`` runs,
+recording the best wall time over a few repeats and the peak memory traced by
+tracemalloc. Results are
+written as JSON and can be compared against a stored baseline. Any benchmark
+that got slower or hungrier than the tolerances allow makes the script exit
+non zero.
+
+Run it through nox, which compares against ``benchmarks/baseline.json``::
+
+    nox --session benchmarks
+
+Refresh the baseline after a deliberate change through the same session, so
+it's recorded on the interpreter and numpy it will be compared on::
+
+    nox --session benchmarks -- --output benchmarks/baseline.json
+
+A baseline recorded on a different Python or numpy version is only reported
+against with a warning, since the timings aren't comparable, and doesn't fail
+the run.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess  # noqa: S404
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from rentorown import asset
+from rentorown import house
+from rentorown import rentorown
+
+
+SIMULATION_SIZES = (1_000, 10_000, 100_000)
+SCENARIO = {
+    "monthly_rent": 2000,
+    "house_price": 500_000,
+    "down_payment": 100_000,
+    "mortgage_amortization_years": 25,
+    "mortgage_apr": 0.05,
+}
+
+
+def measure_import(module, repeats):
+    """Time importing a module in a fresh interpreter and trace its peak memory.
+
+    Parameters
+    ----------
+    module: str
+        The module to import
+    repeats: int
+        How many timed imports to take the best of
+
+    Returns
+    -------
+    dict
+        {"seconds", "peak_bytes"}
+    """
+    code = (
+        "import sys, time, tracemalloc\n"
+        "if sys.argv[1] == 'memory':\n"
+        "    tracemalloc.start()\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        "peak = tracemalloc.get_traced_memory()[1]\n"
+        "print(seconds, peak)\n"
+    )
+
+    def run(mode):
+        """Import the module in a new process.
+
+        Parameters
+        ----------
+        mode: {"time", "memory"}
+            Whether to trace memory during the import
+
+        Returns
+        -------
+        list of float
+            [seconds, peak bytes]
+        """
+        output = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code, mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return [float(value) for value in output.split()]
+
+    seconds = min(run("time")[0] for _ in range(repeats))
+    return {"seconds": seconds, "peak_bytes": int(run("memory")[1])}
+
+
+def _distreturns(simulations):
+    """Draw a mortgage's worth of cumulative returns.
+
+    Parameters
+    ----------
+    simulations: int
+        Number of simulations to draw
+
+    Returns
+    -------
+    callable
+        Runs the benchmark
+    """
+    return lambda: asset.distreturns(periods=300, simulations=simulations, rng=0)
+
+
+def _amortize(payment_type):
+    """Amortize a mortgage from scratch, bypassing the schedule cache.
+
+    Parameters
+    ----------
+    payment_type: str
+        Payment schedule to amortize
+
+    Returns
+    -------
+    callable
+        Runs the benchmark
+    """
+    mortgage = house.Mortgage(400_000, 25, 0.05)
+
+    def run():
+        """Amortize the mortgage."""
+        house.amortization_cache.clear()
+        mortgage.amortize(payment_type=payment_type)
+
+    return run
+
+
+def _model(model_class, simulations, fused=False):
+    """Build a rent or own model and run its simulations.
+
+    Parameters
+    ----------
+    model_class: type
+        RentOrOwn or ParameterizedRentOrOwn
+    simulations: int
+        Number of simulations
+    fused: bool, default False
+        Use the fused net worth kernels
+
+    Returns
+    -------
+    callable
+        Runs the benchmark
+    """
+    inputs = dict(SCENARIO, number_of_simulations=simulations, seed=0, fused=fused)
+    if model_class is rentorown.RentOrOwn:
+        inputs["housing_asset_dict"] = {"dist_args": {"loc": 0.004, "scale": 0.0136}}
+        inputs["investment_asset_dict"] = {
+            "dist_args": {"loc": 0.0051, "scale": 0.0266}
+        }
+
+    def run():
+        """Simulate owning and renting.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            Owner and renter net worth
+        """
+        house.amortization_cache.clear()
+        model = model_class(**inputs)
+        return model.own_net_worth, model.rent_net_worth
+
+    return run
+
+
+def benchmarks():
+    """Every benchmark.
+
+    Returns
+    -------
+    dict
+        name: callable that runs the benchmark and returns its measurement
+    """
+    suite = {}
+    for module in ("rentorown.house", "rentorown.rentorown"):
+        suite[f"import[{module}]"] = partial(measure_import, module, 5)
+    for simulations in SIMULATION_SIZES:
+        repeats = 5 if simulations < 100_000 else 1
+        suite[f"distreturns[{simulations}]"] = partial(
+            measure, _distreturns(simulations), repeats
+        )
+    for payment_type in house.PAYMENTS_PER_YEAR:
+        suite[f"Mortgage.amortize[{payment_type}]"] = partial(
+            measure, _amortize(payment_type), 20
+        )
+    for model_class in (rentorown.RentOrOwn, rentorown.ParameterizedRentOrOwn):
+        for simulations in SIMULATION_SIZES:
+            repeats = 3 if simulations < 100_000 else 1
+            suite[f"{model_class.__name__}[{simulations}]"] = partial(
+                measure, _model(model_class, simulations), repeats
+            )
+    for simulations in SIMULATION_SIZES:
+        repeats = 3 if simulations < 100_000 else 1
+        suite[f"ParameterizedRentOrOwn[fused,{simulations}]"] = partial(
+            measure,
+            _model(rentorown.ParameterizedRentOrOwn, simulations, True),
+            repeats,
+        )
+    return suite
+
+
+def measure(func, repeats):
+    """Time a benchmark and trace its peak memory.
+
+    Memory is traced in a separate run so tracemalloc's overhead doesn't get
+    into the timings.
+
+    Parameters
+    ----------
+    func: callable
+        The benchmark
+    repeats: int
+        How many timed runs to take the best of
+
+    Returns
+    -------
+    dict
+        {"seconds", "peak_bytes"}
+    """
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_bytes": peak}
+
+
+def compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.10):
+    """Find benchmarks that regressed against a baseline.
+
+    Parameters
+    ----------
+    results: dict
+        name: measurement for the current run
+    baseline: dict
+        name: measurement from the baseline run
+    time_tolerance: float, default 0.25
+        Allowed fractional increase in wall time
+    memory_tolerance: float, default 0.10
+        Allowed fractional increase in peak memory
+
+    Returns
+    -------
+    list of str
+        One description per regression, empty if there weren't any
+    """
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        for key, tolerance in (
+            ("seconds", time_tolerance),
+            ("peak_bytes", memory_tolerance),
+        ):
+            before, after = baseline[name][key], current[key]
+            if after > before * (1 + tolerance):
+                regressions.append(
+                    f"{name} {key}: {before:.4g} -> {after:.4g} "
+                    f"({after / before - 1:+.0%})"
+                )
+    return regressions
+
+
+def environment():
+    """Describe what the benchmarks ran on.
+
+    Returns
+    -------
+    dict
+        Python and numpy versions and the platform
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def mismatches(metadata, current):
+    """Find differences between environments that make timings incomparable.
+
+    Parameters
+    ----------
+    metadata: dict
+        ``environment()`` the baseline was recorded in
+    current: dict
+        ``environment()`` of this run
+
+    Returns
+    -------
+    list of str
+        One description per difference, empty if they match
+    """
+    found = []
+    for key, significant in (("python", 2), ("numpy", None)):
+        before = metadata.get(key, "unknown")
+        after = current[key]
+        if before.split(".")[:significant] != after.split(".")[:significant]:
+            found.append(f"{key} {before} in the baseline, {after} now")
+    return found
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line.
+
+    Parameters
+    ----------
+    argv: list of str, default None
+        Command line arguments, sys.argv if None
+
+    Returns
+    -------
+    int
+        Exit status, 1 if anything regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON to compare to")
+    parser.add_argument("--filter", default="", help="only run names containing this")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, benchmark in benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = benchmark()
+        print(
+            f"{name:<40} {results[name]['seconds']:>10.4f} s "
+            f"{results[name]['peak_bytes'] / 2**20:>10.1f} MiB"
+        )
+    if args.output is not None:
+        report = {
+            "metadata": environment(),
+            "benchmarks": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    different = mismatches(baseline.get("metadata", {}), environment())
+    for difference in different:
+        print(f"WARNING baseline recorded on a different setup: {difference}")
+    regressions = compare(
+        results, baseline["benchmarks"], args.time_tolerance, args.memory_tolerance
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if different and regressions:
+        print("Not failing, refresh the baseline on this setup to gate on it")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -203,6 +203,23 @@ def xdoctest(session: Session) -> None:
     session.run("python", "-m", "xdoctest", package, *args)
 
 
+@session(python="3.9")
+def benchmarks(session: Session) -> None:
+    """Run the benchmarks and compare them against the stored baseline.
+
+    Parameters
+    ----------
+    session: Session
+        The Session object.
+    """
+    args = session.posargs or [
+        "--baseline=benchmarks/baseline.json",
+        "--output=benchmarks/results.json",
+    ]
+    session.install(".")
+    session.run("python", "benchmarks/run_benchmarks.py", *args)
+
+
 @session(name="docs-build", python="3.8")
 def docs_build(session: Session) -> None:
     """Build the documentation.
@@ -0,0 +1,371 @@
+"""Command-line interface."""
+import csv
+import json
+import sys
+from concurrent.futures import as_completed
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+
+import click
+
+from rentorown.rentorown import ParameterizedRentOrOwn
+from rentorown.rentorown import RentOrOwn
+
+
+#: Types of the RentOrOwn arguments a scenario row can set
+SCENARIO_FIELDS = {
+    "monthly_rent": float,
+    "house_price": float,
+    "down_payment": float,
+    "mortgage_amortization_years": int,
+    "mortgage_apr": float,
+    "housing_asset_dict": json.loads,
+    "investment_asset_dict": json.loads,
+    "number_of_simulations": int,
+    "additional_purchase_costs": float,
+    "additional_monthly_costs": float,
+    "mortgage_payment_schedule": str,
+    "mortgage_additional_payments": float,
+    "annual_inflation": float,
+    "monthly_property_tax_rate": float,
+    "maintenance_cost": float,
+    "seed": json.loads,
+    "sampling": str,
+    "tolerance": float,
+    "tolerance_metric": str,
+    "confidence": float,
+    "mortgage_term_years": int,
+    "mortgage_rate_dict": json.loads,
+    "inflation_dict": json.loads,
+    "rent_growth_dict": json.loads,
+    "asset_correlation": float,
+}
+
+#: Columns written for each scenario
+OUTPUT_FIELDS = (
+    "scenario",
+    "simulations",
+    "seed",
+    "prob_own_wins",
+    "own_mean",
+    "rent_mean",
+    "own_p05",
+    "own_median",
+    "own_p95",
+    "rent_p05",
+    "rent_median",
+    "rent_p95",
+    "error",
+)
+
+
+def read_scenarios(file, input_format):
+    """Read scenario rows one at a time.
+
+    Parameters
+    ----------
+    file: file object
+        Open CSV or JSON lines file
+    input_format: {"csv", "jsonl"}
+        Format of the file
+
+    Yields
+    ------
+    dict
+        One scenario, column name to value
+    """
+    if input_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def scenario_arguments(row):
+    """Turn a scenario row into RentOrOwn keyword arguments.
+
+    Values are converted to the type each argument expects, so numbers can come
+    in as text from a CSV. Asset dictionaries and seeds that aren't plain
+    integers are given as JSON. Empty values are left to the defaults, and a
+    "scenario" column is only used to label the output.
+
+    Parameters
+    ----------
+    row: dict
+        One scenario
+
+    Returns
+    -------
+    dict
+        Keyword arguments for RentOrOwn or ParameterizedRentOrOwn
+
+    Raises
+    ------
+    ValueError
+        If the row has a column that isn't a scenario argument
+    """
+    arguments = {}
+    for name, value in row.items():
+        if name == "scenario" or value is None or value == "":
+            continue
+        if name not in SCENARIO_FIELDS:
+            raise ValueError(f"Unknown scenario column {name}")
+        convert = SCENARIO_FIELDS[name]
+        # JSON lines values are mostly typed already, CSV values are all text
+        if isinstance(value, str) or convert in (int, float):
+            value = convert(value)
+        arguments[name] = value
+    return arguments
+
+
+def _failed(label, error):
+    """Report a scenario that couldn't be run.
+
+    Parameters
+    ----------
+    label: str
+        Name of the scenario in the output
+    error: Exception
+        What went wrong
+
+    Returns
+    -------
+    dict
+        The scenario and error of OUTPUT_FIELDS
+    """
+    return {"scenario": label, "error": f"{type(error).__name__}: {error}"}
+
+
+def run_scenario(label, row, defaults):
+    """Simulate one scenario and summarize the final period.
+
+    Scenarios with their own housing and investment asset dictionaries use
+    RentOrOwn, the rest ParameterizedRentOrOwn. Simulations are summarized as
+    they're run rather than kept, so memory doesn't grow with their number.
+    Lives at module level so it can be shipped off to worker processes.
+
+    Parameters
+    ----------
+    label: str
+        Name of the scenario in the output
+    row: dict
+        The scenario
+    defaults: dict
+        Arguments for anything the row leaves out
+
+    Returns
+    -------
+    dict
+        One value for each of OUTPUT_FIELDS, with the error filled in and the
+        statistics left out if the scenario raised anything
+    """
+    try:
+        arguments = {**defaults, **scenario_arguments(row)}
+        if "housing_asset_dict" in arguments or "investment_asset_dict" in arguments:
+            model = RentOrOwn(keep_simulations=False, **arguments)
+        else:
+            model = ParameterizedRentOrOwn(keep_simulations=False, **arguments)
+        summary = model.summary
+        own = summary.quantile("own", [0.05, 0.5, 0.95])[:, -1]
+        rent = summary.quantile("rent", [0.05, 0.5, 0.95])[:, -1]
+        statistics = {
+            "prob_own_wins": summary.prob_own_wins()[-1],
+            "own_mean": summary.mean("own")[-1],
+            "rent_mean": summary.mean("rent")[-1],
+            "own_p05": own[0],
+            "own_median": own[1],
+            "own_p95": own[2],
+            "rent_p05": rent[0],
+            "rent_median": rent[1],
+            "rent_p95": rent[2],
+        }
+        result = {"scenario": label, "simulations": model.simulations_used}
+        result["seed"] = json.dumps(model.seed_entropy)
+    except Exception as error:
+        # One bad scenario, whatever went wrong, shouldn't lose the rest
+        return _failed(label, error)
+    result.update({key: float(value) for key, value in statistics.items()})
+    return result
+
+
+def _finished(future, labels):
+    """Get the summary of a scenario run in the process pool.
+
+    Parameters
+    ----------
+    future: concurrent.futures.Future
+        The finished ``run_scenario`` call
+    labels: dict
+        Future to the label of its scenario
+
+    Returns
+    -------
+    dict
+        Output of ``run_scenario``, or the error if the worker itself failed
+    """
+    label = labels.pop(future)
+    try:
+        return future.result()
+    except Exception as error:
+        return _failed(label, error)
+
+
+def run_scenarios(rows, defaults, workers=1, seed=None):
+    """Run scenarios, yielding each summary as soon as it's done.
+
+    With more than one worker, scenarios run in a process pool and come back
+    in the order they finish. Only a couple of scenarios per worker are read
+    ahead, so thousands of them run in constant memory.
+
+    Parameters
+    ----------
+    rows: iterable of dict
+        The scenarios
+    defaults: dict
+        Arguments for anything a row leaves out
+    workers: int, default 1
+        Number of processes to run scenarios in
+    seed: int, default None
+        Base seed. Scenario i without its own seed gets [seed, i], so a batch
+        is reproducible whatever order it finishes in
+
+    Yields
+    ------
+    dict
+        Output of ``run_scenario`` for each scenario
+    """
+    jobs = (
+        (
+            str(row.get("scenario") or index),
+            row,
+            defaults if seed is None else {**defaults, "seed": [seed, index]},
+        )
+        for index, row in enumerate(rows)
+    )
+    if workers <= 1:
+        for job in jobs:
+            yield run_scenario(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        labels = {}
+        pending = set()
+        for job in jobs:
+            future = executor.submit(run_scenario, *job)
+            labels[future] = job[0]
+            pending.add(future)
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _finished(future, labels)
+        for future in as_completed(pending):
+            yield _finished(future, labels)
+
+
+def _guess_format(file, given):
+    """Work out whether a file is CSV or JSON lines.
+
+    Parameters
+    ----------
+    file: file object
+        The file
+    given: str or None
+        Format asked for on the command line, if any
+
+    Returns
+    -------
+    str
+        "csv" or "jsonl"
+    """
+    if given is not None:
+        return given
+    suffix = Path(getattr(file, "name", "")).suffix.lower()
+    return "jsonl" if suffix in (".jsonl", ".json", ".ndjson") else "csv"
+
+
+@click.command()
+@click.version_option()
+@click.argument("scenarios", type=click.File("r"), default="-")
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Where to write the results, stdout by default.",
+)
+@click.option(
+    "--input-format",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Format of SCENARIOS, guessed from the extension by default.",
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Format of the results, the same as SCENARIOS by default.",
+)
+@click.option(
+    "-w", "--workers", default=1, show_default=True, help="Scenarios run at once."
+)
+@click.option(
+    "--simulations",
+    type=int,
+    help="number_of_simulations for scenarios that don't set it.",
+)
+@click.option("--seed", type=int, help="Base seed, to make the batch reproducible.")
+def main(scenarios, output, input_format, output_format, workers, simulations, seed):
+    """Rent or Own.
+
+    Simulate every scenario in SCENARIOS, a CSV or JSON lines file (or stdin)
+    with one scenario per row. Columns are RentOrOwn arguments: monthly_rent,
+    house_price, down_payment, mortgage_amortization_years and mortgage_apr
+    are required, the rest optional. Give housing_asset_dict and
+    investment_asset_dict as JSON for your own return distributions, or leave
+    them out for ParameterizedRentOrOwn's. An optional scenario column labels
+    the output.
+
+    One row of final period statistics is written per scenario as soon as it
+    finishes, so with several workers they may come out of order.
+    \f
+
+    Parameters
+    ----------
+    scenarios: file object
+        Scenarios to run
+    output: file object
+        Where to write the results
+    input_format: str or None
+        Format of scenarios
+    output_format: str or None
+        Format of the results
+    workers: int
+        Number of processes
+    simulations: int or None
+        Default number of simulations
+    seed: int or None
+        Base seed
+    """  # noqa: D301
+    input_format = _guess_format(scenarios, input_format)
+    output_format = output_format or input_format
+    defaults = {} if simulations is None else {"number_of_simulations": simulations}
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+    failures = 0
+    rows = read_scenarios(scenarios, input_format)
+    for result in run_scenarios(rows, defaults, workers=workers, seed=seed):
+        failures += "error" in result
+        if writer is not None:
+            writer.writerow(result)
+        else:
+            output.write(json.dumps(result) + "\n")
+        output.flush()
+    if failures:
+        click.echo(f"{failures} scenario(s) failed", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(prog_name="rentorown")  # pragma: no cover
@@ -1,11 +1,16 @@
 """Basic asset class to escalate financial flows."""
 import math
+import warnings
+from collections import deque
 from typing import Callable
 from typing import Dict
 from typing import Optional
 
 import numpy as np
 
+#: Normals drawn at a time when filling a buffer that isn't float64
+_DRAW_BLOCK = 2**16
+
 
 def annual_to_monthly_return(annual_return: float) -> float:
     """Convert annual return to monthly.
@@ -45,11 +50,315 @@ def annual_to_monthly_stdev(annual_stdev: float) -> float:
     return annual_stdev / math.sqrt(12)
 
 
+def _generator_dist(dist: Callable, rng: np.random.Generator) -> Callable:
+    """Swap a legacy numpy sampler for the same distribution on a Generator.
+
+    Parameters
+    ----------
+    dist: Callable
+        The distribution from which returns are drawn, e.g. np.random.normal
+    rng: np.random.Generator
+        Generator to draw from instead of the global legacy random state
+
+    Returns
+    -------
+    Callable
+        The matching Generator method, or dist itself if it isn't a numpy
+        sampler (custom callables get no say in which random state they use)
+    """
+    if isinstance(getattr(dist, "__self__", None), np.random.RandomState):
+        return getattr(rng, dist.__name__, dist)
+    return dist
+
+
+def default_dist_args(dist_args: Optional[Dict] = None) -> Dict:
+    """Fill in the distribution kwargs ``distreturns`` draws with if none are given.
+
+    Parameters
+    ----------
+    dist_args: dict, default None
+        kwargs for the distribution
+
+    Returns
+    -------
+    dict
+        dist_args, or a normal with mean 0.006 and standard deviation 0.06 if
+        None. A normal missing "loc" or "scale" gets numpy's 0 and 1
+    """
+    if dist_args is None:
+        return {"loc": 0.006, "scale": 0.06}
+    return dist_args
+
+
+def _normal_args(loc: float = 0.0, scale: float = 1.0):
+    """Pull the mean and standard deviation out of normal distribution kwargs.
+
+    Parameters
+    ----------
+    loc: float, default 0.0
+        Mean of the distribution
+    scale: float, default 1.0
+        Standard deviation of the distribution
+
+    Returns
+    -------
+    tuple
+        (loc, scale)
+    """
+    return loc, scale
+
+
+def _is_numpy_normal(dist: Optional[Callable]) -> bool:
+    """Check if a distribution is numpy's normal, or the default (also normal).
+
+    Parameters
+    ----------
+    dist: Callable or None
+        The distribution from which returns are drawn
+
+    Returns
+    -------
+    bool
+        True if we can draw it with the fast Generator normal path
+    """
+    if dist is None:
+        return True
+    return getattr(dist, "__name__", None) == "normal" and isinstance(
+        getattr(dist, "__self__", None), (np.random.RandomState, np.random.Generator)
+    )
+
+
+def _sobol_uniforms(periods, simulations, rng, n_assets=1):
+    """Draw a scrambled Sobol point set shared by several assets.
+
+    Parameters
+    ----------
+    periods: int
+        Number of periods, each one is a dimension of the point set
+    simulations: int
+        Number of points to draw
+    rng: np.random.Generator, int or np.random.SeedSequence
+        Seeds the scrambling
+    n_assets: int, default 1
+        How many assets share the point set
+
+    Returns
+    -------
+    list of np.ndarray
+        periods x simulations uniforms strictly between 0 and 1 for each asset,
+        its own block of dimensions
+
+    Raises
+    ------
+    ImportError
+        If scipy isn't installed
+    """
+    try:
+        from scipy.stats import qmc
+    except ImportError as err:
+        raise ImportError(
+            "sobol sampling needs scipy, pip install rentorown[qmc]"
+        ) from err
+    # scipy spawns a child from a Generator's SeedSequence, so it would scramble
+    # differently each time the same seed was used. An integer seed doesn't
+    seed = int(np.random.default_rng(rng).integers(2**63))
+    sampler = qmc.Sobol(periods * n_assets, scramble=True, seed=seed)
+    with warnings.catch_warnings():
+        # Non power of 2 sample sizes are fine, just a little less balanced
+        warnings.simplefilter("ignore", UserWarning)
+        points = sampler.random(simulations)
+    # Scrambled points can land on exactly 0, which has no finite inverse CDF
+    np.clip(points, np.finfo(float).tiny, 1 - np.finfo(float).eps, out=points)
+    return [
+        points[:, index * periods : (index + 1) * periods].T
+        for index in range(n_assets)
+    ]
+
+
+def _standard_normal(rng: np.random.Generator, out):
+    """Fill a buffer with standard normals, always drawn in float64.
+
+    Generators draw float32 normals from a different stream than float64 ones,
+    so the same seed would give unrelated paths at each precision. Anything
+    but a contiguous float64 buffer is filled from float64 draws a block of
+    rows at a time, so it gets the same values, rounded, without a float64
+    copy of the whole thing.
+
+    Parameters
+    ----------
+    rng: np.random.Generator
+        Generator to draw from
+    out: np.ndarray
+        Buffer to fill, in the order a single draw of its shape would
+
+    Returns
+    -------
+    np.ndarray
+        out, filled with draws
+    """
+    if out.dtype == np.float64 and out.flags.c_contiguous:
+        return rng.standard_normal(out=out)
+    row_size = max(1, out[:1].size)
+    rows = max(1, _DRAW_BLOCK // row_size)
+    for start in range(0, len(out), rows):
+        block = out[start : start + rows]
+        block[...] = rng.standard_normal(block.shape)
+    return out
+
+
+def _normal_draws(dist_args: Dict, rng: np.random.Generator, out, sampling):
+    """Fill a buffer with normal returns straight from a Generator.
+
+    Parameters
+    ----------
+    dist_args: dict
+        loc and scale of the normal distribution
+    rng: np.random.Generator
+        Generator to draw from
+    out: np.ndarray
+        periods x simulations buffer to fill
+    sampling: {"standard", "antithetic"}
+        Whether to mirror half the draws
+
+    Returns
+    -------
+    np.ndarray
+        out, filled with returns
+    """
+    loc, scale = _normal_args(**dist_args)
+    if sampling == "antithetic":
+        simulations = out.shape[1]
+        half = (simulations + 1) // 2
+        _standard_normal(rng, out[:, :half])
+        np.negative(out[:, : simulations - half], out=out[:, half:])
+    else:
+        _standard_normal(rng, out)
+    out *= scale
+    out += loc
+    return out
+
+
+def _callable_draws(dist, dist_args, periods, simulations, rng, sampling):
+    """Draw returns by calling the distribution function.
+
+    Parameters
+    ----------
+    dist: Callable
+        The distribution from which returns are drawn
+    dist_args: dict
+        kwargs for dist
+    periods: int
+        Number of periods to simulate
+    simulations: int
+        Number of simulations to run
+    rng: np.random.Generator, int, np.random.SeedSequence or None
+        Generator for numpy samplers, None for the global random state
+    sampling: str
+        Sampling mode, only "standard" works for arbitrary callables
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations returns
+
+    Raises
+    ------
+    ValueError
+        If a variance reduction mode was asked for
+    """
+    if sampling != "standard":
+        raise ValueError(f"{sampling} sampling needs a normal distribution")
+    if rng is not None:
+        dist = _generator_dist(dist, np.random.default_rng(rng))
+    return dist(**dist_args, size=(periods, simulations))
+
+
+def _brownian_bridge(shocks):
+    """Rearrange standard normal shocks with a Brownian bridge.
+
+    Sobol points are most evenly spread in their first few dimensions. Building
+    the random walk from its end point, then its midpoint, then the quarter
+    points and so on puts the first dimensions in charge of the overall shape of
+    the path, which is what drives cumulative returns. The increments that come
+    out are still independent standard normals.
+
+    Parameters
+    ----------
+    shocks: np.ndarray
+        periods x simulations standard normals in order of importance
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations independent standard normal increments
+    """
+    periods = shocks.shape[0]
+    walk = np.zeros((periods + 1,) + shocks.shape[1:])
+    walk[periods] = np.sqrt(periods) * shocks[0]
+    intervals = deque([(0, periods)])
+    dim = 1
+    while intervals:
+        left, right = intervals.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        walk[mid] = ((right - mid) * walk[left] + (mid - left) * walk[right]) / (
+            right - left
+        ) + np.sqrt((mid - left) * (right - mid) / (right - left)) * shocks[dim]
+        dim += 1
+        intervals.extend([(left, mid), (mid, right)])
+    return np.diff(walk, axis=0)
+
+
+def _sobol_draws(dist, dist_args, uniforms):
+    """Map scrambled Sobol points through a distribution's inverse CDF.
+
+    Parameters
+    ----------
+    dist: Callable or None
+        numpy's normal (or None for the default normal), or anything with a
+        scipy.stats style ``ppf`` method
+    dist_args: dict
+        kwargs for the distribution
+    uniforms: np.ndarray
+        periods x simulations block of points from ``_sobol_uniforms``
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations returns
+
+    Raises
+    ------
+    ValueError
+        If we don't know the inverse CDF of dist
+    """
+    if _is_numpy_normal(dist):
+        from scipy.special import ndtri
+
+        loc, scale = _normal_args(**dist_args)
+    elif not hasattr(dist, "ppf"):
+        raise ValueError("sobol sampling needs a normal or scipy.stats dist")
+    if not _is_numpy_normal(dist):
+        return dist.ppf(uniforms, **dist_args)
+    samples = _brownian_bridge(ndtri(uniforms))
+    samples *= scale
+    samples += loc
+    return samples
+
+
 def distreturns(
-    dist: Callable = np.random.normal,
+    dist: Optional[Callable] = None,
     dist_args: Optional[Dict] = None,
     periods: int = 300,
     simulations: int = 100,
+    rng=None,
+    dtype: np.dtype = np.float64,
+    out: Optional[np.ndarray] = None,
+    sampling: str = "standard",
+    asset_index: int = 0,
+    n_assets: int = 1,
+    compound: bool = True,
 ):
     """Simulate a series of returns from a given distribution.
 
@@ -57,6 +366,10 @@ def distreturns(
     Specify the number of simulations and periods to simulate for,
     and plot results of the simulations
 
+    By default returns are normally distributed and drawn with a
+    np.random.Generator (PCG64 and its ziggurat normal sampler) straight into the
+    output buffer, then compounded in place.
+
     Notes
     -----
     Right now this does not assume any tax on capital gains on the portfolio. You can
@@ -67,8 +380,12 @@ def distreturns(
 
     Parameters
     ----------
-    dist: Callable, default np.random.normal
-        The distribution from which returns are drawn
+    dist: Callable, default None
+        The distribution from which returns are drawn. None means normal, drawn
+        from rng. Legacy numpy samplers like np.random.normal are still drawn from
+        the global random state unless rng is passed, in which case the
+        generator's method of the same name is used instead. Any other callable is
+        called as is and has to accept a size keyword.
     dist_args : dict
         dictionary of kwargs to be passed along with dist defaults to
         mean 0.006, standard deviation 0.06
@@ -76,6 +393,35 @@ def distreturns(
         Number of periods to simulate
     simulations: int, default 100
         Number of simulations to run
+    rng: np.random.Generator, int or np.random.SeedSequence, default None
+        Generator, or seed for one, to draw from so runs can be reproduced. None
+        uses fresh entropy
+    dtype: np.dtype, default np.float64
+        Floating point type of the returned array
+    out: np.ndarray, default None
+        periods x simulations buffer to write the returns into instead of
+        allocating a new one. Its dtype overrides dtype
+    sampling: {"standard", "antithetic", "sobol"}, default "standard"
+        "antithetic" draws half the simulations and mirrors each normal draw
+        around the mean for the other half. Paired paths cancel out a lot of
+        each other's noise, so averages converge faster. Only works for normal
+        distributions. "sobol" uses scrambled Sobol quasi-random points, one per
+        simulation with a dimension for each period, mapped through the inverse
+        CDF of the distribution. That needs scipy, from the rentorown[qmc]
+        extra, and either a normal distribution or a dist with a ``ppf`` method
+        like the scipy.stats ones. Sobol points are best balanced when
+        simulations is a power of 2
+    asset_index: int, default 0
+        With "sobol" sampling, which asset's periods to take from a joint point
+        set. Assets drawn with the same rng seed, the same n_assets and different
+        asset indexes get different dimensions of one Sobol sequence, so
+        together they're still low discrepancy
+    n_assets: int, default 1
+        With "sobol" sampling, how many assets share the point set
+    compound: bool, default True
+        Compound the returns into cumulative returns. If False the raw returns
+        for each period are returned as drawn, for the fused kernels in
+        ``rentorown.kernel`` that compound them as they go
 
     Returns
     -------
@@ -85,10 +431,265 @@ def distreturns(
         normalized to = 1 in the first period. You can then take a series of
         cash flows to compute the number of shares in that asset you can buy
         in a given period, cumulatively sum those shares, and then multiply them by
-        the asset price for any period to determine total wealth accumulated
+        the asset price for any period to determine total wealth accumulated.
+        With antithetic sampling, simulation i in the first half is paired with
+        simulation i + (simulations + 1) // 2 in the second half
+        The raw returns for each period instead if compound is False
+
+    Raises
+    ------
+    ValueError
+        If sampling isn't supported for the distribution
     """
-    if dist_args is None:
-        dist_args = {"loc": 0.006, "scale": 0.06}
-    returns = (1 + dist(**dist_args, size=(periods, simulations))).cumprod(axis=0)
+    if sampling not in ("standard", "antithetic", "sobol"):
+        raise ValueError(f"Unknown sampling mode {sampling}")
+    dist_args = default_dist_args(dist_args)
+    # Generator methods passed as dist bring their own generator
+    owner = getattr(dist, "__self__", None)
+    if rng is None and isinstance(owner, np.random.Generator):
+        rng = owner
+    if sampling == "sobol":
+        uniforms = _sobol_uniforms(periods, simulations, rng, n_assets)
+        samples = _sobol_draws(dist, dist_args, uniforms[asset_index])
+    elif _is_numpy_normal(dist) and (dist is None or rng is not None):
+        if out is None:
+            out = np.empty((periods, simulations), dtype=dtype)
+        samples = _normal_draws(dist_args, np.random.default_rng(rng), out, sampling)
+    else:
+        samples = _callable_draws(dist, dist_args, periods, simulations, rng, sampling)
+    if out is None:
+        returns = np.asarray(samples, dtype=dtype)
+    else:
+        if samples is not out:
+            out[...] = samples
+        returns = out
+    if not compound:
+        return returns
+    return compound_returns(returns)
+
+
+def compound_returns(returns: np.ndarray) -> np.ndarray:
+    """Compound periodic returns into cumulative returns in place.
+
+    Parameters
+    ----------
+    returns: np.ndarray
+        periods x simulations returns, overwritten
+
+    Returns
+    -------
+    np.ndarray
+        returns, now cumulative and normalized to 1 in the first period like
+        ``distreturns``
+    """
+    # Compound in place rather than allocating a new array for each step
+    returns += 1
+    np.cumprod(returns, axis=0, out=returns)
     returns[0] = 1
     return returns
+
+
+def _correlation_factor(cov, corr, stdevs):
+    """Split a covariance into the Cholesky factor of its correlation and stdevs.
+
+    Parameters
+    ----------
+    cov: array_like or None
+        assets x assets covariance
+    corr: array_like or None
+        assets x assets correlation, if cov isn't given
+    stdevs: array_like or None
+        Standard deviation of each asset, with corr
+
+    Returns
+    -------
+    tuple of np.ndarray
+        (lower triangular factor of the correlation, stdevs)
+
+    Raises
+    ------
+    ValueError
+        If it isn't one of cov or corr and stdevs, or isn't positive definite
+    """
+    if (cov is None) == (corr is None) or (corr is None) != (stdevs is None):
+        raise ValueError("Give either cov, or corr and stdevs")
+    if cov is not None:
+        cov = np.asarray(cov, dtype=float)
+        stdevs = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(stdevs, stdevs)
+    try:
+        factor = np.linalg.cholesky(np.asarray(corr, dtype=float))
+    except np.linalg.LinAlgError as err:
+        raise ValueError("The correlation has to be positive definite") from err
+    return factor, np.asarray(stdevs, dtype=float)
+
+
+def correlated_distreturns(
+    means,
+    cov=None,
+    corr=None,
+    stdevs=None,
+    periods: int = 300,
+    simulations: int = 100,
+    rng=None,
+    dtype: np.dtype = np.float64,
+    sampling: str = "standard",
+    compound: bool = True,
+):
+    """Simulate returns for several assets that move together.
+
+    Returns are multivariate normal. All the assets are drawn into one
+    periods x simulations x assets buffer with a single call to the generator,
+    correlated with the Cholesky factor of their correlation a block of
+    periods at a time, then compounded in place. A single asset gets exactly the same
+    returns as ``distreturns`` with the same generator.
+
+    Parameters
+    ----------
+    means: array_like
+        Mean monthly return of each asset
+    cov: array_like, default None
+        assets x assets covariance of the monthly returns
+    corr: array_like, default None
+        assets x assets correlation, instead of cov
+    stdevs: array_like, default None
+        Standard deviation of each asset's monthly return, with corr
+    periods: int, default 300
+        Number of periods to simulate
+    simulations: int, default 100
+        Number of simulations to run
+    rng: np.random.Generator, int or np.random.SeedSequence, default None
+        Generator, or seed for one, to draw from. None uses fresh entropy
+    dtype: np.dtype, default np.float64
+        Floating point type of the returns
+    sampling: {"standard", "antithetic"}, default "standard"
+        "antithetic" mirrors the draws for the second half of the simulations,
+        as in ``distreturns``
+    compound: bool, default True
+        Compound the returns into cumulative returns, as in ``distreturns``
+
+    Returns
+    -------
+    tuple of np.ndarray
+        periods x simulations returns for each asset, views into the shared
+        buffer rather than copies
+
+    Raises
+    ------
+    ValueError
+        If the inputs don't describe a valid covariance, or for sampling modes
+        other than "standard" and "antithetic"
+    """
+    if sampling not in ("standard", "antithetic"):
+        raise ValueError(f"{sampling} sampling isn't supported for correlated assets")
+    factor, stdevs = _correlation_factor(cov, corr, stdevs)
+    means = np.asarray(means, dtype=float)
+    if means.shape != stdevs.shape:
+        raise ValueError("Need a mean for each asset in the covariance")
+    rng = np.random.default_rng(rng)
+    returns = np.empty((periods, simulations, means.size), dtype=dtype)
+    if sampling == "antithetic":
+        half = (simulations + 1) // 2
+        _standard_normal(rng, returns[:, :half])
+        np.negative(returns[:, : simulations - half], out=returns[:, half:])
+    else:
+        _standard_normal(rng, returns)
+    factor = factor.T.astype(dtype)
+    # matmul into its own input would copy the whole buffer, so go a block of
+    # periods at a time through a small scratch buffer
+    rows = max(1, _DRAW_BLOCK // max(1, returns[:1].size))
+    scratch = np.empty((min(rows, periods),) + returns.shape[1:], dtype)
+    for start in range(0, periods, rows):
+        block = returns[start : start + rows]
+        block[...] = np.matmul(block, factor, out=scratch[: len(block)])
+    returns *= stdevs.astype(dtype)
+    returns += means.astype(dtype)
+    assets = tuple(returns[..., i] for i in range(means.size))
+    if compound:
+        for asset_returns in assets:
+            compound_returns(asset_returns)
+    return assets
+
+
+def sobol_distreturns(
+    assets,
+    periods: int = 300,
+    simulations: int = 100,
+    rng=None,
+    dtype: np.dtype = np.float64,
+    compound: bool = True,
+):
+    """Simulate returns for several assets from one scrambled Sobol point set.
+
+    The same as calling ``distreturns`` with "sobol" sampling for each asset
+    with the same rng and a different asset_index, but the point set is only
+    generated once.
+
+    Parameters
+    ----------
+    assets: sequence of dict
+        "dist" and "dist_args" of each asset, as for ``distreturns``
+    periods: int, default 300
+        Number of periods to simulate
+    simulations: int, default 100
+        Number of simulations to run
+    rng: np.random.Generator, int or np.random.SeedSequence, default None
+        Seeds the scrambling. None uses fresh entropy
+    dtype: np.dtype, default np.float64
+        Floating point type of the returns
+    compound: bool, default True
+        Compound the returns into cumulative returns, as in ``distreturns``
+
+    Returns
+    -------
+    tuple of np.ndarray
+        periods x simulations returns for each asset
+    """
+    uniforms = _sobol_uniforms(periods, simulations, rng, len(assets))
+    returns = []
+    for asset_dict, block in zip(assets, uniforms):
+        dist_args = default_dist_args(asset_dict.get("dist_args"))
+        samples = _sobol_draws(asset_dict.get("dist"), dist_args, block)
+        samples = np.asarray(samples, dtype=dtype)
+        returns.append(compound_returns(samples) if compound else samples)
+    return tuple(returns)
+
+
+def expected_terminal_return(
+    dist: Optional[Callable] = None,
+    dist_args: Optional[Dict] = None,
+    periods: int = 300,
+):
+    """Calculate the expected final cumulative return from ``distreturns``.
+
+    Returns are independent draws, so the expected cumulative return is just the
+    expected periodic return compounded. Note the first period's draw still counts
+    towards later periods even though ``distreturns`` normalizes the first row to 1.
+    Handy as the known mean of a control variate.
+
+    Parameters
+    ----------
+    dist: Callable, default None
+        The distribution from which returns are drawn, as for ``distreturns``
+    dist_args : dict
+        dictionary of kwargs for dist, same defaults as ``distreturns``
+    periods: int, default 300
+        Number of periods simulated
+
+    Returns
+    -------
+    float
+        Expected value of the final row of ``distreturns``
+
+    Raises
+    ------
+    ValueError
+        If dist isn't a normal distribution, since we don't know its mean
+    """
+    if not _is_numpy_normal(dist):
+        raise ValueError("Expected returns are only known for normal distributions")
+    dist_args = default_dist_args(dist_args)
+    loc, _ = _normal_args(**dist_args)
+    if periods <= 1:
+        return 1.0
+    return (1 + loc) ** periods
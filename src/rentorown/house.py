@@ -3,10 +3,161 @@ import math
 from collections import OrderedDict
 from datetime import date
 
+import numpy as np
 import numpy_financial as npf
-import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from rentorown import kernel
+
+
+PAYMENTS_PER_YEAR = {"monthly": 12, "bi_weekly": 26, "acc_bi_weekly": 26}
+
+
+def periodic_rate(apr, payments_per_year):
+    """Convert a posted APR to the interest rate charged each payment period.
+
+    Takes APR as an input and compounds semi annually for AER. Canadian
+    mortgages are dumb like that. Works element-wise on numpy arrays as well as
+    on scalars.
+
+    Parameters
+    ----------
+    apr: float or array_like
+        APR rate as posted online
+    payments_per_year: int or array_like
+        Number of payments made each year, 12 for monthly, 26 for bi-weekly
+
+    Returns
+    -------
+    float or array_like
+        The interest rate applied to the outstanding balance each payment period
+    """
+    rate = (1 + (apr / 2)) ** 2 - 1
+    return (1 + rate) ** (1 / payments_per_year) - 1
+
+
+def _next_month_start():
+    """Find the first day of next month, when new mortgages start paying.
+
+    Returns
+    -------
+    datetime.date
+        The first of next month
+    """
+    return date.today().replace(day=1) + relativedelta(months=1)
+
+
+class AmortizationCache:
+    """Least recently used cache of amortization schedules.
+
+    Scenarios often share mortgage terms, so rather than rebuild the same schedule
+    over and over ``Mortgage`` keeps them here, keyed by the mortgage terms. The
+    cache is bounded by the total size of the arrays it holds, and arrays are
+    made read only before they're handed out so nobody can corrupt a cached
+    schedule.
+
+    Parameters
+    ----------
+    max_bytes: int, default 64 MiB
+        How much array data to hold before evicting the least recently used
+        schedules
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self._entries = OrderedDict()
+        self._max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        """Count cached schedules.
+
+        Returns
+        -------
+        int
+            Number of cached schedules
+        """
+        return len(self._entries)
+
+    @property
+    def max_bytes(self):
+        """int: Capacity of the cache, shrinking it evicts straight away."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+        self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Look up a schedule, computing and caching it if it's not there.
+
+        Parameters
+        ----------
+        key: hashable
+            The mortgage terms identifying the schedule
+        compute: Callable
+            Called with no arguments to build the schedule on a miss, should
+            return a dict of numpy arrays
+
+        Returns
+        -------
+        dict
+            The schedule, with read only arrays
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        value = compute()
+        for arr in value.values():
+            arr.setflags(write=False)
+        size = sum(arr.nbytes for arr in value.values())
+        if size <= self._max_bytes:
+            self._entries[key] = value
+            self.nbytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        """Drop least recently used schedules until we're under capacity."""
+        while self.nbytes > self._max_bytes and self._entries:
+            _, value = self._entries.popitem(last=False)
+            self.nbytes -= sum(arr.nbytes for arr in value.values())
+            self.evictions += 1
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """Report how well the cache is doing.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, number of entries, bytes held and capacity
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "nbytes": self.nbytes,
+            "max_bytes": self._max_bytes,
+        }
+
+
+#: Schedules shared by every Mortgage, resize or clear it to suit
+amortization_cache = AmortizationCache()
+
 
 class House:
     """House object, you buy one of these.
@@ -170,8 +321,7 @@ class Mortgage:
         pmt: float
             The amount of the monthly payment
         """
-        rate = (1 + (self.rate / 2)) ** 2 - 1
-        periodic_interest_rate = (1 + rate) ** (1 / 12) - 1
+        periodic_interest_rate = periodic_rate(self.rate, 12)
         periods = self.years * 12
         pmt = -round(npf.pmt(periodic_interest_rate, periods, self.principal), 2)
         return pmt
@@ -187,8 +337,7 @@ class Mortgage:
         pmt: float
             The amount of the monthly payment
         """
-        rate = (1 + (self.rate / 2)) ** 2 - 1
-        periodic_interest_rate = (1 + rate) ** (1 / 26) - 1
+        periodic_interest_rate = periodic_rate(self.rate, 26)
         periods = self.years * 26
         pmt = -round(npf.pmt(periodic_interest_rate, periods, self.principal), 2)
         return pmt
@@ -207,7 +356,143 @@ class Mortgage:
         pmt = round(self.monthly_payment() / 2, 2)
         return pmt
 
-    def amortize(self, addl_pmt=0, payment_type="monthly"):
+    def schedule(self, addl_pmt=0, payment_type="monthly"):
+        """Compute the payment by payment amortization schedule as numpy arrays.
+
+        This is the engine behind ``amortize``. Periods are indexed by an integer
+        payment number rather than a date, and no dataframe is built, so it's cheap
+        enough to call over and over. Interest is rounded to the cent every period
+        the same way the bank (and ``amortize``) does it. Schedules are kept in
+        ``amortization_cache`` so repeated terms are only computed once.
+
+        Parameters
+        ----------
+        addl_pmt: numeric, default 0
+            additional regular contributions
+        payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"], default "monthly"
+            type of payment plan
+
+        Returns
+        -------
+        dict
+            {"Period", "Begin_balance", "Payment", "Principal", "Interest",
+            "Additional_payment", "End_balance"}: dictionary of read only 1d numpy
+            arrays with one entry per payment. Period counts payments starting at 1.
+        """
+        return amortization_cache.get_or_compute(
+            ("schedule",) + self._terms(addl_pmt, payment_type),
+            lambda: self._compute_schedule(addl_pmt, payment_type),
+        )
+
+    def _terms(self, addl_pmt, payment_type):
+        """Key identifying a schedule in the amortization cache.
+
+        Parameters
+        ----------
+        addl_pmt: numeric
+            additional regular contributions
+        payment_type: str
+            type of payment plan
+
+        Returns
+        -------
+        tuple
+            principal, years, rate, payment type and additional payment
+        """
+        return (
+            float(self.principal),
+            self.years,
+            float(self.rate),
+            payment_type,
+            float(addl_pmt),
+        )
+
+    def _compute_schedule(self, addl_pmt, payment_type):
+        """Run the amortization schedule for ``schedule``.
+
+        Parameters
+        ----------
+        addl_pmt: numeric
+            additional regular contributions
+        payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"]
+            type of payment plan
+
+        Returns
+        -------
+        dict
+            {"Period", "Begin_balance", "Payment", "Principal", "Interest",
+            "Additional_payment", "End_balance"}: dictionary of 1d numpy arrays
+            with one entry per payment. Period counts payments starting at 1.
+        """
+        periods_dict = {
+            "monthly": self.monthly_payment,
+            "bi_weekly": self.bi_weekly_payment,
+            "acc_bi_weekly": self.acc_bi_weekly_payment,
+        }
+        regular_pmt = float(periods_dict[payment_type]())
+        periods_per_year = PAYMENTS_PER_YEAR[payment_type]
+        # Only the balance recursion has to run period by period, in a compiled
+        # kernel if numba is around. Everything else is filled in with array
+        # operations once we know how long the mortgage runs
+        recursion = kernel.amortize(
+            self.principal,
+            periodic_rate(self.rate, periods_per_year),
+            regular_pmt,
+            addl_pmt,
+            self.years * periods_per_year,
+        )
+        begin = recursion["Begin_balance"]
+        interest_arr = recursion["Interest"]
+        n_periods = len(begin)
+        payment_arr = recursion["Payment"]
+        additional_arr = recursion["Additional_payment"]
+        principal_arr = payment_arr - interest_arr
+        end = begin - (principal_arr + additional_arr)
+        return {
+            "Period": np.arange(1, n_periods + 1),
+            "Begin_balance": begin,
+            "Payment": payment_arr,
+            "Principal": principal_arr,
+            "Interest": interest_arr,
+            "Additional_payment": additional_arr,
+            "End_balance": end,
+        }
+
+    @staticmethod
+    def payment_dates(n_periods, payment_type="monthly", start_date=None):
+        """Attach calendar dates to a schedule's integer payment periods.
+
+        Parameters
+        ----------
+        n_periods: int
+            Number of payments to date
+        payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"], default "monthly"
+            type of payment plan, monthly is paid on the same day each month
+            (or the last day of shorter months) and the bi-weekly plans every 14 days
+        start_date: datetime.date, default None
+            Date of the first payment, defaults to the start of next month
+
+        Returns
+        -------
+        np.ndarray
+            datetime64[D] array of payment dates
+        """
+        if start_date is None:
+            start_date = _next_month_start()
+        steps = np.arange(n_periods)
+        if payment_type == "monthly":
+            months = np.datetime64(start_date, "M") + steps
+            month_lengths = (months + 1).astype("datetime64[D]") - months.astype(
+                "datetime64[D]"
+            )
+            day_offset = np.minimum(
+                np.timedelta64(start_date.day - 1, "D"),
+                month_lengths - np.timedelta64(1, "D"),
+            )
+            return months.astype("datetime64[D]") + day_offset
+        return np.datetime64(start_date, "D") + steps * np.timedelta64(14, "D")
+
+    def amortize(self, addl_pmt=0, payment_type="monthly", start_date=None):
         """Show payments on the mortgage.
 
         Parameters
@@ -216,92 +501,335 @@ class Mortgage:
             additional regular contributions
         payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"], default "monthly"
             type of payment plan
+        start_date: datetime.date, default None
+            Date of the first payment, defaults to the start of next month
 
         Returns
         -------
         df: pandas.DataFrame
             Dataframe of mortgage payments showing principal and interest contributions
-            and amount outstanding
+            and amount outstanding, aggregated to the start of each month
         """
+        monthly = self.monthly_schedule(addl_pmt, payment_type, start_date)
+        return self.schedule_frame(monthly)
 
-        def amortizdict(adp=addl_pmt):
-            """Yield a dictionary to convert to dataframe.
+    @staticmethod
+    def schedule_frame(monthly):
+        """Turn a ``monthly_schedule`` into the DataFrame ``amortize`` shows.
 
-            Parameters
-            ----------
-            adp: float
-                Additional payment to be made beyond the requirement
+        Parameters
+        ----------
+        monthly: dict
+            numpy arrays from ``monthly_schedule``
 
-            Yields
-            ------
-            Dict
-                All the data for another period of mortgage payments
-            """
-            periods_dict = {
-                "monthly": self.monthly_payment,
-                "bi_weekly": self.bi_weekly_payment,
-                "acc_bi_weekly": self.acc_bi_weekly_payment,
+        Returns
+        -------
+        pandas.DataFrame
+            The schedule indexed by month, with a total_payment column added
+        """
+        # pandas is slow to import and only needed for the DataFrame
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {col: arr for col, arr in monthly.items() if col != "Date"},
+            index=pd.DatetimeIndex(
+                pd.to_datetime(monthly["Date"]), name="Date", freq="MS"
+            ),
+            copy=True,
+        ).assign(total_payment=lambda df: df["Payment"] + df["Additional_payment"])
+        return df
+
+    def monthly_schedule(self, addl_pmt=0, payment_type="monthly", start_date=None):
+        """Get ``amortize``'s month by month schedule as numpy arrays.
+
+        Cached like ``schedule``, and doesn't need pandas.
+
+        Parameters
+        ----------
+        addl_pmt: numeric, default 0
+            additional regular contributions
+        payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"], default "monthly"
+            type of payment plan
+        start_date: datetime.date, default None
+            Date of the first payment, defaults to the start of next month
+
+        Returns
+        -------
+        dict
+            Read only numpy arrays of the amortize columns (apart from
+            total_payment) plus "Date", the month of each row
+        """
+        if start_date is None:
+            start_date = _next_month_start()
+        return amortization_cache.get_or_compute(
+            ("monthly",) + self._terms(addl_pmt, payment_type) + (start_date,),
+            lambda: self._monthly_schedule(addl_pmt, payment_type, start_date),
+        )
+
+    def _monthly_schedule(self, addl_pmt, payment_type, start_date):
+        """Roll the payment schedule up to calendar months.
+
+        Parameters
+        ----------
+        addl_pmt: numeric
+            additional regular contributions
+        payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"]
+            type of payment plan
+        start_date: datetime.date
+            Date of the first payment
+
+        Returns
+        -------
+        dict
+            numpy arrays of the amortize columns plus "Date", the month of each row
+        """
+        sched = self.schedule(addl_pmt=addl_pmt, payment_type=payment_type)
+        dates = self.payment_dates(
+            len(sched["Period"]), payment_type=payment_type, start_date=start_date
+        )
+        months = dates.astype("datetime64[M]")
+        # payments are in date order so each month is one contiguous run
+        month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        return {
+            "Date": months[month_starts],
+            "Begin_balance": np.maximum.reduceat(sched["Begin_balance"], month_starts),
+            "Payment": np.add.reduceat(sched["Payment"], month_starts),
+            "Principal": np.add.reduceat(sched["Principal"], month_starts),
+            "Interest": np.add.reduceat(sched["Interest"], month_starts),
+            "Additional_payment": np.add.reduceat(
+                sched["Additional_payment"], month_starts
+            ),
+            "End_balance": np.minimum.reduceat(sched["End_balance"], month_starts),
+        }
+
+
+def batch_amortize(principal, years, rate, payment_type="monthly", addl_pmt=0):
+    """Amortize many mortgages at once.
+
+    Vectorized counterpart of ``Mortgage.schedule``. Every input is broadcast
+    against the others, so you can pass an array of principals with a single
+    rate or any other combination. The balance recursion steps through payment
+    periods once for the whole batch, rather than once per mortgage, and gives
+    exactly the same cent-rounded numbers as amortizing each one separately.
+
+    Parameters
+    ----------
+    principal: array_like
+        Value of each mortgage
+    years: array_like
+        Amortization period of each mortgage
+    rate: array_like
+        APR rate of each mortgage as posted online
+    payment_type: array_like of ["monthly", "bi_weekly", "acc_bi_weekly"]
+        type of payment plan for each mortgage, default "monthly"
+    addl_pmt: array_like, default 0
+        additional regular contributions on each mortgage
+
+    Returns
+    -------
+    dict
+        {"Begin_balance", "Payment", "Principal", "Interest", "Additional_payment",
+        "End_balance"}: mortgages x periods arrays, with each mortgage padded
+        with zeros after it's paid off, plus "payoff_period", the number of
+        payments each mortgage took. Periods are payments, not months, so
+        bi-weekly mortgages take more of them.
+
+    Raises
+    ------
+    ValueError
+        If a payment type isn't one of the supported schedules
+    """
+    principal, years, rate, payment_type, addl_pmt = np.broadcast_arrays(
+        np.asarray(principal, dtype=float),
+        np.asarray(years),
+        np.asarray(rate, dtype=float),
+        np.asarray(payment_type),
+        np.asarray(addl_pmt, dtype=float),
+    )
+    principal, years, rate, payment_type, addl_pmt = (
+        np.ravel(arr) for arr in (principal, years, rate, payment_type, addl_pmt)
+    )
+    unknown = set(np.unique(payment_type)) - set(PAYMENTS_PER_YEAR)
+    if unknown:
+        raise ValueError(f"Unknown payment types {sorted(unknown)}")
+    payments_per_year = np.vectorize(PAYMENTS_PER_YEAR.get, otypes=[int])(payment_type)
+    periodic_interest_rate = periodic_rate(rate, payments_per_year)
+    # Same payment calculations as Mortgage.monthly_payment and friends
+    pmt = -np.round(
+        npf.pmt(periodic_interest_rate, years * payments_per_year, principal), 2
+    )
+    accelerated = payment_type == "acc_bi_weekly"
+    if accelerated.any():
+        monthly_pmt = -np.round(
+            npf.pmt(periodic_rate(rate, 12), years * 12, principal), 2
+        )
+        pmt = np.where(accelerated, np.round(monthly_pmt / 2, 2), pmt)
+
+    n_mortgages = principal.size
+    # Rounding the payment down to the cent can leave a stub final payment
+    capacity = int((years * payments_per_year).max(initial=0)) + 2
+    columns = [
+        "Begin_balance",
+        "Payment",
+        "Principal",
+        "Interest",
+        "Additional_payment",
+        "End_balance",
+    ]
+    # Fill period-major buffers so each step writes a contiguous row
+    out = {col: np.zeros((capacity, n_mortgages)) for col in columns}
+    payoff_period = np.zeros(n_mortgages, dtype=int)
+    beg_balance = principal.copy()
+    active = beg_balance > 0
+    per = 0
+    while active.any():
+        if per == capacity:
+            out = {
+                col: np.concatenate([arr, np.zeros_like(arr)])
+                for col, arr in out.items()
             }
-            pmt = periods_dict[payment_type]()
-            rate = (1 + (self.rate / 2)) ** 2 - 1
-            if payment_type == "monthly":
-                periodic_interest_rate = (1 + rate) ** (1 / 12) - 1
-                date_increment = relativedelta(months=1)
-            else:
-                periodic_interest_rate = (1 + rate) ** (1 / 26) - 1
-                date_increment = relativedelta(weeks=2)
-
-            # initialize the variables to keep track of the periods and running balance
-            per = 1
-            beg_balance = self.principal
-            end_balance = self.principal
-            start_date = date.today().replace(day=1) + relativedelta(months=1)
-
-            while end_balance > 0:
-                # recalculate interest based on the current balance
-                interest = round(periodic_interest_rate * beg_balance, 2)
-
-                # Determine payment based on if this will pay off the loan
-                pmt = min(pmt, beg_balance + interest)
-                principal = pmt - interest
-
-                # Ensure additional payment gets adjusted if the loan is being paid off
-                adp = min(adp, beg_balance - principal)
-                end_balance = beg_balance - (principal + adp)
-
-                yield OrderedDict(
-                    [
-                        ("Date", start_date),
-                        ("Period", per),
-                        ("Begin_balance", beg_balance),
-                        ("Payment", pmt),
-                        ("Principal", principal),
-                        ("Interest", interest),
-                        ("Additional_payment", adp),
-                        ("End_balance", end_balance),
-                    ]
-                )
-                # increment the counter, balance and date
-                per += 1
-                start_date += date_increment
-                beg_balance = end_balance
-
-        df = (
-            pd.DataFrame(amortizdict())
-            .assign(Date=lambda df: pd.to_datetime(df["Date"]))
-            .set_index("Date")
-            .drop(columns=["Period"])
-            .resample("MS")
-            .agg(
-                {
-                    "Begin_balance": "max",
-                    "Payment": "sum",
-                    "Principal": "sum",
-                    "Interest": "sum",
-                    "Additional_payment": "sum",
-                    "End_balance": "min",
-                }
-            )
-            .assign(total_payment=lambda df: df["Payment"] + df["Additional_payment"])
+            capacity *= 2
+        interest = np.rint(periodic_interest_rate * beg_balance * 100) / 100
+        period_pmt = np.minimum(pmt, beg_balance + interest)
+        principal_paid = period_pmt - interest
+        adp = np.minimum(addl_pmt, beg_balance - principal_paid)
+        end_balance = beg_balance - (principal_paid + adp)
+        for col, values in zip(
+            columns,
+            (beg_balance, period_pmt, principal_paid, interest, adp, end_balance),
+        ):
+            out[col][per] = np.where(active, values, 0)
+        per += 1
+        payoff_period[active] = per
+        beg_balance = np.where(active, end_balance, 0)
+        active &= end_balance > 0
+    result = {col: arr[:per].T for col, arr in out.items()}
+    result["payoff_period"] = payoff_period
+    return result
+
+
+def _renewal_payment(balance, rate, remaining_years, payment_type):
+    """Payment that pays a balance off over what's left of the amortization.
+
+    Same calculations as ``Mortgage.monthly_payment`` and friends, element-wise.
+
+    Parameters
+    ----------
+    balance: np.ndarray
+        Balance outstanding at renewal in each simulation
+    rate: np.ndarray
+        APR for the new term in each simulation
+    remaining_years: int
+        Years left on the amortization
+    payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"]
+        type of payment plan
+
+    Returns
+    -------
+    np.ndarray
+        The regular payment for the new term
+    """
+    if payment_type == "acc_bi_weekly":
+        monthly = -np.round(
+            npf.pmt(periodic_rate(rate, 12), remaining_years * 12, balance), 2
         )
-        return df
+        return np.round(monthly / 2, 2)
+    payments_per_year = PAYMENTS_PER_YEAR[payment_type]
+    return -np.round(
+        npf.pmt(
+            periodic_rate(rate, payments_per_year),
+            remaining_years * payments_per_year,
+            balance,
+        ),
+        2,
+    )
+
+
+def renewal_amortize(
+    principal,
+    years,
+    rates,
+    term_years=5,
+    payment_type="monthly",
+    addl_pmt=0,
+    payment_rows=None,
+):
+    """Amortize a mortgage that renews at a new rate every term, in every simulation.
+
+    Canadian mortgages are amortized over 25 years or so but the rate is only
+    fixed for a term, usually 5 years. At each renewal the payment is worked
+    out again from the balance still owing, the new rate and the years left on
+    the amortization. Each simulation gets its own path of rates, and the
+    balance recursion steps through the payments once for all of them, like
+    ``batch_amortize``. The first term is exactly ``Mortgage.schedule`` at the
+    first rate.
+
+    Parameters
+    ----------
+    principal: numeric
+        Value of the mortgage
+    years: int
+        Amortization period of the mortgage
+    rates: array_like
+        terms x simulations APR for each term in each simulation, starting with
+        the first. If the mortgage outlives the rows, the last rate carries on.
+        Negative rates are floored at zero
+    term_years: int, default 5
+        Years between renewals
+    payment_type: ["monthly", "bi_weekly", "acc_bi_weekly"], default "monthly"
+        type of payment plan
+    addl_pmt: numeric, default 0
+        additional regular contributions
+    payment_rows: array_like of int, default None
+        Row of the result each payment is added to, like the month it's paid in
+        so bi-weekly payments roll up by month. Only payments with a row are
+        made. Defaults to a row per payment for the whole amortization
+
+    Returns
+    -------
+    dict
+        {"Payment", "Interest", "Additional_payment", "End_balance"}: rows x
+        simulations arrays. Payments are summed over each row, End_balance is
+        the balance after its last payment
+
+    Raises
+    ------
+    ValueError
+        If payment_type isn't one of the supported schedules
+    """
+    if payment_type not in PAYMENTS_PER_YEAR:
+        raise ValueError(f"Unknown payment type {payment_type}")
+    rates = np.maximum(np.atleast_2d(np.asarray(rates, dtype=float)), 0)
+    payments_per_year = PAYMENTS_PER_YEAR[payment_type]
+    term_payments = term_years * payments_per_year
+    if payment_rows is None:
+        # Rounding the payment down to the cent can leave a stub final payment
+        payment_rows = np.arange(years * payments_per_year + 2)
+    payment_rows = np.asarray(payment_rows)
+    shape = (int(payment_rows.max(initial=-1)) + 1, rates.shape[1])
+    columns = ("Payment", "Interest", "Additional_payment", "End_balance")
+    out = {col: np.zeros(shape) for col in columns}
+    balance = np.full(rates.shape[1], float(principal))
+    addl_pmt = float(addl_pmt)
+    for number, row in enumerate(payment_rows):
+        if number % term_payments == 0:
+            term = number // term_payments
+            rate = rates[min(term, len(rates) - 1)]
+            periodic_interest_rate = periodic_rate(rate, payments_per_year)
+            if years > term * term_years:
+                pmt = _renewal_payment(
+                    balance, rate, years - term * term_years, payment_type
+                )
+        interest = np.rint(periodic_interest_rate * balance * 100) / 100
+        # The final payment and additional payment get trimmed to what's owing
+        period_pmt = np.minimum(pmt, balance + interest)
+        principal_paid = period_pmt - interest
+        adp = np.minimum(addl_pmt, balance - principal_paid)
+        balance = balance - (principal_paid + adp)
+        out["Payment"][row] += period_pmt
+        out["Interest"][row] += interest
+        out["Additional_payment"][row] += adp
+        out["End_balance"][row] = balance
+        if not balance.any():
+            break
+    return out
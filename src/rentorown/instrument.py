@@ -0,0 +1,129 @@
+"""Time named stages of a model run and trace the memory they use."""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextlib import nullcontext
+
+
+_NOT_TIMED = nullcontext()
+
+
+def stage(timer, name):
+    """Time a stage if there's a timer, otherwise do nothing.
+
+    Parameters
+    ----------
+    timer: StageTimer or None
+        Where to record the stage, None if instrumentation is off
+    name: str
+        Name of the stage
+
+    Returns
+    -------
+    context manager
+        Records the stage on exit
+    """
+    if timer is None:
+        return _NOT_TIMED
+    return timer.stage(name)
+
+
+class StageTimer:
+    """Record wall time and memory for named stages of a model run.
+
+    Each time a stage runs, the record has its wall ``seconds``, the
+    ``allocated_bytes`` still held at the end of it and the ``peak_bytes`` it
+    needed at most on top of what was allocated going in. Memory is measured
+    with tracemalloc, which is started for the stage if it isn't running
+    already.
+
+    Parameters
+    ----------
+    hook: callable, default None
+        Called with the stage name and its record after every stage, to pass
+        them on to a metrics system for example
+    trace_memory: bool, default True
+        Trace memory as well as time. tracemalloc slows down code that makes a
+        lot of small Python allocations, so turn it off for pure timings
+
+    Attributes
+    ----------
+    stages: dict
+        Stage name to totals over every time it ran: ``calls``, ``seconds``,
+        ``allocated_bytes`` and the largest ``peak_bytes``
+    log: list
+        (name, record) for each stage in the order they finished
+
+    Notes
+    -----
+    Stages shouldn't be nested, measuring an inner stage's peak resets the
+    outer one's on Python 3.9 and later, where peaks are available at all.
+    Before that ``peak_bytes`` is the same as ``allocated_bytes``.
+    """
+
+    def __init__(self, hook=None, trace_memory=True):
+        self.hook = hook
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.log = []
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as a named stage.
+
+        Parameters
+        ----------
+        name: str
+            Name of the stage
+
+        Yields
+        ------
+        None
+            Run the stage inside the with block
+        """
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            before = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = peak = 0
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                allocated = current - before
+                peak = max(peak - before, allocated)
+                if not hasattr(tracemalloc, "reset_peak"):
+                    peak = allocated
+            if started_tracing:
+                tracemalloc.stop()
+            self.add(
+                name,
+                {"seconds": seconds, "allocated_bytes": allocated, "peak_bytes": peak},
+            )
+
+    def add(self, name, record):
+        """Record a stage that was timed somewhere else, like a worker process.
+
+        Parameters
+        ----------
+        name: str
+            Name of the stage
+        record: dict
+            {"seconds", "allocated_bytes", "peak_bytes"} for one run of the stage
+        """
+        self.log.append((name, record))
+        totals = self.stages.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "allocated_bytes": 0, "peak_bytes": 0}
+        )
+        totals["calls"] += 1
+        totals["seconds"] += record["seconds"]
+        totals["allocated_bytes"] += record["allocated_bytes"]
+        totals["peak_bytes"] = max(totals["peak_bytes"], record["peak_bytes"])
+        if self.hook is not None:
+            self.hook(name, record)
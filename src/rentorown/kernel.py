@@ -0,0 +1,424 @@
+"""Compiled kernels for the loops that can't be written as array operations.
+
+The fused net worth kernels compound returns and value them in a single pass,
+and the amortization kernel runs a mortgage's cent rounded balance recursion.
+"""
+import numpy as np
+
+
+#: Compiled kernels, filled in the first time they're needed
+_COMPILED = {}
+
+
+def _own_loop(returns, one, house_price, own_debt, own_net_worth):
+    """Compound house returns into appreciation and net worth, numba version.
+
+    Works period by period across the chunk, carrying each simulation's price
+    along, so every element is read once and written once. Every operation is
+    done in the dtype of returns, in the same order as the NumPy path, so the
+    results are identical.
+
+    Parameters
+    ----------
+    returns: np.ndarray
+        periods x simulations raw returns, overwritten with house appreciation
+    one: np.floating
+        1 in the dtype of returns
+    house_price: np.floating
+        Purchase price in the dtype of returns
+    own_debt: np.ndarray
+        periods x simulations mortgage balance in the dtype of returns
+    own_net_worth: np.ndarray
+        periods x simulations buffer for the owner's net worth
+    """
+    periods, simulations = returns.shape
+    price = np.empty_like(returns[0])
+    for j in range(simulations):
+        # The first draw is compounded into later periods, but the first
+        # period itself is normalized to 1
+        price[j] = returns[0, j] + one
+        returns[0, j] = house_price
+        own_net_worth[0, j] = house_price - own_debt[0, j]
+    for t in range(1, periods):
+        for j in range(simulations):
+            price[j] = price[j] * (returns[t, j] + one)
+            returns[t, j] = price[j] * house_price
+            own_net_worth[t, j] = returns[t, j] - own_debt[t, j]
+
+
+def _rent_loop(returns, one, invest, drawdown, terminal):
+    """Compound investment returns into renter net worth, numba version.
+
+    Parameters
+    ----------
+    returns: np.ndarray
+        periods x simulations raw returns, overwritten with renter net worth
+    one: np.floating
+        1 in the dtype of returns
+    invest: np.ndarray
+        periods x simulations cash invested in the dtype of returns
+    drawdown: np.ndarray
+        periods x simulations cash drawn down in the dtype of returns
+    terminal: np.ndarray
+        Buffer for the final cumulative return in each simulation
+    """
+    periods, simulations = returns.shape
+    price = np.empty_like(returns[0])
+    units = np.empty_like(returns[0])
+    for j in range(simulations):
+        price[j] = returns[0, j] + one
+        units[j] = invest[0, j]
+        returns[0, j] = units[j] - drawdown[0, j]
+        terminal[j] = one
+    for t in range(1, periods):
+        for j in range(simulations):
+            price[j] = price[j] * (returns[t, j] + one)
+            units[j] = units[j] + invest[t, j] / price[j]
+            returns[t, j] = units[j] * price[j] - drawdown[t, j]
+            terminal[j] = price[j]
+
+
+def _own_rows(returns, one, house_price, own_debt, own_net_worth):
+    """Compound house returns into appreciation and net worth with NumPy.
+
+    Same as ``_own_loop``, a row of periods at a time so the working set stays
+    in cache instead of streaming whole matrices through memory for each step.
+
+    Parameters
+    ----------
+    returns: np.ndarray
+        periods x simulations raw returns, overwritten with house appreciation
+    one: np.floating
+        1 in the dtype of returns
+    house_price: np.floating
+        Purchase price in the dtype of returns
+    own_debt: np.ndarray
+        periods x simulations mortgage balance in the dtype of returns
+    own_net_worth: np.ndarray
+        periods x simulations buffer for the owner's net worth
+    """
+    price = returns[0] + one
+    returns[0] = house_price
+    np.subtract(returns[0], own_debt[0], out=own_net_worth[0])
+    for t in range(1, len(returns)):
+        row = returns[t]
+        np.add(row, one, out=row)
+        np.multiply(price, row, out=price)
+        np.multiply(price, house_price, out=row)
+        np.subtract(row, own_debt[t], out=own_net_worth[t])
+
+
+def _rent_rows(returns, one, invest, drawdown, terminal):
+    """Compound investment returns into renter net worth with NumPy.
+
+    Parameters
+    ----------
+    returns: np.ndarray
+        periods x simulations raw returns, overwritten with renter net worth
+    one: np.floating
+        1 in the dtype of returns
+    invest: np.ndarray
+        periods x simulations cash invested in the dtype of returns
+    drawdown: np.ndarray
+        periods x simulations cash drawn down in the dtype of returns
+    terminal: np.ndarray
+        Buffer for the final cumulative return in each simulation
+    """
+    price = returns[0] + one
+    units = np.empty_like(price)
+    units[...] = invest[0]
+    np.subtract(units, drawdown[0], out=returns[0])
+    terminal[...] = one
+    for t in range(1, len(returns)):
+        row = returns[t]
+        np.add(row, one, out=row)
+        np.multiply(price, row, out=price)
+        np.divide(invest[t], price, out=row)
+        np.add(units, row, out=units)
+        np.multiply(units, price, out=row)
+        np.subtract(row, drawdown[t], out=row)
+    if len(returns) > 1:
+        terminal[...] = price
+
+
+def _amortize_loop(
+    principal, rate, payment, additional, begin, interest, payments, additionals
+):
+    """Run the balance recursion of an amortization schedule, numba version.
+
+    Interest is rounded to the cent every period, half to even like
+    ``np.round``, so each balance depends on the rounding before it and the
+    recursion has to run period by period.
+
+    Parameters
+    ----------
+    principal: float
+        Amount borrowed
+    rate: float
+        Interest rate charged each payment period
+    payment: float
+        Regular payment
+    additional: float
+        Additional payment each period
+    begin: np.ndarray
+        Buffer for the balance at the start of each period
+    interest: np.ndarray
+        Buffer for the interest charged each period
+    payments: np.ndarray
+        Buffer for the payment made each period
+    additionals: np.ndarray
+        Buffer for the additional payment made each period
+
+    Returns
+    -------
+    tuple
+        (payments made, balance left), with a balance left if the buffers ran
+        out first
+    """
+    balance = principal
+    remaining = principal
+    n = 0
+    while remaining > 0 and n < len(begin):
+        charged = np.rint(rate * balance * 100) / 100
+        # Payments get trimmed to what's owing, and stay trimmed after
+        payment = min(payment, balance + charged)
+        principal_paid = payment - charged
+        additional = min(additional, balance - principal_paid)
+        remaining = balance - (principal_paid + additional)
+        begin[n] = balance
+        interest[n] = charged
+        payments[n] = payment
+        additionals[n] = additional
+        balance = remaining
+        n += 1
+    return n, remaining
+
+
+def _amortize_steps(
+    principal, rate, payment, additional, begin, interest, payments, additionals
+):
+    """Run the balance recursion of an amortization schedule in Python.
+
+    Same as ``_amortize_loop``, on plain floats since numpy scalars are much
+    slower one at a time.
+
+    Parameters
+    ----------
+    principal: float
+        Amount borrowed
+    rate: float
+        Interest rate charged each payment period
+    payment: float
+        Regular payment
+    additional: float
+        Additional payment each period
+    begin: np.ndarray
+        Buffer for the balance at the start of each period
+    interest: np.ndarray
+        Buffer for the interest charged each period
+    payments: np.ndarray
+        Buffer for the payment made each period
+    additionals: np.ndarray
+        Buffer for the additional payment made each period
+
+    Returns
+    -------
+    tuple
+        (payments made, balance left), with a balance left if the buffers ran
+        out first
+    """
+    rows = []
+    balance = remaining = principal
+    for _ in range(len(begin)):
+        if remaining <= 0:
+            break
+        # round is half to even, the same as np.rint
+        charged = round(rate * balance * 100) / 100
+        payment = min(payment, balance + charged)
+        principal_paid = payment - charged
+        additional = min(additional, balance - principal_paid)
+        remaining = balance - (principal_paid + additional)
+        rows.append((balance, charged, payment, additional))
+        balance = remaining
+    n = len(rows)
+    if n:
+        begin[:n], interest[:n], payments[:n], additionals[:n] = zip(*rows)
+    return n, remaining
+
+
+def _kernels():
+    """Compile the numba kernels, or fall back to the NumPy ones.
+
+    Returns
+    -------
+    dict
+        "own", "rent" and "amortize" kernels, and the "backend" they use
+    """
+    if not _COMPILED:
+        try:
+            import numba
+        except ImportError:
+            _COMPILED.update(
+                backend="numpy",
+                own=_own_rows,
+                rent=_rent_rows,
+                amortize=_amortize_steps,
+            )
+        else:
+            jit = numba.njit(nogil=True, cache=True)
+            _COMPILED.update(
+                backend="numba",
+                own=jit(_own_loop),
+                rent=jit(_rent_loop),
+                amortize=jit(_amortize_loop),
+            )
+    return _COMPILED
+
+
+def _broadcast(cash_flow, returns):
+    """Give a cash flow a value for every period and simulation.
+
+    Parameters
+    ----------
+    cash_flow: np.ndarray
+        One value per period, or periods x simulations
+    returns: np.ndarray
+        periods x simulations returns it goes with
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations in the dtype of returns, a read only view if the
+        cash flow is shared by every simulation
+    """
+    cash_flow = cash_flow.astype(returns.dtype, copy=False)
+    if cash_flow.ndim == 1:
+        cash_flow = cash_flow[:, None]
+    return np.broadcast_to(cash_flow, returns.shape)
+
+
+def backend():
+    """Say which implementation the fused kernels use.
+
+    Returns
+    -------
+    str
+        "numba" if it's installed, otherwise "numpy"
+    """
+    _kernels()
+    return _COMPILED["backend"]
+
+
+def own_net_worth(house_price, own_debt, house_returns):
+    """Turn raw house returns into owner net worth in one pass.
+
+    Gives the same results as compounding the returns with ``distreturns`` and
+    passing them to ``rentorown._own_net_worth``, without the intermediate
+    matrices.
+
+    Parameters
+    ----------
+    house_price: numeric
+        The purchase price of the house
+    own_debt: np.ndarray
+        Mortgage balance outstanding at the end of each period, for every
+        simulation or periods x simulations
+    house_returns: np.ndarray
+        periods x simulations raw returns on the house, as from ``distreturns``
+        with compound=False. Overwritten with the house appreciation result
+
+    Returns
+    -------
+    dict
+        {"house_appreciation", "own_net_worth"}: periods x simulations arrays
+    """
+    own = _kernels()["own"]
+    dtype = house_returns.dtype
+    own_net_worth = np.empty_like(house_returns)
+    own(
+        house_returns,
+        dtype.type(1),
+        dtype.type(house_price),
+        _broadcast(own_debt, house_returns),
+        own_net_worth,
+    )
+    return {"house_appreciation": house_returns, "own_net_worth": own_net_worth}
+
+
+def rent_net_worth(rent_invest_cash_flow, rent_drawdown_cash_flow, asset_returns):
+    """Turn raw investment returns into renter net worth in one pass.
+
+    Gives the same results as compounding the returns with ``distreturns`` and
+    passing them to ``rentorown._rent_net_worth``. Net worth is written over
+    the returns, so nothing periods x simulations is allocated at all.
+
+    Parameters
+    ----------
+    rent_invest_cash_flow: np.ndarray
+        Cash the renter has left over to invest each period, for every
+        simulation or periods x simulations
+    rent_drawdown_cash_flow: np.ndarray
+        Cash the renter is short each period (zero or negative), same shape
+    asset_returns: np.ndarray
+        periods x simulations raw returns on the investment portfolio, as from
+        ``distreturns`` with compound=False. Overwritten with the net worth
+
+    Returns
+    -------
+    dict
+        {"rent_net_worth", "investment_terminal"}, the latter the final
+        cumulative return on the investments in each simulation
+    """
+    rent = _kernels()["rent"]
+    dtype = asset_returns.dtype
+    terminal = np.empty_like(asset_returns[0])
+    rent(
+        asset_returns,
+        dtype.type(1),
+        _broadcast(rent_invest_cash_flow, asset_returns),
+        _broadcast(rent_drawdown_cash_flow, asset_returns),
+        terminal,
+    )
+    return {"rent_net_worth": asset_returns, "investment_terminal": terminal}
+
+
+def amortize(principal, rate, payment, additional, periods):
+    """Work out the balances and interest of a cent rounded amortization.
+
+    Parameters
+    ----------
+    principal: float
+        Amount borrowed
+    rate: float
+        Interest rate charged each payment period
+    payment: float
+        Regular payment
+    additional: float
+        Additional payment each period
+    periods: int
+        Number of payments it's expected to take, more are made if needed
+
+    Returns
+    -------
+    dict
+        {"Begin_balance", "Interest", "Payment", "Additional_payment"}: arrays
+        with one entry per payment, payments trimmed to what was owing
+    """
+    amortize_kernel = _kernels()["amortize"]
+    capacity = periods + 16
+    while True:
+        buffers = {
+            key: np.empty(capacity)
+            for key in ("Begin_balance", "Interest", "Payment", "Additional_payment")
+        }
+        n, remaining = amortize_kernel(
+            float(principal),
+            float(rate),
+            float(payment),
+            float(additional),
+            *buffers.values(),
+        )
+        if remaining <= 0:
+            break
+        capacity *= 2
+    return {key: values[:n] for key, values in buffers.items()}
@@ -0,0 +1,390 @@
+"""Save simulation results to disk as a bundle of .npy files and load them back."""
+import hashlib
+import json
+import numbers
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+#: Bumped whenever the layout of a bundle changes
+BUNDLE_FORMAT = 1
+
+
+def _to_json(value):
+    """Convert numpy values json doesn't know about.
+
+    Parameters
+    ----------
+    value: object
+        Something ``json.dumps`` couldn't serialize
+
+    Returns
+    -------
+    object
+        A plain Python equivalent
+
+    Raises
+    ------
+    TypeError
+        If it isn't a numpy value either
+    """
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Can't save {value!r} in bundle metadata")
+
+
+def asset_to_json(asset_dict):
+    """Make an asset dictionary JSON serializable.
+
+    Parameters
+    ----------
+    asset_dict: dict
+        "dist" and "dist_args" as passed to ``distreturns``
+
+    Returns
+    -------
+    dict
+        The same, with a numpy.random distribution replaced by its name
+
+    Raises
+    ------
+    ValueError
+        If dist isn't one of the functions in numpy.random, since there's no
+        telling how to get anything else back
+    """
+    asset_dict = dict(asset_dict)
+    dist = asset_dict.get("dist")
+    if dist is not None:
+        name = getattr(dist, "__name__", None)
+        if name is None or getattr(np.random, name, None) is not dist:
+            raise ValueError(
+                f"Only numpy.random distributions can be saved, not {dist}"
+            )
+        asset_dict["dist"] = f"numpy.random.{name}"
+    return asset_dict
+
+
+def asset_from_json(asset_dict):
+    """Undo ``asset_to_json``.
+
+    Parameters
+    ----------
+    asset_dict: dict
+        Asset dictionary as saved
+
+    Returns
+    -------
+    dict
+        Asset dictionary with its distribution function back
+    """
+    asset_dict = dict(asset_dict)
+    if "dist" in asset_dict:
+        asset_dict["dist"] = getattr(np.random, asset_dict["dist"].rpartition(".")[2])
+    return asset_dict
+
+
+def save_bundle(path, arrays, metadata):
+    """Write arrays as .npy files in a directory, along with their metadata.
+
+    The metadata is written last, so a bundle whose save was interrupted has
+    none and won't load.
+
+    Parameters
+    ----------
+    path: str or os.PathLike
+        Directory to save to, created if it doesn't exist
+    arrays: dict
+        name: np.ndarray, saved to name.npy
+    metadata: dict
+        Anything JSON serializable, numpy values included
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(path / f"{name}.npy", np.asanyarray(array), allow_pickle=False)
+    metadata = {"format": BUNDLE_FORMAT, "arrays": sorted(arrays), **metadata}
+    (path / "metadata.json").write_text(
+        json.dumps(metadata, indent=2, default=_to_json) + "\n"
+    )
+
+
+def load_bundle(path, mmap_mode="r"):
+    """Load a bundle written by ``save_bundle``.
+
+    Parameters
+    ----------
+    path: str or os.PathLike
+        Directory the bundle was saved to
+    mmap_mode: {"r", "r+", "c", None}, default "r"
+        Passed on to ``np.load``. By default arrays are memory mapped read only,
+        so nothing is read from disk until it's used. None reads them into memory
+
+    Returns
+    -------
+    tuple of dict
+        (arrays, metadata)
+
+    Raises
+    ------
+    ValueError
+        If the bundle was written in a format this version doesn't know
+    """
+    path = Path(path)
+    metadata = json.loads((path / "metadata.json").read_text())
+    if metadata.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unknown bundle format {metadata.get('format')} in {path}")
+    arrays = {
+        name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+        for name in metadata["arrays"]
+    }
+    return arrays, metadata
+
+
+def _source_hash():
+    """Hash the package's source files.
+
+    Returns
+    -------
+    str
+        First 12 hex digits of the SHA-256 of every module, in name order
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def library_version():
+    """Identify the installed rentorown code.
+
+    The distribution version alone doesn't change between edits to a source
+    checkout or an editable install, so the hash of the source is added to it.
+
+    Returns
+    -------
+    str
+        "version+source hash", with "unknown" for the version if the package
+        isn't installed, like when it's run from a checkout on the path
+    """
+    try:
+        from importlib import metadata
+    except ImportError:  # Python 3.7
+        import importlib_metadata as metadata
+    try:
+        version = metadata.version("rentorown")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{version}+{_source_hash()}"
+
+
+def _canonical(value):
+    """Normalize inputs so equal ones serialize the same way.
+
+    Numbers all become floats, so 2000 and 2000.0 are the same rent, and tuples
+    become lists.
+
+    Parameters
+    ----------
+    value: object
+        JSON like input
+
+    Returns
+    -------
+    object
+        The normalized input
+    """
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def content_hash(parameters, exact=None):
+    """Hash model inputs into a stable key.
+
+    Parameters
+    ----------
+    parameters: dict
+        JSON serializable inputs, normalized with ``_canonical`` first
+    exact: dict, default None
+        Inputs hashed as they are, like seeds, where ints have to stay ints
+
+    Returns
+    -------
+    str
+        Hex SHA-256 digest of the canonical JSON
+    """
+    document = {"parameters": _canonical(parameters), "exact": exact or {}}
+    text = json.dumps(document, sort_keys=True, default=_to_json)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """Least recently used cache of saved models in a local directory.
+
+    Each entry is a bundle written by ``RentOrOwn.save`` in a directory named
+    after the model's ``cache_key``, so identical inputs find the same results.
+    The cache is bounded by the total size of its files, evicting whichever
+    entry was used longest ago. Entries are written to a temporary directory
+    and renamed into place, so a half written entry is never found.
+
+    Parameters
+    ----------
+    directory: str or os.PathLike
+        Where to keep the cache, created if it doesn't exist
+    max_bytes: int, default 4 GiB
+        How much to store before evicting the least recently used entries
+    version: str, default None
+        Library version the results belong to, ``library_version()`` if None.
+        A cache written by a different version is cleared on opening, since
+        the results might not match any more
+    """
+
+    def __init__(self, directory, max_bytes=4 * 2**30, version=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self.version = library_version() if version is None else version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        version_file = self.directory / "VERSION"
+        if version_file.exists() and version_file.read_text() != self.version:
+            self.invalidate()
+        version_file.write_text(self.version)
+
+    def _entries(self):
+        """List cached entries, least recently used first.
+
+        Returns
+        -------
+        list of tuple
+            (last used time, bytes, path) for each entry
+        """
+        entries = []
+        for path in self.directory.iterdir():
+            if path.is_dir() and not path.name.startswith("."):
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append((path.stat().st_mtime, size, path))
+        return sorted(entries)
+
+    def __len__(self):
+        """Count cached entries.
+
+        Returns
+        -------
+        int
+            Number of cached entries
+        """
+        return len(self._entries())
+
+    @property
+    def nbytes(self):
+        """int: Total size of the cached files."""
+        return sum(size for _, size, _ in self._entries())
+
+    @property
+    def max_bytes(self):
+        """int: Capacity of the cache, shrinking it evicts straight away."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+        self._evict()
+
+    def get(self, key, mmap_mode="r"):
+        """Load a cached entry, if there is one.
+
+        Parameters
+        ----------
+        key: str
+            The entry's key
+        mmap_mode: {"r", "r+", "c", None}, default "r"
+            Passed on to ``load_bundle``
+
+        Returns
+        -------
+        tuple of dict or None
+            (arrays, metadata) as from ``load_bundle``, None on a miss
+        """
+        path = self.directory / key
+        if not (path / "metadata.json").exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Mark it as recently used
+        os.utime(path)
+        return load_bundle(path, mmap_mode=mmap_mode)
+
+    def put(self, key, save):
+        """Store an entry, evicting old ones if that puts us over capacity.
+
+        Entries bigger than the whole cache aren't kept.
+
+        Parameters
+        ----------
+        key: str
+            The entry's key
+        save: callable
+            Called with a directory to write the entry's bundle to
+        """
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.directory))
+        try:
+            save(staging)
+            size = sum(f.stat().st_size for f in staging.iterdir())
+            if size <= self._max_bytes and not (self.directory / key).exists():
+                os.replace(staging, self.directory / key)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until we're under capacity."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def invalidate(self):
+        """Delete every cached entry, keeping the statistics."""
+        for path in self.directory.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """Report how well the cache is doing.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, number of entries, bytes held and capacity
+        """
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "nbytes": sum(size for _, size, _ in entries),
+            "max_bytes": self._max_bytes,
+        }
@@ -1,17 +1,973 @@
 """Calculate if you should rent or own for a given scenario."""
-import locale
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.ticker import StrMethodFormatter
 
+from rentorown import kernel
 from rentorown.asset import annual_to_monthly_return
+from rentorown.asset import compound_returns
+from rentorown.asset import correlated_distreturns
+from rentorown.asset import default_dist_args
 from rentorown.asset import distreturns
+from rentorown.asset import expected_terminal_return
+from rentorown.asset import sobol_distreturns
 from rentorown.house import House
 from rentorown.house import Mortgage
+from rentorown.house import PAYMENTS_PER_YEAR
+from rentorown.house import renewal_amortize
+from rentorown.instrument import stage
+from rentorown.instrument import StageTimer
+from rentorown.persist import asset_from_json
+from rentorown.persist import asset_to_json
+from rentorown.persist import content_hash
+from rentorown.persist import load_bundle
+from rentorown.persist import save_bundle
+from rentorown.summary import confidence_interval
+from rentorown.summary import control_variate_mean
+from rentorown.summary import quantile_bands
+from rentorown.summary import StreamingSummary
 
+#: Inputs that are distribution dictionaries, saved with ``asset_to_json``
+DISTRIBUTION_PARAMETERS = (
+    "housing_asset_dict",
+    "investment_asset_dict",
+    "mortgage_rate_dict",
+    "inflation_dict",
+    "rent_growth_dict",
+)
 
-locale.setlocale(locale.LC_ALL, "")
+#: Metrics the adaptive mode can target, and the statistic bounded for each
+TOLERANCE_METRICS = {
+    "prob_own_wins": "mean",
+    "gap": "mean",
+    "median_gap": "median",
+}
+
+#: Inputs ``sensitivities`` can vary while keeping the same return paths
+CASH_FLOW_INPUTS = (
+    "monthly_rent",
+    "house_price",
+    "down_payment",
+    "mortgage_apr",
+    "additional_purchase_costs",
+    "additional_monthly_costs",
+    "mortgage_additional_payments",
+    "annual_inflation",
+    "monthly_property_tax_rate",
+    "maintenance_cost",
+)
+
+#: Inputs that move the mean monthly return of an asset, and the side it's on
+RETURN_INPUTS = {"housing_return": "own", "investment_return": "rent"}
+
+
+def _per_simulation(values, dtype):
+    """Line cash flows up against periods x simulations results.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        One value per period shared by every simulation, or periods x
+        simulations
+    dtype: np.dtype
+        Floating point type to convert to
+
+    Returns
+    -------
+    np.ndarray
+        periods x 1 or periods x simulations
+    """
+    values = values.astype(dtype, copy=False)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _renewal_rates(rate, rate_dict, terms, simulations, rng):
+    """Draw the posted rate for each mortgage term in each simulation.
+
+    Parameters
+    ----------
+    rate: float
+        APR for the first term
+    rate_dict: dict or None
+        "dist" and "dist_args" for the change in rate at each renewal, as for
+        ``distreturns``. None keeps the first rate throughout
+    terms: int
+        Number of terms over the amortization
+    simulations: int
+        Number of simulations
+    rng: np.random.Generator
+        Random stream to draw from
+
+    Returns
+    -------
+    np.ndarray
+        terms x simulations APRs, floored at zero
+    """
+    rates = np.full((terms, simulations), float(rate))
+    if rate_dict is not None and terms > 1:
+        changes = distreturns(
+            **rate_dict,
+            periods=terms - 1,
+            simulations=simulations,
+            rng=rng,
+            compound=False,
+        )
+        rates[1:] += np.cumsum(changes, axis=0)
+    return np.maximum(rates, 0, out=rates)
+
+
+def _child_seed(seed_seq, index):
+    """Derive a numbered stream from a seed without spawning from it.
+
+    Spawning counts children on the SeedSequence itself, so calling it again
+    for the other side of the same chunk would give different streams. This is
+    the same child every time.
+
+    Parameters
+    ----------
+    seed_seq: np.random.SeedSequence
+        Parent stream
+    index: int
+        Which child
+
+    Returns
+    -------
+    np.random.SeedSequence
+        The child stream
+    """
+    return np.random.SeedSequence(
+        seed_seq.entropy, spawn_key=tuple(seed_seq.spawn_key) + (index,)
+    )
+
+
+def _growth_paths(growth_dict, periods, simulations, rng):
+    """Compound random monthly growth rates into a growth factor per simulation.
+
+    Parameters
+    ----------
+    growth_dict: dict
+        "dist" and "dist_args" for the growth rate each month, as for
+        ``distreturns``
+    periods: int
+        Number of periods
+    simulations: int
+        Number of simulations
+    rng: np.random.Generator
+        Random stream to draw from
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations cumulative growth, already grown by the first
+        month's rate in the first period like ``RentOrOwn._inflated_series``
+    """
+    growth = distreturns(
+        **growth_dict,
+        periods=periods,
+        simulations=simulations,
+        rng=rng,
+        compound=False,
+    )
+    growth += 1
+    return np.cumprod(growth, axis=0, out=growth)
+
+
+def _chunk_mortgage(cash_flows, simulations, seed_seq):
+    """Mortgage balance and payments for one chunk.
+
+    Parameters
+    ----------
+    cash_flows: dict
+        ``RentOrOwn._cash_flows``
+    simulations: int
+        Number of simulations in the chunk
+    seed_seq: np.random.SeedSequence
+        The chunk's stream for random cash flows, renewal rates are drawn
+        straight from it
+
+    Returns
+    -------
+    tuple of np.ndarray
+        (balance owing, regular and additional payments), periods x simulations
+        with a renewing mortgage and shared by every simulation without
+    """
+    renewal = cash_flows.get("renewal")
+    if renewal is None:
+        return cash_flows["own_debt"], cash_flows["mortgage_cash_flow"]
+    rates = _renewal_rates(
+        renewal["rate"],
+        renewal["rate_dict"],
+        -(-renewal["years"] // renewal["term_years"]),
+        simulations,
+        np.random.default_rng(seed_seq),
+    )
+    schedule = renewal_amortize(
+        renewal["principal"],
+        renewal["years"],
+        rates,
+        term_years=renewal["term_years"],
+        payment_type=renewal["payment_type"],
+        addl_pmt=renewal["addl_pmt"],
+        payment_rows=renewal["payment_rows"],
+    )
+    # Reuse the payment buffer for the total
+    payments = schedule["Payment"]
+    payments += schedule["Additional_payment"]
+    return schedule["End_balance"], payments
+
+
+def _chunk_other_cash_flow(cash_flows, periods, simulations, seed_seq):
+    """Owner's costs besides the mortgage, less the rent, for one chunk.
+
+    Parameters
+    ----------
+    cash_flows: dict
+        ``RentOrOwn._cash_flows``
+    periods: int
+        Number of periods
+    simulations: int
+        Number of simulations in the chunk
+    seed_seq: np.random.SeedSequence
+        The chunk's stream for random cash flows, inflation and rent growth get
+        children of their own
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations with random inflation or rent growth, periods x 1
+        otherwise
+    """
+    inflation = rent_growth = None
+    if cash_flows["inflation_dict"] is not None:
+        inflation = rent_growth = _growth_paths(
+            cash_flows["inflation_dict"],
+            periods,
+            simulations,
+            np.random.default_rng(_child_seed(seed_seq, 0)),
+        )
+    if cash_flows["rent_growth_dict"] is not None:
+        rent_growth = _growth_paths(
+            cash_flows["rent_growth_dict"],
+            periods,
+            simulations,
+            np.random.default_rng(_child_seed(seed_seq, 1)),
+        )
+    if inflation is None:
+        other = cash_flows["non_mortgage_costs"].copy()
+    else:
+        other = cash_flows["non_mortgage_costs_start"] * inflation
+    other[0] += cash_flows["purchase_cash"]
+    if rent_growth is None:
+        rent = cash_flows["rent"]
+    else:
+        rent = cash_flows["monthly_rent"] * rent_growth
+    return _per_simulation(other, float) - _per_simulation(rent, float)
+
+
+def _chunk_cash_flows(cash_flows, periods, simulations, seed_seq):
+    """Work out cash flows that differ between simulations for one chunk.
+
+    With a renewing mortgage each simulation gets its own rate path, so the
+    balance owing and the payments differ between simulations. With random
+    inflation or rent growth so do the other costs and the rent. Either way
+    what the renter has to invest becomes periods x simulations, drawn for the
+    whole chunk at once.
+
+    Parameters
+    ----------
+    cash_flows: dict
+        ``RentOrOwn._cash_flows``
+    periods: int
+        Number of periods
+    simulations: int
+        Number of simulations in the chunk
+    seed_seq: np.random.SeedSequence
+        The chunk's stream for random cash flows
+
+    Returns
+    -------
+    dict
+        house_price, own_debt, rent_invest_cash_flow and rent_drawdown_cash_flow
+    """
+    own_debt, mortgage_cash_flow = _chunk_mortgage(cash_flows, simulations, seed_seq)
+    other = _chunk_other_cash_flow(cash_flows, periods, simulations, seed_seq)
+    if mortgage_cash_flow.ndim == 2:
+        rent_net_cash_flow = mortgage_cash_flow
+        rent_net_cash_flow += other
+    else:
+        rent_net_cash_flow = mortgage_cash_flow[:, None] + other
+    return {
+        "house_price": cash_flows["house_price"],
+        "own_debt": own_debt,
+        "rent_invest_cash_flow": np.maximum(rent_net_cash_flow, 0),
+        "rent_drawdown_cash_flow": np.minimum(rent_net_cash_flow, 0),
+    }
+
+
+def _own_net_worth(house_price, own_debt, house_returns):
+    """Turn simulated house prices into owner net worth.
+
+    Parameters
+    ----------
+    house_price: numeric
+        The purchase price of the house
+    own_debt: np.ndarray
+        Mortgage balance outstanding at the end of each period, for every
+        simulation or periods x simulations
+    house_returns: np.ndarray
+        periods x simulations cumulative returns on the house. Scaled in place
+        into the house appreciation result
+
+    Returns
+    -------
+    dict
+        {"house_appreciation", "own_net_worth"}: periods x simulations arrays
+    """
+    dtype = house_returns.dtype
+    house_appreciation = np.multiply(house_returns, house_price, out=house_returns)
+    own_net_worth = house_appreciation - _per_simulation(own_debt, dtype)
+    return {"house_appreciation": house_appreciation, "own_net_worth": own_net_worth}
+
+
+def _rent_net_worth(
+    rent_invest_cash_flow,
+    rent_drawdown_cash_flow,
+    asset_prices,
+    keep_intermediates=False,
+):
+    """Turn simulated investment prices into renter net worth.
+
+    Works in the dtype of the simulated prices and reuses one buffer in place,
+    so apart from the prices only one periods x simulations array is allocated.
+
+    Parameters
+    ----------
+    rent_invest_cash_flow: np.ndarray
+        Cash the renter has left over to invest each period, for every
+        simulation or periods x simulations
+    rent_drawdown_cash_flow: np.ndarray
+        Cash the renter is short each period (zero or negative), same shape
+    asset_prices: np.ndarray
+        periods x simulations cumulative returns on the investment portfolio
+    keep_intermediates: bool, default False
+        Also return the asset prices, cumulative units purchased and the value
+        of the renter's investments, mostly handy for debugging
+
+    Returns
+    -------
+    dict
+        {"rent_net_worth"}: periods x simulations array, plus {"ap", "aup", "riv"}
+        if keep_intermediates, and "investment_terminal", the final cumulative
+        return on the investments in each simulation
+    """
+    dtype = asset_prices.dtype
+    results = {}
+    # One buffer goes from units bought, to units held, to value, to net worth
+    rent_net_worth = _per_simulation(rent_invest_cash_flow, dtype) / asset_prices
+    np.cumsum(rent_net_worth, axis=0, out=rent_net_worth)
+    if keep_intermediates:
+        results["ap"] = asset_prices
+        results["aup"] = rent_net_worth.copy()
+    np.multiply(rent_net_worth, asset_prices, out=rent_net_worth)
+    if keep_intermediates:
+        results["riv"] = rent_net_worth.copy()
+    np.subtract(
+        rent_net_worth,
+        _per_simulation(rent_drawdown_cash_flow, dtype),
+        out=rent_net_worth,
+    )
+    results["rent_net_worth"] = rent_net_worth
+    # Cheap to keep and handy as a control variate
+    results["investment_terminal"] = asset_prices[-1].copy()
+    return results
+
+
+def _simulate_chunk(
+    sides,
+    simulations,
+    periods,
+    cash_flows,
+    keep=None,
+    keep_intermediates=False,
+    dtype=np.float64,
+    sampling="standard",
+    instrument=False,
+    trace_memory=True,
+    fused=False,
+    cash_flow_seed=None,
+    correlated=None,
+):
+    """Draw and evaluate one chunk of simulations.
+
+    Lives at module level so it can be shipped off to worker processes.
+
+    Parameters
+    ----------
+    sides: dict
+        Maps "own" and/or "rent" to a tuple of the asset dictionary (dist and
+        dist_args) for the house or investment portfolio, and the
+        np.random.SeedSequence for its random stream
+    simulations: int
+        Number of simulations in the chunk
+    periods: int
+        Number of periods to simulate
+    cash_flows: dict
+        Inputs: house_price, own_debt, rent_invest_cash_flow and
+        rent_drawdown_cash_flow, or what ``_chunk_cash_flows`` needs to work
+        them out for each simulation
+    keep: tuple of str, default None
+        Which results to return, all if None
+    keep_intermediates: bool, default False
+        Passed on to ``_rent_net_worth``
+    dtype: np.dtype, default np.float64
+        Floating point type to simulate in
+    sampling: {"standard", "antithetic", "sobol"}, default "standard"
+        Passed on to ``distreturns``. With "sobol" both sides should get the same
+        seed, the house takes the first block of dimensions and the investments
+        the second
+    instrument: bool, default False
+        Time each stage of the chunk and return the StageTimer log as
+        "stage_timings" so the parent process can record it
+    trace_memory: bool, default True
+        Passed on to the StageTimer if instrumented
+    fused: bool, default False
+        Compound and value the returns with the single pass kernels in
+        ``rentorown.kernel`` rather than a NumPy pass for each step. The
+        renter's side still takes the NumPy path if keep_intermediates
+    cash_flow_seed: np.random.SeedSequence, default None
+        Stream for cash flows that differ between simulations, like mortgage
+        renewal rates and inflation
+    correlated: dict, default None
+        "means", "stdevs" and "correlation" to draw the house and investment
+        returns together with ``correlated_distreturns``, rather than each from
+        its own asset dictionary. Both sides should get the same seed
+
+    Returns
+    -------
+    dict
+        The results of ``_own_net_worth`` and/or ``_rent_net_worth`` for this chunk
+    """
+    timer = StageTimer(trace_memory=trace_memory) if instrument else None
+    results = {}
+    if "rent_invest_cash_flow" not in cash_flows:
+        with stage(timer, "cash_flow_paths"):
+            cash_flows = _chunk_cash_flows(
+                cash_flows, periods, simulations, cash_flow_seed
+            )
+    joint = None
+    if correlated is not None or sampling == "sobol":
+        with stage(timer, "joint_returns"):
+            joint = _joint_returns(
+                sides, correlated, periods, simulations, dtype, sampling
+            )
+    for side, (asset_dict, seed_seq) in sides.items():
+        fuse = fused and not (side == "rent" and keep_intermediates)
+        with stage(timer, f"{side}_returns"):
+            prices = _draw_returns(
+                side,
+                asset_dict,
+                seed_seq,
+                periods,
+                simulations,
+                dtype,
+                sampling,
+                joint=joint,
+                compound=not fuse,
+            )
+        with stage(timer, f"{side}_net_worth"):
+            if fuse:
+                results.update(_fused_net_worth(side, cash_flows, prices))
+            elif side == "own":
+                results.update(
+                    _own_net_worth(
+                        cash_flows["house_price"], cash_flows["own_debt"], prices
+                    )
+                )
+            else:
+                results.update(
+                    _rent_net_worth(
+                        cash_flows["rent_invest_cash_flow"],
+                        cash_flows["rent_drawdown_cash_flow"],
+                        prices,
+                        keep_intermediates=keep_intermediates,
+                    )
+                )
+    if keep is not None:
+        results = {key: results[key] for key in keep}
+    if timer is not None:
+        results["stage_timings"] = timer.log
+    return results
+
+
+def _draw_returns(
+    side,
+    asset_dict,
+    seed_seq,
+    periods,
+    simulations,
+    dtype,
+    sampling,
+    joint=None,
+    compound=True,
+):
+    """Draw the returns on one side's asset for a chunk.
+
+    Parameters
+    ----------
+    side: {"own", "rent"}
+        Whose asset, the house or the investments
+    asset_dict: dict
+        "dist" and "dist_args" for the asset
+    seed_seq: np.random.SeedSequence
+        The side's stream
+    periods: int
+        Number of periods
+    simulations: int
+        Number of simulations in the chunk
+    dtype: np.dtype
+        Floating point type to simulate in
+    sampling: {"standard", "antithetic", "sobol"}
+        Passed on to ``distreturns``
+    joint: dict, default None
+        Raw returns from ``_joint_returns`` to use instead of drawing them
+    compound: bool, default True
+        Compound the returns, otherwise leave them raw
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations returns
+    """
+    if joint is not None:
+        return compound_returns(joint[side]) if compound else joint[side]
+    return distreturns(
+        **asset_dict,
+        periods=periods,
+        simulations=simulations,
+        rng=np.random.default_rng(seed_seq),
+        dtype=dtype,
+        sampling=sampling,
+        asset_index=0 if side == "own" else 1,
+        n_assets=2,
+        compound=compound,
+    )
+
+
+def _joint_returns(sides, correlated, periods, simulations, dtype, sampling):
+    """Draw the house and investment returns for one chunk together, if they are.
+
+    Correlated assets come out of one multivariate normal draw and with Sobol
+    sampling both sides take their dimensions from one point set, so either way
+    a single draw serves both sides.
+
+    Parameters
+    ----------
+    sides: dict
+        Asset dictionaries and seeds, as for ``_simulate_chunk``. Both sides
+        share the first one's stream
+    correlated: dict or None
+        "means", "stdevs" and "correlation" of the house and investments
+    periods: int
+        Number of periods
+    simulations: int
+        Number of simulations in the chunk
+    dtype: np.dtype
+        Floating point type to simulate in
+    sampling: {"standard", "antithetic", "sobol"}
+        Passed on to ``correlated_distreturns``
+
+    Returns
+    -------
+    dict or None
+        "own" and "rent" raw returns, or None if each side draws its own
+    """
+    seed_seq = next(iter(sides.values()))[1]
+    rng = np.random.default_rng(seed_seq)
+    if correlated is not None:
+        correlation = correlated["correlation"]
+        own, rent = correlated_distreturns(
+            correlated["means"],
+            corr=[[1, correlation], [correlation, 1]],
+            stdevs=correlated["stdevs"],
+            periods=periods,
+            simulations=simulations,
+            rng=rng,
+            dtype=dtype,
+            sampling=sampling,
+            compound=False,
+        )
+    elif sampling == "sobol" and len(sides) == 2:
+        own, rent = sobol_distreturns(
+            [sides["own"][0], sides["rent"][0]],
+            periods=periods,
+            simulations=simulations,
+            rng=rng,
+            dtype=dtype,
+            compound=False,
+        )
+    else:
+        return None
+    return {"own": own, "rent": rent}
+
+
+def _fused_net_worth(side, cash_flows, returns):
+    """Compound and value raw returns with the fused kernels.
+
+    Parameters
+    ----------
+    side: {"own", "rent"}
+        Which side the returns are for
+    cash_flows: dict
+        Deterministic inputs, as for ``_simulate_chunk``
+    returns: np.ndarray
+        periods x simulations raw returns
+
+    Returns
+    -------
+    dict
+        Same as ``_own_net_worth`` or ``_rent_net_worth``
+    """
+    if side == "own":
+        return kernel.own_net_worth(
+            cash_flows["house_price"], cash_flows["own_debt"], returns
+        )
+    return kernel.rent_net_worth(
+        cash_flows["rent_invest_cash_flow"],
+        cash_flows["rent_drawdown_cash_flow"],
+        returns,
+    )
+
+
+def _shifted_prices(raw, shift):
+    """Compound raw returns moved by a constant.
+
+    Parameters
+    ----------
+    raw: np.ndarray
+        periods x simulations raw returns, left alone
+    shift: float
+        Added to every return before compounding
+
+    Returns
+    -------
+    np.ndarray
+        periods x simulations cumulative returns
+    """
+    return compound_returns(raw + raw.dtype.type(shift))
+
+
+def _simulate_variants(
+    sides,
+    simulations,
+    periods,
+    variants,
+    period,
+    dtype=np.float64,
+    sampling="standard",
+    cash_flow_seed=None,
+    correlated=None,
+):
+    """Value several sets of inputs against one chunk of return paths.
+
+    Every variant sees the same draws, so the differences between them come
+    from the inputs rather than noise. Only net worth in one period is worked
+    out, so returns are compounded up to that period and no further, once for
+    each distinct shift in their mean. Lives at module level so it can be
+    shipped off to worker processes.
+
+    Parameters
+    ----------
+    sides: dict
+        "own" and "rent" asset dictionaries and seeds, as for ``_simulate_chunk``
+    simulations: int
+        Number of simulations in the chunk
+    periods: int
+        Number of periods in the cash flows
+    variants: list of dict
+        "cash_flows", as for ``_simulate_chunk``, and "shifts", the amount
+        added to every monthly return on the "own" and "rent" sides
+    period: int
+        Which period to value, counting from 0
+    dtype: np.dtype, default np.float64
+        Floating point type to simulate in
+    sampling: {"standard", "antithetic", "sobol"}, default "standard"
+        Passed on to ``distreturns``
+    cash_flow_seed: np.random.SeedSequence, default None
+        Stream for cash flows that differ between simulations, shared by every
+        variant
+    correlated: dict, default None
+        Passed on to ``_joint_returns``
+
+    Returns
+    -------
+    dict
+        "own" and "rent": variants x simulations net worth in the period
+    """
+    joint = _joint_returns(sides, correlated, periods, simulations, dtype, sampling)
+    raw = {
+        side: _draw_returns(
+            side, *sides[side], periods, simulations, dtype, sampling, joint, False
+        )[: period + 1]
+        for side in ("own", "rent")
+    }
+    results = {
+        "own": np.empty((len(variants), simulations), dtype),
+        "rent": np.empty((len(variants), simulations), dtype),
+    }
+    houses = {}
+    groups = {}
+    for i, variant in enumerate(variants):
+        groups.setdefault(variant["shifts"]["rent"], []).append(i)
+    for shift, members in groups.items():
+        # Only one shift's compounded investment returns are held at a time
+        investments = _shifted_prices(raw["rent"], shift)
+        shared = {}
+        for i in members:
+            cash_flows = variants[i]["cash_flows"]
+            if "rent_invest_cash_flow" not in cash_flows:
+                cash_flows = _chunk_cash_flows(
+                    cash_flows, periods, simulations, cash_flow_seed
+                )
+            house_shift = variants[i]["shifts"]["own"]
+            if house_shift not in houses:
+                houses[house_shift] = _shifted_prices(raw["own"], house_shift)[period]
+            own_debt = _per_simulation(cash_flows["own_debt"], dtype)[period]
+            results["own"][i] = houses[house_shift] * cash_flows["house_price"]
+            results["own"][i] -= own_debt
+            invest = _per_simulation(cash_flows["rent_invest_cash_flow"], dtype)
+            drawdown = _per_simulation(cash_flows["rent_drawdown_cash_flow"], dtype)
+            results["rent"][i] = -drawdown[period]
+            shared[i] = invest[: period + 1]
+        _value_investments(results["rent"], shared, investments)
+    return results
+
+
+def _value_investments(rent, invests, investments):
+    """Add the value of the renter's investments to their net worth.
+
+    Variants whose cash flows are shared by every simulation are stacked on a
+    scenario axis and valued with one matrix product, which is where sweeps
+    over a lot of inputs spend most of their time.
+
+    Parameters
+    ----------
+    rent: np.ndarray
+        variants x simulations net worth, added to in place
+    invests: dict
+        Row of rent to cash invested in each period, periods x 1 if it's the
+        same for every simulation or periods x simulations
+    investments: np.ndarray
+        periods x simulations cumulative investment returns for these variants
+    """
+    inverse = 1 / investments
+    stacked = []
+    for i, invest in invests.items():
+        if invest.shape[1] == 1:
+            stacked.append(i)
+        else:
+            rent[i] += np.einsum("ts,ts->s", invest, inverse) * investments[-1]
+    if stacked:
+        scenarios = np.concatenate([invests[i] for i in stacked], axis=1)
+        rent[stacked] += (scenarios.T @ inverse) * investments[-1]
+
+
+def _fit_schedule(schedule, periods):
+    """Cut a monthly mortgage schedule to a horizon, or extend it past payoff.
+
+    Rounding can leave a last payment of a few cents, so similar mortgages can
+    run a month longer or shorter than each other.
+
+    Parameters
+    ----------
+    schedule: dict
+        Monthly schedule, as from ``Mortgage.monthly_schedule``
+    periods: int
+        Number of months wanted
+
+    Returns
+    -------
+    dict
+        The schedule with that many months, nothing owed or paid in any added
+    """
+    extra = periods - len(schedule["Date"])
+    if extra <= 0:
+        return {key: values[:periods] for key, values in schedule.items()}
+    fitted = {
+        key: np.concatenate([values, np.zeros(extra, values.dtype)])
+        for key, values in schedule.items()
+        if key != "Date"
+    }
+    fitted["Date"] = np.concatenate(
+        [schedule["Date"], schedule["Date"][-1] + np.arange(1, extra + 1)]
+    )
+    return fitted
+
+
+def _gap_metrics(own, rent):
+    """Summarize owner and renter net worth in one period.
+
+    Parameters
+    ----------
+    own: np.ndarray
+        Owner net worth in each simulation, along the last axis
+    rent: np.ndarray
+        Renter net worth in the same simulations
+
+    Returns
+    -------
+    dict
+        "median_gap", "mean_gap" and "prob_own_wins" over the simulations
+    """
+    gap = own - rent
+    return {
+        "median_gap": np.median(gap, axis=-1),
+        "mean_gap": gap.mean(axis=-1),
+        "prob_own_wins": (gap > 0).mean(axis=-1),
+    }
+
+
+def _crossing(values):
+    """Find where a sequence of differences from a target first changes sign.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Metric minus target at increasing values of an input
+
+    Returns
+    -------
+    int
+        i such that the target is reached at values[i] or between it and
+        values[i + 1]
+
+    Raises
+    ------
+    ValueError
+        If the target isn't reached anywhere in between
+    """
+    signs = np.sign(values)
+    crossings = np.flatnonzero((signs[:-1] != signs[1:]) | (signs[:-1] == 0))
+    if not crossings.size:
+        raise ValueError(
+            "The target isn't reached in the bracket, it goes from "
+            f"{values[0]:+g} to {values[-1]:+g} away from it"
+        )
+    return int(crossings[0])
+
+
+def _check_correlated(correlation, sampling, *asset_dicts):
+    """Make sure assets can be drawn with ``correlated_distreturns``.
+
+    Parameters
+    ----------
+    correlation: float or None
+        Correlation between the assets, None if they're independent
+    sampling: str
+        Sampling mode
+    *asset_dicts: dict
+        The assets' distribution dictionaries
+
+    Raises
+    ------
+    ValueError
+        If the correlation is out of range, the sampling mode isn't supported or
+        an asset isn't normally distributed
+    """
+    if correlation is None:
+        return
+    if not -1 < correlation < 1:
+        raise ValueError("asset_correlation must be between -1 and 1")
+    if sampling == "sobol":
+        raise ValueError("sobol sampling can't draw correlated assets")
+    for asset_dict in asset_dicts:
+        if asset_dict.get("dist") not in (None, np.random.normal):
+            raise ValueError("Correlated assets have to be normally distributed")
+
+
+def _chunk_sizes(simulations, chunk_size, sampling):
+    """Split the simulations into chunks.
+
+    Scrambled Sobol points are only balanced in powers of 2, so with sobol
+    sampling chunks are the largest power of 2 no bigger than chunk_size, and
+    the rest is split into powers of 2 by its binary digits.
+
+    Parameters
+    ----------
+    simulations: int
+        Total number of simulations
+    chunk_size: int
+        Most simulations in a chunk
+    sampling: str
+        Sampling mode
+
+    Returns
+    -------
+    list of int
+        Number of simulations in each chunk
+    """
+    if sampling != "sobol":
+        return [
+            min(chunk_size, simulations - start)
+            for start in range(0, simulations, chunk_size)
+        ]
+    chunk_size = 2 ** (chunk_size.bit_length() - 1)
+    remainder = simulations % chunk_size
+    return [chunk_size] * (simulations // chunk_size) + [
+        2**bit
+        for bit in reversed(range(remainder.bit_length()))
+        if remainder >> bit & 1
+    ]
+
+
+def _seed_sequence(seed):
+    """Turn whatever we were given as a seed into a np.random.SeedSequence.
+
+    Parameters
+    ----------
+    seed: int, np.random.SeedSequence, np.random.Generator or None
+        The seed, fresh entropy if None
+
+    Returns
+    -------
+    np.random.SeedSequence
+        Root of all the model's random streams. A SeedSequence is copied, so
+        the caller's is never spawned from and the streams only depend on its
+        entropy and spawn key, like the cache key
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(
+            seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size
+        )
+    if isinstance(seed, np.random.Generator):
+        # Seed from the generator's current state so it's still reproducible
+        return np.random.SeedSequence(seed.integers(2**63, size=4))
+    return np.random.SeedSequence(seed)
+
+
+def _stage_timer(instrument, timing_hook):
+    """Set up the StageTimer a model records its stages with, if any.
+
+    Parameters
+    ----------
+    instrument: bool or StageTimer
+        Whether to time stages, or the timer to use
+    timing_hook: callable or None
+        Hook to call with every stage
+
+    Returns
+    -------
+    StageTimer or None
+        None if instrumentation is off
+    """
+    if isinstance(instrument, StageTimer):
+        if timing_hook is not None:
+            instrument.hook = timing_hook
+        return instrument
+    if instrument or timing_hook is not None:
+        return StageTimer(hook=timing_hook)
+    return None
 
 
 class RentOrOwn:
@@ -26,16 +982,29 @@ class RentOrOwn:
     other financial assumptions, and based on them the model will show which is the
     better financial decision (assuming I built the model correctly).
 
+    Nothing is calculated up front. The mortgage schedule, the owner's and the
+    renter's simulations are each worked out the first time they're asked for and
+    then cached, so if you only look at the mortgage you never pay for the Monte
+    Carlo.
 
     Notes
     -----
     Things to do:
 
-    Lot of cleanup on __init__, some of the class variables can just be transient,
-    or better named. Could use more inline comments. Might be worth breaking up into
-    more functions. Some of the nested array Transposes could probably be fixed up.
+    Could use more inline comments.
     """
 
+    #: Simulations are drawn in chunks of this many. Each chunk gets its
+    #: own random stream, so results don't depend on how many workers share them.
+    simulation_chunk_size = 10_000
+
+    #: Quantiles kept per period in ``quantile_bands`` and shaded by ``fan_chart``.
+    #: The median is always added
+    band_quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+    #: Number of bins in ``histogram``
+    histogram_bins = 100
+
     def __init__(
         self,
         monthly_rent,
@@ -53,6 +1022,24 @@ class RentOrOwn:
         annual_inflation=0.02,
         monthly_property_tax_rate=None,
         maintenance_cost=0.01,
+        seed=None,
+        workers=None,
+        keep_simulations=True,
+        keep_intermediates=False,
+        dtype=np.float64,
+        sampling="standard",
+        tolerance=None,
+        tolerance_metric="prob_own_wins",
+        confidence=0.95,
+        instrument=False,
+        timing_hook=None,
+        result_cache=None,
+        fused=False,
+        mortgage_term_years=None,
+        mortgage_rate_dict=None,
+        inflation_dict=None,
+        rent_growth_dict=None,
+        asset_correlation=None,
     ):
         """
         Input all the assumptions that will go into the rent or own model.
@@ -68,13 +1055,16 @@ class RentOrOwn:
         mortgage_amortization_years: int
             How many years the mortgage on the house will be amortized over
         mortgage_apr: float
-            The posted rate for the mortgage (right now it stays fixed over the whole
-            period. I know that's not realistic, to be updated in a future release maybe
+            The posted rate for the mortgage. It stays fixed over the whole
+            amortization unless mortgage_term_years is given, then it's the rate
+            for the first term
         housing_asset_dict: dictionary
             dictionary with keys "dist" and "dist_args" that will be used to parameterize
             the monthly returns of the housing asset. For example, dist could be
-            np.random.norm and "dist_args" could be {"loc": 0.005, "scale": 0.02}
-            specifying a mean of 0.005 and a standard deviation of 0.02. Note that all
+            np.random.normal and "dist_args" could be {"loc": 0.005, "scale": 0.02}
+            specifying a mean of 0.005 and a standard deviation of 0.02. Leave out
+            dist for a normal distribution. numpy distributions are drawn from the
+            model's seeded np.random.Generator (see ``distreturns``). Note that all
             returns are monthly
         investment_asset_dict: dictionary
             Same as the housing asset dictionary, except this specifies the returns
@@ -82,7 +1072,7 @@ class RentOrOwn:
             between renting and owning will be put into
         number_of_simulations: int
             How many times to try this simulation, gets a distribution of outcomes to
-            compare over
+            compare over. With a tolerance this is the most that will be run
         additional_purchase_costs: numeric, default None
             Home inspection, title insurance etc. If None, defaults to the default of
             additional_costs in the House.buy method
@@ -93,7 +1083,8 @@ class RentOrOwn:
         mortgage_additional_payments: numeric, default 0
             If you want to make regular additional payments on your mortgage
         annual_inflation: float, default 0.02
-            rent and non mortgage ownership costs will grow at this rate
+            rent and non mortgage ownership costs will grow at this rate, unless
+            inflation_dict is given
         monthly_property_tax_rate: float, default None
             percentage of initial home value that will be charged. If default will take
             the default from the House class. Note that this is escalated by inflation,
@@ -101,59 +1092,1367 @@ class RentOrOwn:
         maintenance_cost: float, default 0.01
             The annual percentage of the starting value of the house that will go to
             maintenance and upkeep. Note that this is also escalated by inflation
+        seed: int, np.random.SeedSequence or np.random.Generator, default None
+            Seed for the simulations, fresh entropy if None. Either way it's
+            recorded in ``seed_entropy`` so a run can be reproduced. Simulations are
+            drawn in chunks of ``simulation_chunk_size``, each from an independent
+            np.random.Generator stream spawned from this seed
+        workers: int, default None
+            Number of processes to spread the simulation chunks over. Results for a
+            given seed are identical whatever the number of workers
+        keep_simulations: bool, default True
+            If False, simulations are only summarized into ``self.summary``, a
+            StreamingSummary of per period statistics. own_net_worth,
+            rent_net_worth and friends aren't kept, so memory is bounded by
+            ``simulation_chunk_size`` rather than number_of_simulations
+        keep_intermediates: bool, default False
+            Keep the simulated investment prices, units purchased and investment
+            value as ``ap``, ``aup`` and ``riv``. They're only really useful for
+            debugging and each is as big as own_net_worth
+        dtype: np.dtype, default np.float64
+            Floating point type for the simulations. np.float32 halves memory
+            at the cost of precision
+        sampling: {"standard", "antithetic", "sobol"}, default "standard"
+            "antithetic" mirrors each normal draw within a chunk so simulations
+            come in negatively correlated pairs, which tightens ``estimate`` for
+            the same number of simulations. Needs normal return distributions.
+            "sobol" draws the house and investment returns together from a
+            scrambled Sobol sequence (quasi Monte Carlo) per chunk, which
+            converges much faster for smooth results like medians. Needs scipy,
+            and works best with a power of 2 ``simulation_chunk_size``
+        tolerance: float, default None
+            If given, simulate a chunk of ``simulation_chunk_size`` at a time and
+            stop as soon as the confidence interval on tolerance_metric at the
+            end of the mortgage is narrower than this, or number_of_simulations
+            is reached. ``simulations_used`` says how many it took
+        tolerance_metric: {"prob_own_wins", "gap", "median_gap"}
+            What the tolerance applies to: the probability that owning beats
+            renting, the mean or the median of owning minus renting net worth.
+            Defaults to "prob_own_wins"
+        confidence: float, default 0.95
+            Coverage of the confidence interval the tolerance applies to
+        instrument: bool or StageTimer, default False
+            Record the wall time and memory of each stage of the model in
+            ``timings``: amortization, cash_flows, cash_flow_paths, joint_returns,
+            own_returns, own_net_worth, rent_returns, rent_net_worth, assemble,
+            summary and quantile_bands.
+            Pass a StageTimer to control memory tracing or share one between
+            models. Costs nothing when off
+        timing_hook: callable, default None
+            Called with the name and record of every stage as it finishes, in
+            this process even if the stage ran in a worker. Implies instrument
+        result_cache: ResultCache, default None
+            Look the simulations up in this cache before running them, and store
+            them there afterwards. Only seeded models with numpy.random return
+            distributions that keep their simulations are cached, anything else
+            always simulates
+        fused: bool, default False
+            Compound the returns and work out net worth in a single pass over
+            each chunk rather than a NumPy pass per step, with numba if it's
+            installed. Results are identical, it's just faster and allocates
+            less, especially for big chunks
+        mortgage_term_years: int, default None
+            Renew the mortgage every this many years, at a new rate drawn for
+            each simulation from mortgage_rate_dict. The payment is worked out
+            again at each renewal from the balance owing and the years left on
+            the amortization, so each simulation has its own mortgage balance and
+            payments. ``mortgage_df`` still shows the schedule at mortgage_apr,
+            and sets how many months are simulated. None keeps the rate fixed
+        mortgage_rate_dict: dictionary, default None
+            "dist" and "dist_args" for the change in the posted rate at each
+            renewal, like the asset dictionaries. Changes accumulate into a rate
+            path for each simulation, floored at zero. For example
+            {"dist_args": {"loc": 0, "scale": 0.01}}. None renews at mortgage_apr
+        inflation_dict: dictionary, default None
+            "dist" and "dist_args" for the monthly inflation rate, drawn for
+            every month of every simulation and compounded, in place of
+            annual_inflation. Non mortgage ownership costs, and the rent unless
+            rent_growth_dict is given, grow along each simulation's path. Use
+            ``annual_to_monthly_return`` for the loc, for example
+            {"dist_args": {"loc": annual_to_monthly_return(0.02), "scale": 0.002}}
+        rent_growth_dict: dictionary, default None
+            "dist" and "dist_args" for the monthly growth in rent, if it should
+            follow a path of its own rather than inflation
+        asset_correlation: float, default None
+            Correlation between the monthly house and investment returns. If
+            given, both are drawn together in one pass with
+            ``correlated_distreturns``, which needs normal distributions in
+            both asset dictionaries. None draws them independently
         """
+        if mortgage_payment_schedule not in PAYMENTS_PER_YEAR:
+            raise ValueError(
+                f"mortgage_payment_schedule must be one of {list(PAYMENTS_PER_YEAR)}"
+            )
+        if number_of_simulations < 1:
+            raise ValueError("number_of_simulations must be at least 1")
+        if sampling not in ("standard", "antithetic", "sobol"):
+            raise ValueError(f"Unknown sampling mode {sampling}")
+        if tolerance is not None and tolerance <= 0:
+            raise ValueError("tolerance must be positive")
+        if tolerance_metric not in TOLERANCE_METRICS:
+            raise ValueError(
+                f"tolerance_metric must be one of {list(TOLERANCE_METRICS)}"
+            )
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if mortgage_term_years is not None and mortgage_term_years < 1:
+            raise ValueError("mortgage_term_years must be at least 1")
+        _check_correlated(
+            asset_correlation, sampling, housing_asset_dict, investment_asset_dict
+        )
         house = House(value=house_price)
+        # buy checks the down payment is big enough, so do it now rather than later
         if additional_purchase_costs is None:
-            buy_dict = house.buy(down_payment=down_payment)
+            self._buy_dict = house.buy(down_payment=down_payment)
         else:
-            buy_dict = house.buy(
+            self._buy_dict = house.buy(
                 down_payment=down_payment, additional_costs=additional_purchase_costs
             )
-        mortgage = Mortgage(
-            buy_dict["mortgage"], mortgage_amortization_years, mortgage_apr
+        self._mortgage = Mortgage(
+            self._buy_dict["mortgage"], mortgage_amortization_years, mortgage_apr
         )
-        self.mortgage_df = mortgage.amortize(
-            addl_pmt=mortgage_additional_payments,
-            payment_type=mortgage_payment_schedule,
-        )
-        self._simulation_periods = self.mortgage_df.shape[0]
+        self._mortgage_payment_schedule = mortgage_payment_schedule
+        self._mortgage_additional_payments = mortgage_additional_payments
         self._inflation = annual_to_monthly_return(annual_inflation)
         if monthly_property_tax_rate is None:
             property_tax = house.monthly_property_tax()
         else:
             property_tax = house.monthly_property_tax(rate=monthly_property_tax_rate)
         maintenance = house_price * maintenance_cost / 12
-        non_mortgage_costs_start = property_tax + maintenance + additional_monthly_costs
-        non_mortgage_ownership_costs = self._inflated_series(non_mortgage_costs_start)
-        own_cash_flow = (
-            self.mortgage_df["total_payment"].to_numpy() + non_mortgage_ownership_costs
+        self._non_mortgage_costs_start = (
+            property_tax + maintenance + additional_monthly_costs
         )
-        own_cash_flow[0] += buy_dict["cash"]
-        self.house_appreciation = (
-            distreturns(
-                **housing_asset_dict,
-                periods=self._simulation_periods,
-                simulations=number_of_simulations,
+        # Everything besides the seed and run options needed to rebuild the model
+        self._parameters = {
+            "monthly_rent": monthly_rent,
+            "house_price": house_price,
+            "down_payment": down_payment,
+            "mortgage_amortization_years": mortgage_amortization_years,
+            "mortgage_apr": mortgage_apr,
+            "housing_asset_dict": housing_asset_dict,
+            "investment_asset_dict": investment_asset_dict,
+            "number_of_simulations": number_of_simulations,
+            "additional_purchase_costs": additional_purchase_costs,
+            "additional_monthly_costs": additional_monthly_costs,
+            "mortgage_payment_schedule": mortgage_payment_schedule,
+            "mortgage_additional_payments": mortgage_additional_payments,
+            "annual_inflation": annual_inflation,
+            "monthly_property_tax_rate": monthly_property_tax_rate,
+            "maintenance_cost": maintenance_cost,
+            "sampling": sampling,
+            "tolerance": tolerance,
+            "tolerance_metric": tolerance_metric,
+            "confidence": confidence,
+            "mortgage_term_years": mortgage_term_years,
+            "mortgage_rate_dict": mortgage_rate_dict,
+            "inflation_dict": inflation_dict,
+            "rent_growth_dict": rent_growth_dict,
+            "asset_correlation": asset_correlation,
+        }
+        self._monthly_rent = monthly_rent
+        self._house_price = house_price
+        self._asset_dicts = {"own": housing_asset_dict, "rent": investment_asset_dict}
+        self._number_of_simulations = number_of_simulations
+        self._workers = workers
+        self._keep_simulations = keep_simulations
+        self._keep_intermediates = keep_intermediates
+        self._dtype = dtype
+        self._sampling = sampling
+        self._tolerance = tolerance
+        self._tolerance_metric = tolerance_metric
+        self._confidence = confidence
+        self._timer = _stage_timer(instrument, timing_hook)
+        self._fused = fused
+        self._seed_seq = _seed_sequence(seed)
+        self.seed_entropy = self._seed_seq.entropy
+        # Fresh entropy would never be asked for again, so don't fill the cache
+        self._result_cache = None if seed is None else result_cache
+        self._cache = {}
+
+    @property
+    def mortgage_df(self):
+        """pandas.DataFrame: Monthly amortization schedule of the mortgage."""
+        if "mortgage_df" not in self._cache:
+            self._cache["mortgage_df"] = Mortgage.schedule_frame(
+                self._mortgage_schedule
             )
-            * house_price
+        return self._cache["mortgage_df"]
+
+    @property
+    def _mortgage_schedule(self):
+        """dict: The same schedule as ``mortgage_df`` as arrays, without pandas."""
+        if "mortgage_schedule" not in self._cache:
+            with stage(self._timer, "amortization"):
+                self._cache["mortgage_schedule"] = self._mortgage.monthly_schedule(
+                    addl_pmt=self._mortgage_additional_payments,
+                    payment_type=self._mortgage_payment_schedule,
+                )
+        return self._cache["mortgage_schedule"]
+
+    @property
+    def _simulation_periods(self):
+        """int: Number of months simulated, the life of the mortgage."""
+        return len(self._mortgage_schedule["End_balance"])
+
+    @property
+    def _cash_flows(self):
+        """dict: Inputs to the owner and renter simulations.
+
+        With a renewing mortgage, random inflation or rent growth they differ
+        between simulations, so they're left for ``_chunk_cash_flows`` to work
+        out chunk by chunk.
+        """
+        if "cash_flows" not in self._cache:
+            # Amortize first so it isn't timed as part of the cash flows
+            schedule = self._mortgage_schedule
+            with stage(self._timer, "cash_flows"):
+                non_mortgage_ownership_costs = self._inflated_series(
+                    self._non_mortgage_costs_start
+                )
+                rent_cash_flow = self._inflated_series(self._monthly_rent)
+                if self._random_cash_flows:
+                    # The rest is worked out per simulation in each chunk
+                    cash_flows = {
+                        "house_price": self._house_price,
+                        "purchase_cash": self._buy_dict["cash"],
+                        "non_mortgage_costs": non_mortgage_ownership_costs,
+                        "non_mortgage_costs_start": self._non_mortgage_costs_start,
+                        "rent": rent_cash_flow,
+                        "monthly_rent": self._monthly_rent,
+                        "inflation_dict": self._parameters["inflation_dict"],
+                        "rent_growth_dict": self._parameters["rent_growth_dict"],
+                    }
+                    if self._parameters["mortgage_term_years"] is None:
+                        cash_flows["own_debt"] = schedule["End_balance"]
+                        cash_flows["mortgage_cash_flow"] = (
+                            schedule["Payment"] + schedule["Additional_payment"]
+                        )
+                    else:
+                        cash_flows["renewal"] = self._renewal_terms
+                else:
+                    own_cash_flow = (
+                        schedule["Payment"]
+                        + schedule["Additional_payment"]
+                        + non_mortgage_ownership_costs
+                    )
+                    own_cash_flow[0] += self._buy_dict["cash"]
+                    rent_net_cash_flow = own_cash_flow - rent_cash_flow
+                    cash_flows = {
+                        "house_price": self._house_price,
+                        "own_debt": schedule["End_balance"],
+                        "rent_invest_cash_flow": np.maximum(rent_net_cash_flow, 0),
+                        "rent_drawdown_cash_flow": np.minimum(rent_net_cash_flow, 0),
+                    }
+                self._cache["cash_flows"] = cash_flows
+        return self._cache["cash_flows"]
+
+    @property
+    def _correlated(self):
+        """dict: Means, stdevs and correlation of the assets, None if independent."""
+        correlation = self._parameters["asset_correlation"]
+        if correlation is None:
+            return None
+        args = [
+            default_dist_args(self._asset_dicts[side].get("dist_args"))
+            for side in ("own", "rent")
+        ]
+        return {
+            "means": [dist_args.get("loc", 0.0) for dist_args in args],
+            "stdevs": [dist_args.get("scale", 1.0) for dist_args in args],
+            "correlation": correlation,
+        }
+
+    @property
+    def _random_cash_flows(self):
+        """bool: Whether cash flows differ between simulations."""
+        return any(
+            self._parameters[key] is not None
+            for key in ("mortgage_term_years", "inflation_dict", "rent_growth_dict")
         )
-        own_debt = self.mortgage_df["End_balance"].to_numpy()
-        self.own_net_worth = (self.house_appreciation.T - own_debt).T
-        rent_cash_flow = self._inflated_series(monthly_rent)
-        rent_net_cash_flow = own_cash_flow - rent_cash_flow
-        rent_invest_cash_flow = np.maximum(rent_net_cash_flow, 0)
-        rent_drawdown_cash_flow = np.minimum(rent_net_cash_flow, 0)
-        asset_prices = distreturns(
-            **investment_asset_dict,
-            periods=self._simulation_periods,
-            simulations=number_of_simulations,
+
+    @property
+    def _renewal_terms(self):
+        """dict: Arguments for ``renewal_amortize`` and the rate draws.
+
+        Payments are rolled up by the calendar month they fall in, the same way
+        as ``mortgage_df``, over the months it covers.
+        """
+        schedule = self._mortgage_schedule
+        payment_type = self._mortgage_payment_schedule
+        months = len(schedule["Date"])
+        # Bi-weekly plans make at most three payments in a month
+        dates = Mortgage.payment_dates(
+            months * PAYMENTS_PER_YEAR[payment_type] // 12 + 3,
+            payment_type=payment_type,
+            start_date=schedule["Date"][0].astype("datetime64[D]").item(),
         )
-        self.ap = asset_prices
-        asset_units_purchase = (rent_invest_cash_flow / asset_prices.T).T.cumsum(axis=0)
-        self.aup = asset_units_purchase
-        rent_investment_value = asset_units_purchase * asset_prices
-        self.riv = rent_investment_value
-        self.rent_net_worth = (rent_investment_value.T - rent_drawdown_cash_flow).T
+        rows = (dates.astype("datetime64[M]") - schedule["Date"][0]).astype(int)
+        return {
+            "principal": self._mortgage.principal,
+            "years": self._mortgage.years,
+            "rate": self._mortgage.rate,
+            "term_years": self._parameters["mortgage_term_years"],
+            "rate_dict": self._parameters["mortgage_rate_dict"],
+            "payment_type": payment_type,
+            "addl_pmt": self._mortgage_additional_payments,
+            "payment_rows": rows[rows < months],
+        }
+
+    @property
+    def _chunk_plan(self):
+        """list: (simulations, {"own": seed, "rent": seed}) for each chunk.
+
+        Each chunk gets a stream spawned from the model's seed, and within it one
+        each for the house and the investments so either side can be simulated
+        without the other. Sobol sampling gives both sides the same seed so they
+        scramble the same joint point set, as do correlated assets, which are
+        drawn together from one stream. Cash flows that differ between
+        simulations, like mortgage renewal rates, get a fourth stream under
+        "cash_flows".
+        """
+        if "chunk_plan" not in self._cache:
+            chunk_sizes = _chunk_sizes(
+                self._number_of_simulations, self.simulation_chunk_size, self._sampling
+            )
+            plan = []
+            for index, chunk_size in enumerate(chunk_sizes):
+                # Spawning from the model's seed would count children on it, so
+                # a second plan from the same seed would draw different paths
+                child_seq = _child_seed(self._seed_seq, index)
+                own_seq, rent_seq, joint_seq, cash_flow_seq = child_seq.spawn(4)
+                if (
+                    self._sampling == "sobol"
+                    or self._parameters["asset_correlation"] is not None
+                ):
+                    own_seq = rent_seq = joint_seq
+                plan.append(
+                    (
+                        chunk_size,
+                        {"own": own_seq, "rent": rent_seq, "cash_flows": cash_flow_seq},
+                    )
+                )
+            self._cache["chunk_plan"] = plan
+        return self._cache["chunk_plan"]
+
+    def _iter_chunks(self, sides, keep=None):
+        """Run the simulations chunk by chunk, optionally in a process pool.
+
+        Parameters
+        ----------
+        sides: tuple of str
+            Which of "own" and "rent" to simulate
+        keep: tuple of str, default None
+            Which results of ``_simulate_chunk`` to return, all if None
+
+        Returns
+        -------
+        iterator of dict
+            The results of ``_simulate_chunk`` for each chunk, in order
+        """
+        chunk_args = [
+            (
+                {side: (self._asset_dicts[side], seeds[side]) for side in sides},
+                chunk_size,
+                self._simulation_periods,
+                self._cash_flows,
+                keep,
+                self._keep_intermediates,
+                self._dtype,
+                self._sampling,
+                self._timer is not None,
+                self._timer is not None and self._timer.trace_memory,
+                self._fused,
+                seeds["cash_flows"],
+                self._correlated,
+            )
+            for chunk_size, seeds in self._chunk_plan
+        ]
+        return self._map_chunks(_simulate_chunk, chunk_args)
+
+    def _map_chunks(self, function, chunk_args):
+        """Run a function on every chunk, optionally in a process pool.
+
+        Chunks come back in order. With a pool, only a couple of chunks per worker
+        are in flight at once so memory stays bounded by the chunk size.
+
+        Parameters
+        ----------
+        function: callable
+            Module level function to run
+        chunk_args: list of tuple
+            Arguments for each chunk
+
+        Yields
+        ------
+        dict
+            What the function returns for each chunk
+        """
+        workers = self._workers
+        if workers is None or workers <= 1 or len(chunk_args) <= 1:
+            for args in chunk_args:
+                yield self._record_chunk_timings(function(*args))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            try:
+                for args in chunk_args:
+                    pending.append(executor.submit(function, *args))
+                    if len(pending) >= 2 * workers:
+                        yield self._record_chunk_timings(pending.popleft().result())
+                while pending:
+                    yield self._record_chunk_timings(pending.popleft().result())
+            finally:
+                # Don't wait on chunks nobody wants if we were stopped early
+                for future in pending:
+                    future.cancel()
+
+    def _record_chunk_timings(self, chunk):
+        """Move the stage timings a chunk brought back into the model's timer.
+
+        Parameters
+        ----------
+        chunk: dict
+            Results of ``_simulate_chunk``
+
+        Returns
+        -------
+        dict
+            The same results without the timings
+        """
+        for name, record in chunk.pop("stage_timings", ()):
+            self._timer.add(name, record)
+        return chunk
+
+    def _assemble(self, chunks):
+        """Stitch chunk results together into arrays over all simulations.
+
+        Parameters
+        ----------
+        chunks: iterable of dict
+            Results of ``_simulate_chunk``, in order
+
+        Returns
+        -------
+        dict
+            The same keys, with the simulations of every chunk along the last axis
+        """
+        results = {}
+        start = 0
+        for chunk in chunks:
+            with stage(self._timer, "assemble"):
+                # Fill preallocated outputs rather than concatenating at the end
+                if not results:
+                    results = {
+                        key: np.empty(
+                            values.shape[:-1] + (self._number_of_simulations,),
+                            self._dtype,
+                        )
+                        for key, values in chunk.items()
+                    }
+                stop = start + next(iter(chunk.values())).shape[-1]
+                for key, values in chunk.items():
+                    results[key][..., start:stop] = values
+                start = stop
+        return results
+
+    def _simulated(self, side):
+        """Simulate the owner or renter side once and cache the results.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which side to simulate
+
+        Returns
+        -------
+        dict
+            periods x simulations results of ``_simulate_chunk`` for all chunks
+
+        Raises
+        ------
+        AttributeError
+            If the model was set up to only keep summary statistics
+        """
+        if not self._keep_simulations:
+            raise AttributeError(
+                "Simulations aren't kept with keep_simulations=False, use summary"
+            )
+        self._check_result_cache()
+        if self._tolerance is not None:
+            self._simulate_to_tolerance()
+        if side not in self._cache:
+            # Sides drawn together are simulated together so the draw isn't repeated
+            shared = self._correlated is not None or self._sampling == "sobol"
+            sides = ("own", "rent") if shared else (side,)
+            if len(self._chunk_plan) == 1:
+                (results,) = self._iter_chunks(sides)
+            else:
+                results = self._assemble(self._iter_chunks(sides))
+            for simulated in sides:
+                self._cache[simulated] = results
+        return self._cache[side]
+
+    @property
+    def cache_key(self):
+        """str: Hash of everything that determines the simulations.
+
+        The inputs, seed, dtype, chunk size and whether intermediates are kept.
+        Numbers are compared by value, so a rent of 2000 and 2000.0 share a key.
+        """
+        parameters = dict(self._parameters)
+        for key in DISTRIBUTION_PARAMETERS:
+            if parameters[key] is not None:
+                parameters[key] = asset_to_json(parameters[key])
+        exact = {
+            "seed_entropy": self._seed_seq.entropy,
+            "seed_spawn_key": list(self._seed_seq.spawn_key),
+            "dtype": np.dtype(self._dtype).name,
+            "simulation_chunk_size": self.simulation_chunk_size,
+            "keep_intermediates": bool(self._keep_intermediates),
+        }
+        return content_hash(parameters, exact)
+
+    def _check_result_cache(self):
+        """Restore the simulations from the result cache, or add them to it.
+
+        Only done once, the first time simulations are asked for. On a miss
+        both sides are simulated and saved, since the cache stores whole models.
+        """
+        if self._result_cache is None or "result_cache_checked" in self._cache:
+            return
+        self._cache["result_cache_checked"] = True
+        try:
+            key = self.cache_key
+        except ValueError:
+            # Return distributions that can't be saved can't be cached either
+            return
+        cached = self._result_cache.get(key)
+        if cached is None:
+            self._result_cache.put(key, self.save)
+        else:
+            self._restore(*cached)
+
+    def _target_interval(self, own, rent, plan):
+        """Confidence interval on the tolerance metric.
+
+        Parameters
+        ----------
+        own: np.ndarray
+            Final period owner net worth in each simulation so far
+        rent: np.ndarray
+            Final period renter net worth in each simulation so far
+        plan: list
+            The part of ``_chunk_plan`` that's been simulated
+
+        Returns
+        -------
+        tuple of float
+            (lower, upper)
+        """
+        if self._tolerance_metric == "prob_own_wins":
+            values = (own > rent).astype(float)
+        else:
+            values = own - rent
+        return confidence_interval(
+            values,
+            statistic=TOLERANCE_METRICS[self._tolerance_metric],
+            confidence=self._confidence,
+            units=self._sampling_units(plan),
+        )
+
+    def _simulate_to_tolerance(self):
+        """Simulate chunk by chunk until the target interval is narrow enough.
+
+        Afterwards the model looks as if it had been asked for exactly the
+        simulations that were run: the chunk plan and number of simulations are
+        cut down to match and the results cached as usual.
+        """
+        if "target_interval" in self._cache:
+            return
+        keep = None if self._keep_simulations else ("own_net_worth", "rent_net_worth")
+        plan = self._chunk_plan
+        chunks = []
+        summary = StreamingSummary()
+        own, rent = [], []
+        for chunk in self._iter_chunks(("own", "rent"), keep=keep):
+            own.append(chunk["own_net_worth"][-1].astype(float))
+            rent.append(chunk["rent_net_worth"][-1].astype(float))
+            if self._keep_simulations:
+                chunks.append(chunk)
+            else:
+                with stage(self._timer, "summary"):
+                    summary.update(chunk["own_net_worth"], chunk["rent_net_worth"])
+            interval = self._target_interval(
+                np.concatenate(own), np.concatenate(rent), plan[: len(own)]
+            )
+            if interval[1] - interval[0] < self._tolerance:
+                break
+        self._cache["chunk_plan"] = plan[: len(own)]
+        self._number_of_simulations = sum(size for size, _ in self._cache["chunk_plan"])
+        if self._keep_simulations:
+            # own and rent results come together, so share one dict between them
+            results = chunks[0] if len(chunks) == 1 else self._assemble(chunks)
+            self._cache["own"] = self._cache["rent"] = results
+        else:
+            self._cache["summary"] = summary
+        self._cache["target_interval"] = interval
+
+    @property
+    def timings(self):
+        """Wall time and memory of each stage that's run so far.
+
+        Stage name to totals over every time it ran: ``calls``, ``seconds``,
+        ``allocated_bytes`` and the largest ``peak_bytes``. Stages that ran in
+        chunks, like the returns draws, are summed over every chunk.
+
+        Raises
+        ------
+        AttributeError
+            If the model wasn't instrumented
+        """
+        if self._timer is None:
+            raise AttributeError("timings are only recorded with instrument=True")
+        return self._timer.stages
+
+    @property
+    def simulations_used(self):
+        """int: Number of simulations run, less than asked for if tolerance was met."""
+        if self._tolerance is not None:
+            self._simulate_to_tolerance()
+        return self._number_of_simulations
+
+    @property
+    def target_interval(self):
+        """Final (lower, upper) confidence interval on the tolerance metric.
+
+        Raises
+        ------
+        AttributeError
+            If the model wasn't given a tolerance
+        """
+        if self._tolerance is None:
+            raise AttributeError("target_interval is only set with a tolerance")
+        self._simulate_to_tolerance()
+        return self._cache["target_interval"]
+
+    def _intermediate(self, key):
+        """Get a debugging intermediate of the renter simulation.
+
+        Parameters
+        ----------
+        key: {"ap", "aup", "riv"}
+            Which intermediate
+
+        Returns
+        -------
+        np.ndarray
+            periods x simulations array
+
+        Raises
+        ------
+        AttributeError
+            If the model wasn't asked to keep intermediates
+        """
+        if not self._keep_intermediates:
+            raise AttributeError(f"{key} is only kept with keep_intermediates=True")
+        return self._simulated("rent")[key]
+
+    @property
+    def house_appreciation(self):
+        """np.ndarray: periods x simulations value of the house."""
+        return self._simulated("own")["house_appreciation"]
+
+    @property
+    def own_net_worth(self):
+        """np.ndarray: periods x simulations net worth from owning."""
+        return self._simulated("own")["own_net_worth"]
+
+    @property
+    def rent_net_worth(self):
+        """np.ndarray: periods x simulations net worth from renting."""
+        return self._simulated("rent")["rent_net_worth"]
+
+    @property
+    def ap(self):
+        """np.ndarray: periods x simulations investment prices."""
+        return self._intermediate("ap")
+
+    @property
+    def aup(self):
+        """np.ndarray: periods x simulations investment units held by the renter."""
+        return self._intermediate("aup")
+
+    @property
+    def riv(self):
+        """np.ndarray: periods x simulations value of the renter's investments."""
+        return self._intermediate("riv")
+
+    def _sampling_units(self, plan=None):
+        """Label which simulations have to be treated as one observation.
+
+        Antithetic pairs aren't independent, so for standard errors each pair is
+        averaged into a single observation first. Sobol points within a chunk
+        aren't either, only the chunks' scrambles are, so each chunk is one unit.
+
+        Parameters
+        ----------
+        plan: list, default None
+            Chunks to label, all of ``_chunk_plan`` if None
+
+        Returns
+        -------
+        np.ndarray
+            Independent unit each simulation belongs to
+        """
+        units = []
+        offset = 0
+        for chunk_size, _ in self._chunk_plan if plan is None else plan:
+            cols = np.arange(chunk_size)
+            n_units = chunk_size
+            if self._sampling == "sobol":
+                n_units = 1
+                cols = np.zeros(chunk_size, dtype=int)
+            elif self._sampling == "antithetic":
+                n_units = (chunk_size + 1) // 2
+                cols = np.where(cols < n_units, cols, cols - n_units)
+            units.append(cols + offset)
+            offset += n_units
+        return np.concatenate(units)
+
+    def estimate(self, metric="gap", period=-1, control_variates=False):
+        """Estimate an expected outcome along with its Monte Carlo standard error.
+
+        Parameters
+        ----------
+        metric: {"gap", "own", "rent", "prob_own_wins"}, default "gap"
+            Mean net worth from owning, renting, owning minus renting, or the
+            probability that owning comes out ahead
+        period: int, default -1
+            Which period to look at, defaults to the end of the mortgage
+        control_variates: bool, default False
+            Correct the estimate using the final cumulative returns on the house
+            and investments, whose expected values we know. Needs normal return
+            distributions
+
+        Notes
+        -----
+        With sobol sampling the standard error comes from the spread between
+        chunks, so it needs several chunks to mean anything.
+
+        Returns
+        -------
+        dict
+            {"estimate", "standard_error", "simulations"}
+
+        Raises
+        ------
+        ValueError
+            If the metric isn't one we know how to estimate
+        """
+        own = self.own_net_worth[period]
+        rent = self.rent_net_worth[period]
+        metrics = {
+            "gap": lambda: own - rent,
+            "own": lambda: own,
+            "rent": lambda: rent,
+            "prob_own_wins": lambda: (own > rent).astype(float),
+        }
+        if metric not in metrics:
+            raise ValueError(f"metric must be one of {list(metrics)}, got {metric}")
+        units = self._sampling_units()
+        unit_sizes = np.bincount(units)
+
+        def unit_means(values):
+            """Average simulations within each independent unit.
+
+            Parameters
+            ----------
+            values: np.ndarray
+                One value per simulation
+
+            Returns
+            -------
+            np.ndarray
+                One value per unit
+            """
+            return np.bincount(units, weights=values) / unit_sizes
+
+        values = unit_means(metrics[metric]())
+        controls = expected = None
+        if control_variates:
+            house_terminal = self.house_appreciation[-1] / self._house_price
+            investment_terminal = self._simulated("rent")["investment_terminal"]
+            controls = np.column_stack(
+                [unit_means(house_terminal), unit_means(investment_terminal)]
+            )
+            expected = [
+                expected_terminal_return(
+                    dist=self._asset_dicts[side].get("dist"),
+                    dist_args=self._asset_dicts[side].get("dist_args"),
+                    periods=self._simulation_periods,
+                )
+                for side in ("own", "rent")
+            ]
+        estimate, standard_error = control_variate_mean(values, controls, expected)
+        return {
+            "estimate": estimate,
+            "standard_error": standard_error,
+            "simulations": self._number_of_simulations,
+        }
+
+    def _input_value(self, name):
+        """Look up the current value of an input ``sensitivities`` can vary.
+
+        Parameters
+        ----------
+        name: str
+            One of CASH_FLOW_INPUTS or RETURN_INPUTS
+
+        Returns
+        -------
+        float or None
+            The input's value, None if it's left to its default
+
+        Raises
+        ------
+        ValueError
+            If it isn't an input that can be varied on the same paths
+        """
+        if name in RETURN_INPUTS:
+            asset_dict = self._asset_dicts[RETURN_INPUTS[name]]
+            return default_dist_args(asset_dict.get("dist_args")).get("loc", 0.0)
+        if name not in CASH_FLOW_INPUTS:
+            raise ValueError(
+                f"Can only vary {list(CASH_FLOW_INPUTS) + list(RETURN_INPUTS)}, "
+                f"not {name}"
+            )
+        return self._parameters[name]
+
+    def _variant(self, changes):
+        """Work out what a chunk needs to value the model with some inputs changed.
+
+        Only the cash flows are rebuilt, through a model that's never simulated,
+        and mortgages come from ``amortization_cache`` if their terms were seen
+        before. A mortgage that ends a month off from this one's is fitted to
+        this model's horizon. Changes to the mean returns become shifts to
+        apply to the paths, which only holds exactly for location families
+        like the normal.
+
+        Parameters
+        ----------
+        changes: dict
+            New values of CASH_FLOW_INPUTS and RETURN_INPUTS
+
+        Returns
+        -------
+        dict
+            "cash_flows" and "shifts" for ``_simulate_variants``
+        """
+        changes = dict(changes)
+        shifts = {}
+        for name, side in RETURN_INPUTS.items():
+            value = changes.pop(name, None)
+            shifts[side] = 0.0 if value is None else value - self._input_value(name)
+        if not changes:
+            return {"cash_flows": self._cash_flows, "shifts": shifts}
+        model = RentOrOwn(**{**self._parameters, **changes})
+        model._cache["mortgage_schedule"] = _fit_schedule(
+            model._mortgage_schedule, self._simulation_periods
+        )
+        return {"cash_flows": model._cash_flows, "shifts": shifts}
+
+    def _value_variants(self, variants, period=-1):
+        """Value sets of inputs on the model's own return paths.
+
+        Parameters
+        ----------
+        variants: list of dict
+            Changes to the inputs, as for ``_variant``
+        period: int, default -1
+            Which period to value
+
+        Returns
+        -------
+        tuple of np.ndarray
+            (own, rent): variants x simulations net worth in the period
+        """
+        period = range(self._simulation_periods)[period]
+        variants = [self._variant(changes) for changes in variants]
+        chunk_args = [
+            (
+                {
+                    side: (self._asset_dicts[side], seeds[side])
+                    for side in ("own", "rent")
+                },
+                chunk_size,
+                self._simulation_periods,
+                variants,
+                period,
+                self._dtype,
+                self._sampling,
+                seeds["cash_flows"],
+                self._correlated,
+            )
+            for chunk_size, seeds in self._chunk_plan
+        ]
+        chunks = list(self._map_chunks(_simulate_variants, chunk_args))
+        own = np.concatenate([chunk["own"] for chunk in chunks], axis=1)
+        rent = np.concatenate([chunk["rent"] for chunk in chunks], axis=1)
+        return own, rent
+
+    def sensitivities(
+        self,
+        inputs=("mortgage_apr", "monthly_rent", "down_payment", "investment_return"),
+        period=-1,
+        relative_step=0.01,
+        steps=None,
+    ):
+        """Estimate how the outcome moves with each input.
+
+        Uses central differences with common random numbers: every bumped input
+        is valued on the same return paths as the model itself, so the noise
+        mostly cancels out of the differences. Paths are drawn once per chunk,
+        and each bump only reworks the cash flows and the net worth in one
+        period, so it's a lot cheaper than a model per bump as well as far less
+        noisy. Ignores ``tolerance``, using ``number_of_simulations``.
+
+        Parameters
+        ----------
+        inputs: iterable of str
+            Which inputs to bump, from CASH_FLOW_INPUTS and RETURN_INPUTS.
+            "housing_return" and "investment_return" are the mean monthly
+            returns, the "loc" in the asset dictionaries
+        period: int, default -1
+            Which period to look at, defaults to the end of the mortgage
+        relative_step: float, default 0.01
+            Bump each input up and down by this fraction of its value
+        steps: dict, default None
+            Absolute bumps for particular inputs, needed for any that are zero
+
+        Returns
+        -------
+        dict
+            "base": median_gap, mean_gap and prob_own_wins on the model's inputs,
+            then for each input its "value", "step" and the derivatives of
+            those three metrics with respect to it
+
+        Raises
+        ------
+        ValueError
+            If an input has no value to bump, or none to scale a step from
+        """
+        values = {name: self._input_value(name) for name in inputs}
+        steps = dict(steps or {})
+        variants = [{}]
+        for name, value in values.items():
+            if value is None:
+                raise ValueError(f"{name} is left to its default, set it to vary it")
+            steps.setdefault(name, relative_step * abs(value))
+            if not steps[name]:
+                raise ValueError(f"{name} is zero, give it a step in steps")
+            variants += [{name: value + steps[name]}, {name: value - steps[name]}]
+        metrics = _gap_metrics(*self._value_variants(variants, period))
+        results = {"base": {metric: float(of[0]) for metric, of in metrics.items()}}
+        for i, (name, value) in enumerate(values.items()):
+            results[name] = {"value": value, "step": steps[name]}
+            for metric, of in metrics.items():
+                slope = (of[2 * i + 1] - of[2 * i + 2]) / (2 * steps[name])
+                results[name][metric] = float(slope)
+        return results
+
+    def _default_bracket(self, name):
+        """Bracket an input from half to double its value, where that's allowed.
+
+        An end the model rejects, like a house price the down payment is under
+        5% of, is bisected back towards the current value until it's accepted.
+        A mean return of zero can't be scaled, so it gets three standard
+        deviations of the asset's returns either side instead.
+
+        Parameters
+        ----------
+        name: str
+            One of CASH_FLOW_INPUTS or RETURN_INPUTS
+
+        Returns
+        -------
+        list of float
+            (low, high) values of the input
+
+        Raises
+        ------
+        ValueError
+            If any other input is zero or left to its default, so there's
+            nothing to build a bracket from
+        """
+        value = self._input_value(name)
+        if value:
+            ends = (value / 2, value * 2)
+        elif name in RETURN_INPUTS:
+            asset_dict = self._asset_dicts[RETURN_INPUTS[name]]
+            scale = default_dist_args(asset_dict.get("dist_args")).get("scale", 1.0)
+            ends = (value - 3 * scale, value + 3 * scale)
+        else:
+            raise ValueError(f"{name} is {value}, give breakeven a bracket for it")
+
+        def allowed(candidate):
+            """Check if the model can be set up with a value of the input.
+
+            Parameters
+            ----------
+            candidate: float
+                Value of the input
+
+            Returns
+            -------
+            bool
+                False if building its cash flows raises a ValueError
+            """
+            try:
+                self._variant({name: candidate})
+            except ValueError:
+                return False
+            return True
+
+        bracket = []
+        for end in ends:
+            if not allowed(end):
+                inside = value
+                # Within a thousandth of the limit is plenty for a search range
+                for _ in range(10):
+                    middle = (inside + end) / 2
+                    if allowed(middle):
+                        inside = middle
+                    else:
+                        end = middle
+                end = inside
+            bracket.append(end)
+        return sorted(bracket)
+
+    def breakeven(
+        self,
+        name,
+        metric="prob_own_wins",
+        target=None,
+        period=-1,
+        bracket=None,
+        points=9,
+        xtol=None,
+        max_passes=20,
+    ):
+        """Solve for the value of an input where owning and renting break even.
+
+        Narrows a bracket around the answer, valuing a grid of candidates in
+        one vectorised pass on the model's own return paths, so every pass
+        sees the same draws and the metric is a deterministic function of the
+        input. Each pass shrinks the bracket by a factor of points + 1, so a
+        solve takes a handful of passes rather than dozens of models. Repeated
+        mortgage terms come out of ``amortization_cache``. Assumes the metric
+        crosses the target once in the bracket. Ignores ``tolerance``, using
+        ``number_of_simulations``.
+
+        Parameters
+        ----------
+        name: str
+            Input to solve for, from CASH_FLOW_INPUTS and RETURN_INPUTS, like
+            "monthly_rent", "house_price", "mortgage_apr" or
+            "investment_return"
+        metric: {"prob_own_wins", "median_gap", "mean_gap"}, default "prob_own_wins"
+            What has to hit the target
+        target: float, default None
+            Value of the metric to solve for, 0.5 for prob_own_wins and 0 for
+            the gaps if None
+        period: int, default -1
+            Which period to look at, defaults to the end of the mortgage
+        bracket: tuple of float, default None
+            (low, high) values of the input to search between. If None, half to
+            double its current value, cut back to values the model accepts, like
+            house prices the down payment is at least 5% of. A zero mean return
+            gets three standard deviations of the asset's returns either side
+        points: int, default 9
+            Candidates valued in each pass
+        xtol: float, default None
+            Stop once the bracket is this narrow, a millionth of the starting
+            bracket if None
+        max_passes: int, default 20
+            Give up narrowing after this many passes
+
+        Returns
+        -------
+        dict
+            "value": the breakeven input, interpolated within the final
+            "bracket", and the number of "passes" it took
+
+        Raises
+        ------
+        ValueError
+            If the metric is unknown, the bracket doesn't contain the target, or
+            there isn't one and the input is zero
+        """
+        if metric not in ("prob_own_wins", "median_gap", "mean_gap"):
+            raise ValueError(f"Unknown metric {metric}")
+        if target is None:
+            target = 0.5 if metric == "prob_own_wins" else 0.0
+        if bracket is None:
+            bracket = self._default_bracket(name)
+        low, high = bracket
+        xtol = (high - low) * 1e-6 if xtol is None else xtol
+
+        def differences(values):
+            """Value candidates in one pass.
+
+            Parameters
+            ----------
+            values: np.ndarray
+                Candidate values of the input
+
+            Returns
+            -------
+            np.ndarray
+                The metric minus the target at each
+            """
+            own, rent = self._value_variants(
+                [{name: float(value)} for value in values], period
+            )
+            return _gap_metrics(own, rent)[metric] - target
+
+        grid = np.linspace(low, high, points)
+        found = differences(grid)
+        passes = 1
+        while True:
+            i = _crossing(found)
+            low, high = grid[i], grid[i + 1]
+            if found[i] == 0 or high - low <= xtol or passes >= max_passes:
+                break
+            grid = np.linspace(low, high, points + 2)
+            found = np.concatenate(
+                [[found[i]], differences(grid[1:-1]), [found[i + 1]]]
+            )
+            passes += 1
+        value = low
+        if found[i] != 0:
+            value = low - found[i] * (high - low) / (found[i + 1] - found[i])
+        return {
+            "value": float(value),
+            "bracket": (float(low), float(high)),
+            "passes": passes,
+        }
+
+    def sweep(self, grid, period=-1, batch_size=64):
+        """Value a grid of scenarios on the model's return paths.
+
+        Scenarios are valued a batch at a time on a scenario axis, each batch
+        in one pass over the simulation chunks, so the paths are drawn once per
+        batch rather than once per scenario and memory is bounded by the batch
+        size. Scenarios that share mortgage terms share one amortization
+        through ``amortization_cache``, and the renter's investments for a
+        whole batch are valued with one matrix product. Every scenario is
+        valued over this model's horizon. Ignores ``tolerance``, using
+        ``number_of_simulations``.
+
+        Parameters
+        ----------
+        grid: dict or list of dict
+            Inputs from CASH_FLOW_INPUTS and RETURN_INPUTS to the values to
+            try, with every combination of them a scenario. Or a list of
+            scenarios, each a dict of changes to the model's inputs
+        period: int, default -1
+            Which period to summarize, defaults to the end of the mortgage
+        batch_size: int, default 64
+            Scenarios valued in each pass
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per scenario, in order: the inputs it changes, then
+            median_gap, mean_gap, prob_own_wins, and the mean, 5th percentile,
+            median and 95th percentile of owner and renter net worth
+
+        Raises
+        ------
+        ValueError
+            If there are no scenarios or they change inputs that can't be swept
+        """
+        # pandas is slow to import and only needed for the DataFrame
+        import pandas as pd
+
+        if isinstance(grid, dict):
+            scenarios = [
+                dict(zip(grid, values)) for values in itertools.product(*grid.values())
+            ]
+        else:
+            scenarios = [dict(scenario) for scenario in grid]
+        if not scenarios:
+            raise ValueError("There are no scenarios to sweep")
+        for name in {name for scenario in scenarios for name in scenario}:
+            self._input_value(name)
+        batches = []
+        for start in range(0, len(scenarios), batch_size):
+            own, rent = self._value_variants(
+                scenarios[start : start + batch_size], period
+            )
+            statistics = _gap_metrics(own, rent)
+            for side, values in (("own", own), ("rent", rent)):
+                low, median, high = np.quantile(values, [0.05, 0.5, 0.95], axis=1)
+                statistics.update(
+                    {
+                        f"{side}_mean": values.mean(axis=1),
+                        f"{side}_p05": low,
+                        f"{side}_median": median,
+                        f"{side}_p95": high,
+                    }
+                )
+            batches.append(statistics)
+        columns = {
+            key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]
+        }
+        return pd.concat([pd.DataFrame(scenarios), pd.DataFrame(columns)], axis=1)
+
+    @property
+    def summary(self):
+        """StreamingSummary: Per period statistics of owner and renter net worth.
+
+        With keep_simulations=False this is the only way to see results, and the
+        simulations are run chunk by chunk straight into it.
+        """
+        if self._tolerance is not None and not self._keep_simulations:
+            self._simulate_to_tolerance()
+        if "summary" not in self._cache:
+            summary = StreamingSummary()
+            if self._keep_simulations:
+                own, rent = self.own_net_worth, self.rent_net_worth
+                with stage(self._timer, "summary"):
+                    summary.update(own, rent)
+            else:
+                for chunk in self._iter_chunks(
+                    ("own", "rent"), keep=("own_net_worth", "rent_net_worth")
+                ):
+                    with stage(self._timer, "summary"):
+                        summary.update(chunk["own_net_worth"], chunk["rent_net_worth"])
+            self._cache["summary"] = summary
+        return self._cache["summary"]
+
+    #: Results written by ``save``, and which side's simulation they come from
+    _saved_results = {
+        "own_net_worth": "own",
+        "house_appreciation": "own",
+        "rent_net_worth": "rent",
+        "investment_terminal": "rent",
+        "ap": "rent",
+        "aup": "rent",
+        "riv": "rent",
+    }
+
+    def save(self, path):
+        """Save the simulations, mortgage schedule and inputs to a directory.
+
+        Each periods x simulations result is written as its own .npy file so
+        ``load`` can memory map it, alongside metadata.json with the inputs and
+        seed. Runs the simulations first if they haven't been.
+
+        Parameters
+        ----------
+        path: str or os.PathLike
+            Directory to save to, created if it doesn't exist
+
+        Raises
+        ------
+        AttributeError
+            If the model was set up to only keep summary statistics
+        """
+        results = {**self._simulated("own"), **self._simulated("rent")}
+        arrays = {key: results[key] for key in self._saved_results if key in results}
+        schedule = self._mortgage_schedule
+        records = np.empty(
+            len(schedule["End_balance"]),
+            dtype=[(column, values.dtype) for column, values in schedule.items()],
+        )
+        for column, values in schedule.items():
+            records[column] = values
+        arrays["mortgage_schedule"] = records
+        parameters = dict(self._parameters)
+        for key in DISTRIBUTION_PARAMETERS:
+            if parameters[key] is not None:
+                parameters[key] = asset_to_json(parameters[key])
+        metadata = {
+            "class": type(self).__name__,
+            "parameters": parameters,
+            "seed_entropy": self._seed_seq.entropy,
+            "seed_spawn_key": list(self._seed_seq.spawn_key),
+            "dtype": np.dtype(self._dtype).name,
+            "simulations": self._number_of_simulations,
+            "simulation_chunk_size": self.simulation_chunk_size,
+        }
+        if "target_interval" in self._cache:
+            metadata["target_interval"] = list(self._cache["target_interval"])
+        save_bundle(path, arrays, metadata)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r", workers=None):
+        """Load a model saved with ``save``, without rerunning anything.
+
+        The simulations are memory mapped rather than read in, so even huge
+        ones load instantly and analysis only touches the pages it needs.
+
+        Parameters
+        ----------
+        path: str or os.PathLike
+            Directory the model was saved to
+        mmap_mode: {"r", "r+", "c", None}, default "r"
+            Passed on to ``np.load``. None reads everything into memory
+        workers: int, default None
+            Workers for anything the loaded model still has to simulate
+
+        Returns
+        -------
+        RentOrOwn
+            The saved model, as an instance of the class it's loaded through
+        """
+        arrays, metadata = load_bundle(path, mmap_mode=mmap_mode)
+        parameters = dict(metadata["parameters"])
+        for key in DISTRIBUTION_PARAMETERS:
+            if parameters.get(key) is not None:
+                parameters[key] = asset_from_json(parameters[key])
+        seed = np.random.SeedSequence(
+            metadata["seed_entropy"], spawn_key=metadata["seed_spawn_key"]
+        )
+        # Subclasses like ParameterizedRentOrOwn fill in some of these arguments
+        # themselves, so go straight to RentOrOwn's constructor
+        model = cls.__new__(cls)
+        RentOrOwn.__init__(
+            model,
+            **parameters,
+            seed=seed,
+            workers=workers,
+            keep_intermediates="ap" in arrays,
+            dtype=np.dtype(metadata["dtype"]),
+        )
+        model._restore(arrays, metadata)
+        return model
+
+    def _restore(self, arrays, metadata):
+        """Fill the caches from a saved bundle instead of simulating.
+
+        Parameters
+        ----------
+        arrays: dict
+            Arrays from ``load_bundle``
+        metadata: dict
+            Metadata from ``load_bundle``
+        """
+        self.simulation_chunk_size = metadata["simulation_chunk_size"]
+        self._number_of_simulations = metadata["simulations"]
+        if "target_interval" in metadata:
+            self._cache["target_interval"] = tuple(metadata["target_interval"])
+        schedule = arrays["mortgage_schedule"]
+        self._cache["mortgage_schedule"] = {
+            column: schedule[column] for column in schedule.dtype.names
+        }
+        for side in ("own", "rent"):
+            self._cache[side] = {
+                key: values
+                for key, values in arrays.items()
+                if key != "mortgage_schedule" and self._saved_results[key] == side
+            }
 
     def _inflated_series(self, amount):
         """Project an initial value over the forecast period with inflation.
@@ -172,6 +2471,86 @@ class RentOrOwn:
         inflated = base_inflate * amount
         return inflated
 
+    @property
+    def quantile_bands(self):
+        """dict: Per period quantiles of owner and renter net worth.
+
+        {"quantiles", "own", "rent"}: the quantiles, sorted, and quantiles x
+        periods arrays of net worth at each of them. Worked out once with partial
+        selection rather than sorting, or from ``summary`` if simulations aren't
+        kept, and cached so plots don't have to go back to the simulations.
+        """
+        if "quantile_bands" not in self._cache:
+            quantiles = np.union1d(self.band_quantiles, [0.5])
+            if self._keep_simulations:
+                own, rent = self.own_net_worth, self.rent_net_worth
+                with stage(self._timer, "quantile_bands"):
+                    bands = {
+                        "own": quantile_bands(own, quantiles),
+                        "rent": quantile_bands(rent, quantiles),
+                    }
+            else:
+                summary = self.summary
+                bands = {
+                    side: summary.quantile(side, quantiles) for side in ("own", "rent")
+                }
+            self._cache["quantile_bands"] = {"quantiles": quantiles, **bands}
+        return self._cache["quantile_bands"]
+
+    def _median(self, side):
+        """Get median net worth in each period from the quantile bands.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which net worth
+
+        Returns
+        -------
+        np.ndarray
+            median for each period
+        """
+        bands = self.quantile_bands
+        return bands[side][np.searchsorted(bands["quantiles"], 0.5)]
+
+    def _histogram_counts(self, period):
+        """Bin owner and renter net worth in a period, once per period.
+
+        Parameters
+        ----------
+        period: int
+            Which period to bin
+
+        Returns
+        -------
+        tuple of np.ndarray
+            (own counts, rent counts, shared bin edges)
+        """
+        period = period % self._simulation_periods
+        key = ("histogram", period)
+        if key not in self._cache:
+            if self._keep_simulations:
+                own = self.own_net_worth[period]
+                rent = self.rent_net_worth[period]
+                edges = np.linspace(
+                    min(own.min(), rent.min()),
+                    max(own.max(), rent.max()),
+                    self.histogram_bins + 1,
+                )
+                own_counts = np.histogram(own, edges)[0]
+                rent_counts = np.histogram(rent, edges)[0]
+            else:
+                own_counts, edges = self.summary.histogram("own", period)
+                rent_counts, _ = self.summary.histogram("rent", period)
+                # Merge the summary's fine bins down to about histogram_bins
+                merge = max(len(own_counts) // self.histogram_bins, 1)
+                usable = len(own_counts) - len(own_counts) % merge
+                own_counts = own_counts[:usable].reshape(-1, merge).sum(axis=1)
+                rent_counts = rent_counts[:usable].reshape(-1, merge).sum(axis=1)
+                edges = edges[: usable + 1 : merge]
+            self._cache[key] = (own_counts, rent_counts, edges)
+        return self._cache[key]
+
     def histogram(self, period=None):
         """Plot a histogram of rent vs own net worths.
 
@@ -187,14 +2566,14 @@ class RentOrOwn:
                 f"period {period} out of range {self._simulation_periods}, setting to last period"  # noqa: B950
             )
             period = -1
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import StrMethodFormatter
+
+        own_counts, rent_counts, edges = self._histogram_counts(period)
         _, ax = plt.subplots(figsize=(20, 10))
-        plt.hist(
-            (self.own_net_worth[period], self.rent_net_worth[period]),
-            bins=min(100, self.own_net_worth.shape[0]),
-            density=True,
-            histtype="step",
-            label=("Own", "Rent"),
-        )
+        for counts, label in ((own_counts, "Own"), (rent_counts, "Rent")):
+            # Same as plt.hist(density=True, histtype="step") from the counts
+            ax.stairs(counts / (counts.sum() * np.diff(edges)), edges, label=label)
         plt.legend()
         if period < 0:
             period_label = (self._simulation_periods - period - 1) / 12
@@ -202,26 +2581,60 @@ class RentOrOwn:
             period_label = period / 12
         plt.title(f"Distribution of results in year {period_label:0.1f}")
         ax.get_yaxis().set_ticks([])
-        ax.xaxis.set_major_formatter(StrMethodFormatter("${x:n}"))
+        ax.xaxis.set_major_formatter(StrMethodFormatter("${x:,.0f}"))
         plt.show()
 
     def median_returns_plot(self):
         """Plot median returns over the whole amortization period."""
-        x = np.arange(0, len(self.own_net_worth))
-        rent_med = np.median(self.rent_net_worth, 1)
-        own_med = np.median(self.own_net_worth, 1)
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import StrMethodFormatter
+
+        x = np.arange(0, self._simulation_periods)
+        rent_med = self._median("rent")
+        own_med = self._median("own")
         fig, ax = plt.subplots(figsize=(20, 10))
         plt.plot(x, own_med, label="Own")
         plt.plot(x, rent_med, label="Rent")
         plt.legend()
         plt.title("Median returns over the investment horizon")
         # ax.get_yaxis().set_ticks([])
-        ax.yaxis.set_major_formatter(StrMethodFormatter("${x:n}"))
+        ax.yaxis.set_major_formatter(StrMethodFormatter("${x:,.0f}"))
         plt.xlabel("Months")
         plt.ylabel("Net Worth")
         # ax.xaxis.set_major_formatter(StrMethodFormatter("${x:0.2e}"))
         plt.show()
 
+    def fan_chart(self):
+        """Plot median net worth over time with shaded bands for the spread.
+
+        Each pair of quantiles in ``band_quantiles`` (5th to 95th, 25th to 75th
+        by default) is shaded around the median, darker towards the middle.
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import StrMethodFormatter
+
+        bands = self.quantile_bands
+        n_bands = len(bands["quantiles"])
+        x = np.arange(0, self._simulation_periods)
+        fig, ax = plt.subplots(figsize=(20, 10))
+        for side, label in (("own", "Own"), ("rent", "Rent")):
+            (line,) = ax.plot(x, self._median(side), label=label)
+            for lower in range(n_bands // 2):
+                ax.fill_between(
+                    x,
+                    bands[side][lower],
+                    bands[side][n_bands - 1 - lower],
+                    color=line.get_color(),
+                    alpha=0.15,
+                    linewidth=0,
+                )
+        plt.legend()
+        plt.title("Range of returns over the investment horizon")
+        ax.yaxis.set_major_formatter(StrMethodFormatter("${x:,.0f}"))
+        plt.xlabel("Months")
+        plt.ylabel("Net Worth")
+        plt.show()
+
 
 class ParameterizedRentOrOwn(RentOrOwn):
     """Rent or own with pre built distributions for housing and assets.
@@ -249,6 +2662,24 @@ class ParameterizedRentOrOwn(RentOrOwn):
         annual_inflation=0.02,
         monthly_property_tax_rate=None,
         maintenance_cost=0.01,
+        seed=None,
+        workers=None,
+        keep_simulations=True,
+        keep_intermediates=False,
+        dtype=np.float64,
+        sampling="standard",
+        tolerance=None,
+        tolerance_metric="prob_own_wins",
+        confidence=0.95,
+        instrument=False,
+        timing_hook=None,
+        result_cache=None,
+        fused=False,
+        mortgage_term_years=None,
+        mortgage_rate_dict=None,
+        inflation_dict=None,
+        rent_growth_dict=None,
+        asset_correlation=None,
     ):
         super().__init__(
             monthly_rent=monthly_rent,
@@ -256,14 +2687,8 @@ class ParameterizedRentOrOwn(RentOrOwn):
             down_payment=down_payment,
             mortgage_amortization_years=mortgage_amortization_years,
             mortgage_apr=mortgage_apr,
-            housing_asset_dict={
-                "dist": np.random.normal,
-                "dist_args": {"loc": 0.004, "scale": 0.0136},
-            },
-            investment_asset_dict={
-                "dist": np.random.normal,
-                "dist_args": {"loc": 0.00510, "scale": 0.0266},
-            },
+            housing_asset_dict={"dist_args": {"loc": 0.004, "scale": 0.0136}},
+            investment_asset_dict={"dist_args": {"loc": 0.00510, "scale": 0.0266}},
             number_of_simulations=number_of_simulations,
             additional_purchase_costs=additional_purchase_costs,
             additional_monthly_costs=additional_monthly_costs,
@@ -272,4 +2697,22 @@ class ParameterizedRentOrOwn(RentOrOwn):
             annual_inflation=annual_inflation,
             monthly_property_tax_rate=monthly_property_tax_rate,
             maintenance_cost=maintenance_cost,
+            seed=seed,
+            workers=workers,
+            keep_simulations=keep_simulations,
+            keep_intermediates=keep_intermediates,
+            dtype=dtype,
+            sampling=sampling,
+            tolerance=tolerance,
+            tolerance_metric=tolerance_metric,
+            confidence=confidence,
+            instrument=instrument,
+            timing_hook=timing_hook,
+            result_cache=result_cache,
+            fused=fused,
+            mortgage_term_years=mortgage_term_years,
+            mortgage_rate_dict=mortgage_rate_dict,
+            inflation_dict=inflation_dict,
+            rent_growth_dict=rent_growth_dict,
+            asset_correlation=asset_correlation,
         )
@@ -0,0 +1,385 @@
+"""Summarize simulated net worth without keeping every simulation around."""
+import math
+
+import numpy as np
+
+
+def control_variate_mean(values, controls=None, expected=None):
+    """Estimate a mean and its standard error, optionally with control variates.
+
+    Control variates are other quantities from the same simulations whose true
+    mean we know. Regressing values on their deviation from that mean and taking
+    out the fitted part removes the noise they explain.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        One observation per independent simulation
+    controls: np.ndarray, default None
+        simulations x controls array of control variates, or a 1d array for one
+    expected: array_like, default None
+        Known mean of each control
+
+    Returns
+    -------
+    tuple of float
+        (estimate, standard_error)
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if controls is None:
+        return values.mean(), values.std(ddof=1) / np.sqrt(n)
+    controls = np.asarray(controls, dtype=float).reshape(n, -1)
+    centred = controls - controls.mean(axis=0)
+    beta, *_ = np.linalg.lstsq(centred, values - values.mean(), rcond=None)
+    adjusted = values - (controls - np.asarray(expected, dtype=float)) @ beta
+    ddof = 1 + controls.shape[1]
+    return adjusted.mean(), adjusted.std(ddof=ddof) / np.sqrt(n)
+
+
+def normal_quantile(p):
+    """Invert the standard normal CDF.
+
+    Bisects on ``math.erf`` so it doesn't need scipy, accurate to well below
+    anything a confidence interval cares about.
+
+    Parameters
+    ----------
+    p: float
+        Probability, between 0 and 1
+
+    Returns
+    -------
+    float
+        z such that P(Z < z) = p
+    """
+    lo, hi = -10.0, 10.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if 0.5 * (1 + math.erf(mid / math.sqrt(2))) < p:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def confidence_interval(values, statistic="mean", confidence=0.95, units=None):
+    """Approximate confidence interval for the mean or median of simulated values.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        One value per simulation
+    statistic: {"mean", "median"}, default "mean"
+        Which statistic to bound. The mean uses a normal approximation, which
+        covers probabilities too if values are 0/1 indicators. The median uses
+        order statistics, which is distribution free
+    confidence: float, default 0.95
+        Coverage of the interval
+    units: np.ndarray, default None
+        Independent unit each simulation belongs to (see
+        ``RentOrOwn._sampling_units``). Simulations within a unit are averaged
+        before the mean's standard error is taken. The median ignores them, which
+        only makes it conservative for antithetic or sobol sampling
+
+    Returns
+    -------
+    tuple of float
+        (lower, upper), nan if there isn't enough data to tell
+
+    Raises
+    ------
+    ValueError
+        If the statistic isn't "mean" or "median"
+    """
+    z = normal_quantile((1 + confidence) / 2)
+    values = np.asarray(values, dtype=float)
+    if statistic == "mean":
+        if units is not None:
+            values = np.bincount(units, weights=values) / np.bincount(units)
+        if len(values) < 2:
+            return np.nan, np.nan
+        estimate, standard_error = control_variate_mean(values)
+        return estimate - z * standard_error, estimate + z * standard_error
+    if statistic == "median":
+        n = len(values)
+        half_width = z * math.sqrt(n) / 2
+        lo = int(math.floor(n / 2 - half_width))
+        hi = int(math.ceil(n / 2 + half_width))
+        if lo < 0 or hi > n - 1:
+            return np.nan, np.nan
+        # Only the two order statistics are needed, no need for a full sort
+        ordered = np.partition(values, (lo, hi))
+        return ordered[lo], ordered[hi]
+    raise ValueError(f"statistic must be 'mean' or 'median', got {statistic}")
+
+
+def quantile_bands(values, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), block=64):
+    """Quantiles of each period's simulations, using partial selection.
+
+    Gives the same answer as ``np.quantile(values, quantiles, axis=1)``, but
+    only partitions around the order statistics it needs rather than sorting
+    every period. Periods are worked through in blocks so the scratch copy
+    stays small.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        periods x simulations array
+    quantiles: sequence of float, default (0.05, 0.25, 0.5, 0.75, 0.95)
+        Quantiles to find, between 0 and 1
+    block: int, default 64
+        Number of periods to partition at once
+
+    Returns
+    -------
+    np.ndarray
+        quantiles x periods array
+    """
+    qs = np.asarray(quantiles, dtype=float)
+    n = values.shape[1]
+    # Linear interpolation between the order statistics either side, like numpy
+    positions = qs * (n - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n - 1)
+    fraction = (positions - lower)[:, None]
+    kth = np.unique(np.concatenate([lower, upper]))
+    bands = np.empty((len(qs), values.shape[0]))
+    for start in range(0, values.shape[0], block):
+        ordered = np.partition(values[start : start + block], kth, axis=1)
+        below = ordered[:, lower].T
+        above = ordered[:, upper].T
+        bands[:, start : start + block] = below + (above - below) * fraction
+    return bands
+
+
+class StreamingSummary:
+    """Accumulate per period statistics of owner and renter net worth chunk by chunk.
+
+    Feed it periods x simulations chunks of net worth with ``update`` and it keeps
+    running means and variances, counts of simulations where owning comes out
+    ahead, and a histogram of each period's outcomes. Memory depends on the number
+    of periods and bins, not on how many simulations go through it.
+
+    Parameters
+    ----------
+    bins: int, default 1000
+        Number of histogram bins per period. Quantiles are interpolated within
+        bins so more bins means more accurate quantiles.
+
+    Notes
+    -----
+    Bin edges are set from the first chunk, padded by half its range on either
+    side. Anything later that lands outside that range gets counted in the end
+    bins, so make the first chunk a decent size.
+    """
+
+    sides = ("own", "rent")
+
+    def __init__(self, bins=1000):
+        self.bins = bins
+        self.n = 0
+        self._mean = {}
+        self._m2 = {}
+        self._min = {}
+        self._max = {}
+        self._counts = {}
+        self._own_wins = None
+        self._lo = None
+        self._width = None
+
+    def update(self, own_net_worth, rent_net_worth):
+        """Add a chunk of simulations to the summary.
+
+        Parameters
+        ----------
+        own_net_worth: np.ndarray
+            periods x simulations net worth from owning
+        rent_net_worth: np.ndarray
+            periods x simulations net worth from renting
+        """
+        chunk_n = own_net_worth.shape[1]
+        if chunk_n == 0:
+            return
+        if self._lo is None:
+            self._set_bins(own_net_worth, rent_net_worth)
+        total = self.n + chunk_n
+        for side, values in zip(self.sides, (own_net_worth, rent_net_worth)):
+            chunk_mean = values.mean(axis=1)
+            chunk_m2 = ((values - chunk_mean[:, None]) ** 2).sum(axis=1)
+            if self.n == 0:
+                self._mean[side] = chunk_mean
+                self._m2[side] = chunk_m2
+                self._min[side] = values.min(axis=1)
+                self._max[side] = values.max(axis=1)
+                self._counts[side] = self._histogram(values)
+            else:
+                # Chan et al. parallel update of mean and sum of squared deviations
+                delta = chunk_mean - self._mean[side]
+                self._mean[side] = self._mean[side] + delta * chunk_n / total
+                self._m2[side] = (
+                    self._m2[side] + chunk_m2 + delta**2 * self.n * chunk_n / total
+                )
+                self._min[side] = np.minimum(self._min[side], values.min(axis=1))
+                self._max[side] = np.maximum(self._max[side], values.max(axis=1))
+                self._counts[side] += self._histogram(values)
+        own_wins = (own_net_worth > rent_net_worth).sum(axis=1)
+        self._own_wins = (
+            own_wins if self._own_wins is None else self._own_wins + own_wins
+        )
+        self.n = total
+
+    def _set_bins(self, own_net_worth, rent_net_worth):
+        """Fix per period histogram bins shared by own and rent.
+
+        Parameters
+        ----------
+        own_net_worth: np.ndarray
+            periods x simulations net worth from owning
+        rent_net_worth: np.ndarray
+            periods x simulations net worth from renting
+        """
+        lo = np.minimum(own_net_worth.min(axis=1), rent_net_worth.min(axis=1))
+        hi = np.maximum(own_net_worth.max(axis=1), rent_net_worth.max(axis=1))
+        span = hi - lo
+        span = np.where(span > 0, span, np.maximum(np.abs(hi), 1))
+        self._lo = lo - span / 2
+        self._width = 2 * span / self.bins
+
+    def _histogram(self, values):
+        """Count a chunk of simulations into each period's bins.
+
+        Parameters
+        ----------
+        values: np.ndarray
+            periods x simulations array
+
+        Returns
+        -------
+        np.ndarray
+            periods x bins counts
+        """
+        periods = values.shape[0]
+        idx = np.floor((values - self._lo[:, None]) / self._width[:, None])
+        idx = np.clip(idx, 0, self.bins - 1).astype(np.intp)
+        idx += np.arange(periods)[:, None] * self.bins
+        counts = np.bincount(idx.ravel(), minlength=periods * self.bins)
+        return counts.reshape(periods, self.bins)
+
+    def _check_side(self, side):
+        """Make sure we've been asked about owning or renting.
+
+        Parameters
+        ----------
+        side: str
+            "own" or "rent"
+
+        Raises
+        ------
+        ValueError
+            If side is anything else, or nothing has been summarized yet
+        """
+        if side not in self.sides:
+            raise ValueError(f"side must be one of {self.sides}, got {side}")
+        if self.n == 0:
+            raise ValueError("No simulations have been summarized yet")
+
+    def mean(self, side):
+        """Mean net worth in each period.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which net worth to summarize
+
+        Returns
+        -------
+        np.ndarray
+            mean for each period
+        """
+        self._check_side(side)
+        return self._mean[side]
+
+    def variance(self, side):
+        """Sample variance of net worth in each period.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which net worth to summarize
+
+        Returns
+        -------
+        np.ndarray
+            variance for each period, nan if there's only one simulation
+        """
+        self._check_side(side)
+        if self.n < 2:
+            return np.full_like(self._m2[side], np.nan)
+        return self._m2[side] / (self.n - 1)
+
+    def quantile(self, side, q):
+        """Estimate net worth quantiles in each period from the histograms.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which net worth to summarize
+        q: float or sequence of floats
+            Quantiles to estimate, between 0 and 1
+
+        Returns
+        -------
+        np.ndarray
+            periods array for a single quantile, or quantiles x periods
+        """
+        self._check_side(side)
+        qs = np.atleast_1d(np.asarray(q, dtype=float))
+        counts = self._counts[side]
+        cum = counts.cumsum(axis=1)
+        periods = np.arange(counts.shape[0])
+        estimate = np.empty((len(qs), counts.shape[0]))
+        for i, quant in enumerate(qs):
+            target = quant * self.n
+            # first bin whose cumulative count reaches the target, then interpolate
+            idx = np.minimum((cum < target).sum(axis=1), self.bins - 1)
+            below = np.where(idx > 0, cum[periods, idx - 1], 0)
+            in_bin = counts[periods, idx]
+            frac = np.where(in_bin > 0, (target - below) / np.maximum(in_bin, 1), 0)
+            estimate[i] = self._lo + (idx + frac) * self._width
+        estimate = np.clip(estimate, self._min[side], self._max[side])
+        return estimate[0] if np.ndim(q) == 0 else estimate
+
+    def prob_own_wins(self):
+        """Share of simulations where owning beats renting in each period.
+
+        Returns
+        -------
+        np.ndarray
+            probability for each period
+        """
+        self._check_side("own")
+        return self._own_wins / self.n
+
+    def histogram(self, side, period=-1):
+        """Histogram of net worth in a period, the last one by default.
+
+        Own and rent share bin edges in every period so they can be compared
+        directly.
+
+        Parameters
+        ----------
+        side: {"own", "rent"}
+            Which net worth to summarize
+        period: int, default -1
+            Which period to show
+
+        Returns
+        -------
+        tuple of np.ndarray
+            (counts, edges) in the same form as ``np.histogram``
+        """
+        self._check_side(side)
+        lo = self._lo[period]
+        edges = lo + np.arange(self.bins + 1) * self._width[period]
+        return self._counts[side][period], edges
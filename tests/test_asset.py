@@ -0,0 +1,156 @@
+"""Test the asset module."""
+import numpy as np
+import pytest
+
+from rentorown import asset
+
+
+def test_seeded_returns_reproduce():
+    """Seeding the default generator should give the same paths."""
+    first = asset.distreturns(periods=12, simulations=5, rng=1)
+    second = asset.distreturns(periods=12, simulations=5, rng=np.random.default_rng(1))
+    assert first.shape == (12, 5)
+    assert (first[0] == 1).all()
+    assert np.array_equal(first, second)
+
+
+def test_returns_into_buffer():
+    """Returns can be written straight into a preallocated buffer."""
+    buffer = np.empty((12, 5), dtype=np.float32)
+    returns = asset.distreturns(periods=12, simulations=5, rng=1, out=buffer)
+    assert returns is buffer
+    assert returns.dtype == np.float32
+
+
+def test_legacy_callable():
+    """Passing a numpy sampler without a generator uses the global state."""
+    np.random.seed(3)
+    first = asset.distreturns(dist=np.random.normal, periods=12, simulations=5)
+    np.random.seed(3)
+    expected = (1 + np.random.normal(0.006, 0.06, size=(12, 5))).cumprod(axis=0)
+    expected[0] = 1
+    assert np.allclose(first, expected)
+    mapped = asset.distreturns(dist=np.random.laplace, rng=2, periods=12, simulations=5)
+    laplace = np.random.default_rng(2).laplace(0.006, 0.06, size=(12, 5))
+    assert np.allclose(mapped[1], (1 + laplace[:2]).prod(axis=0))
+
+
+def test_antithetic_pairs():
+    """Antithetic draws mirror each other around the mean."""
+    returns = asset.distreturns(
+        dist_args={"loc": 0.01, "scale": 0.05},
+        periods=3,
+        simulations=5,
+        rng=4,
+        sampling="antithetic",
+    )
+    draws = returns[2] / returns[1] - 1
+    assert np.allclose(draws[3:], 2 * 0.01 - draws[:2])
+    with pytest.raises(ValueError):
+        asset.distreturns(dist=np.random.laplace, rng=1, sampling="antithetic")
+
+
+def test_expected_terminal_return():
+    """Expected terminal return compounds the mean, normal distributions only."""
+    expected = asset.expected_terminal_return(dist_args={"loc": 0.01}, periods=3)
+    assert expected == pytest.approx(1.01**3)
+    with pytest.raises(ValueError):
+        asset.expected_terminal_return(dist=np.random.laplace)
+
+
+def test_sobol_sampling():
+    """Sobol paths are reproducible and assets share one point set."""
+    pytest.importorskip("scipy")
+    kwargs = {"periods": 6, "simulations": 8, "rng": 5, "sampling": "sobol"}
+    house = asset.distreturns(**kwargs, n_assets=2)
+    again = asset.distreturns(**kwargs, n_assets=2)
+    invest = asset.distreturns(**kwargs, n_assets=2, asset_index=1)
+    assert np.array_equal(house, again)
+    assert not np.array_equal(house, invest)
+    assert np.isfinite(house).all()
+    # Both assets from one point set, without spawning from the caller's seed
+    seed_seq = np.random.SeedSequence(5)
+    kwargs["rng"] = seed_seq
+    joint = asset.sobol_distreturns(
+        [{}, {"dist_args": {"loc": 0.01, "scale": 0.1}}],
+        periods=6,
+        simulations=8,
+        rng=seed_seq,
+    )
+    assert np.array_equal(joint[0], asset.distreturns(**kwargs, n_assets=2))
+    invest = asset.distreturns(
+        dist_args={"loc": 0.01, "scale": 0.1}, **kwargs, n_assets=2, asset_index=1
+    )
+    assert np.array_equal(joint[1], invest)
+    assert seed_seq.n_children_spawned == 0
+    with pytest.raises(ValueError):
+        asset.distreturns(dist=np.random.laplace, **kwargs)
+
+
+def test_brownian_bridge_keeps_increments():
+    """The bridge reorders shocks without changing the random walk's end point."""
+    shocks = np.random.default_rng(0).standard_normal((5, 3))
+    increments = asset._brownian_bridge(shocks)
+    assert np.allclose(increments.sum(axis=0), np.sqrt(5) * shocks[0])
+
+
+def test_raw_returns():
+    """Without compounding the returns should come back as drawn."""
+    raw = asset.distreturns(periods=12, simulations=5, rng=1, compound=False)
+    compounded = asset.distreturns(periods=12, simulations=5, rng=1)
+    assert np.array_equal(compounded[1:], np.cumprod(1 + raw, axis=0)[1:])
+
+
+def test_correlated_returns():
+    """Correlated assets come from one draw and keep their own parameters."""
+    kwargs = {"periods": 12, "simulations": 6, "dtype": np.float64}
+    (single,) = asset.correlated_distreturns(
+        [0.01], cov=[[0.0004]], rng=np.random.default_rng(1), **kwargs
+    )
+    alone = asset.distreturns(
+        dist_args={"loc": 0.01, "scale": 0.02}, rng=np.random.default_rng(1), **kwargs
+    )
+    assert np.allclose(single, alone)
+    house, invest = asset.correlated_distreturns(
+        [0.0, 0.0],
+        corr=[[1, 0.6], [0.6, 1]],
+        stdevs=[0.01, 0.03],
+        periods=2000,
+        simulations=50,
+        rng=1,
+        compound=False,
+    )
+    assert house.base is invest.base
+    # Correlating a block of periods at a time is the same as all at once
+    draws = np.random.default_rng(1).standard_normal((2000, 50, 2))
+    expected = draws @ np.linalg.cholesky([[1, 0.6], [0.6, 1]]).T * [0.01, 0.03]
+    assert np.allclose(house, expected[..., 0])
+    assert np.allclose(invest, expected[..., 1])
+    assert np.corrcoef(house.ravel(), invest.ravel())[0, 1] == pytest.approx(
+        0.6, abs=0.02
+    )
+    assert invest.std() == pytest.approx(0.03, rel=0.02)
+    with pytest.raises(ValueError):
+        asset.correlated_distreturns([0, 0], cov=[[1, 2], [2, 1]])
+    with pytest.raises(ValueError):
+        asset.correlated_distreturns([0, 0], corr=[[1, 0.5], [0.5, 1]])
+
+
+@pytest.mark.parametrize("sampling", ["standard", "antithetic"])
+def test_float32_same_paths(sampling, monkeypatch):
+    """Lower precision should round the same paths, not draw different ones.
+
+    Parameters
+    ----------
+    sampling: str
+        Sampling mode
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+    """
+    # Small blocks so the buffer is filled over several of them
+    monkeypatch.setattr(asset, "_DRAW_BLOCK", 20)
+    kwargs = {"periods": 40, "simulations": 9, "rng": 3, "sampling": sampling}
+    single = asset.distreturns(**kwargs, dtype=np.float32, compound=False)
+    double = asset.distreturns(**kwargs, compound=False)
+    assert single.dtype == np.float32
+    assert np.allclose(single, double, rtol=1e-6, atol=1e-9)
@@ -0,0 +1,22 @@
+"""Tests for stage instrumentation."""
+import numpy as np
+
+from rentorown import instrument
+
+
+def test_stage_timer():
+    """Stages should be totalled by name and handed to the hook."""
+    seen = []
+    timer = instrument.StageTimer(hook=lambda name, record: seen.append(name))
+    for _ in range(2):
+        with instrument.stage(timer, "allocate"):
+            kept = np.ones(100_000)
+    assert kept.sum() == 100_000
+    totals = timer.stages["allocate"]
+    assert totals["calls"] == 2
+    assert totals["seconds"] > 0
+    assert totals["peak_bytes"] >= 800_000
+    assert seen == ["allocate", "allocate"]
+    with instrument.stage(None, "ignored"):
+        pass
+    assert "ignored" not in timer.stages
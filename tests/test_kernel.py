@@ -0,0 +1,89 @@
+"""Tests for the fused net worth kernels."""
+import numpy as np
+import pytest
+
+from rentorown import kernel
+from rentorown import rentorown
+from rentorown.asset import distreturns
+from rentorown.house import periodic_rate
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def backend(request, monkeypatch):
+    """Run a test with each implementation of the kernels.
+
+    Parameters
+    ----------
+    request: pytest.FixtureRequest
+        Says which backend this run is for
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+
+    Returns
+    -------
+    str
+        The backend
+    """
+    compiled = {}
+    if request.param == "numpy":
+        compiled.update(
+            backend="numpy",
+            own=kernel._own_rows,
+            rent=kernel._rent_rows,
+            amortize=kernel._amortize_steps,
+        )
+    else:
+        pytest.importorskip("numba")
+    monkeypatch.setattr(kernel, "_COMPILED", compiled)
+    return request.param
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_kernels_match_numpy(backend, dtype):
+    """The fused kernels should give exactly what separate NumPy passes do.
+
+    Parameters
+    ----------
+    backend: str
+        backend fixture
+    dtype: np.dtype
+        Floating point type to simulate in
+    """
+    assert kernel.backend() == backend
+    args = {"periods": 24, "simulations": 9, "rng": 5, "dtype": dtype}
+    own_debt = np.linspace(400_000, 350_000, 24)
+    invest = np.linspace(-100, 900, 24)
+    drawdown = np.minimum(invest, 0)
+    invest = np.maximum(invest, 0)
+    expected = {
+        **rentorown._own_net_worth(500_000, own_debt, distreturns(**args)),
+        **rentorown._rent_net_worth(invest, drawdown, distreturns(**args)),
+    }
+    fused = {
+        **kernel.own_net_worth(500_000, own_debt, distreturns(**args, compound=False)),
+        **kernel.rent_net_worth(invest, drawdown, distreturns(**args, compound=False)),
+    }
+    assert fused.keys() == expected.keys()
+    for key, values in expected.items():
+        assert fused[key].dtype == dtype
+        assert np.array_equal(fused[key], values), key
+
+
+@pytest.mark.parametrize("additional", [0, 250])
+def test_amortize_matches_python(backend, additional):
+    """The amortization kernel should round every period like the Python loop.
+
+    Parameters
+    ----------
+    backend: str
+        backend fixture
+    additional: float
+        Additional payment each period
+    """
+    rate = periodic_rate(0.0537, 26)
+    recursion = kernel.amortize(333_333.33, rate, 1050.17, additional, 100)
+    buffers = [np.empty(1000) for _ in range(4)]
+    n, _ = kernel._amortize_steps(333_333.33, rate, 1050.17, additional, *buffers)
+    assert kernel.backend() == backend
+    for values, expected in zip(recursion.values(), buffers):
+        assert np.array_equal(values, expected[:n])
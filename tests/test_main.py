@@ -0,0 +1,125 @@
+"""Tests for the command-line interface."""
+import csv
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from rentorown import __main__
+
+
+SCENARIOS = (
+    "scenario,monthly_rent,house_price,down_payment,mortgage_amortization_years,"
+    "mortgage_apr,mortgage_payment_schedule\n"
+    "cheap,1500,400000,80000,25,0.05,\n"
+    "pricey,3000,900000,200000,25,0.045,bi_weekly\n"
+)
+
+
+@pytest.fixture
+def runner():
+    """Set up a click test runner.
+
+    Returns
+    -------
+    CliRunner
+        Runs the command in-process
+    """
+    return CliRunner()
+
+
+def test_main_streams_csv(runner):
+    """Each scenario should get a row of statistics.
+
+    Parameters
+    ----------
+    runner: CliRunner
+        runner fixture
+    """
+    args = ["--simulations", "50", "--seed", "1", "--input-format", "csv"]
+    result = runner.invoke(__main__.main, args, input=SCENARIOS)
+    assert result.exit_code == 0, result.output
+    rows = list(csv.DictReader(io.StringIO(result.output)))
+    assert [row["scenario"] for row in rows] == ["cheap", "pricey"]
+    assert all(row["simulations"] == "50" and not row["error"] for row in rows)
+    assert 0 <= float(rows[0]["prob_own_wins"]) <= 1
+    again = runner.invoke(__main__.main, args, input=SCENARIOS)
+    assert again.output == result.output
+
+
+def test_main_jsonl_and_errors(runner):
+    """JSON lines in should give JSON lines out, with bad scenarios reported.
+
+    Parameters
+    ----------
+    runner: CliRunner
+        runner fixture
+    """
+    good = {
+        "monthly_rent": 2000,
+        "house_price": 500000,
+        "down_payment": 100000,
+        "mortgage_amortization_years": 25,
+        "mortgage_apr": 0.05,
+        "number_of_simulations": 20,
+        "housing_asset_dict": {"dist_args": {"loc": 0.004, "scale": 0.01}},
+        "investment_asset_dict": {"dist_args": {"loc": 0.005, "scale": 0.02}},
+    }
+    bad = {**good, "down_payment": 1000}
+    lines = "".join(json.dumps(row) + "\n" for row in (good, bad))
+    result = runner.invoke(__main__.main, ["--input-format", "jsonl"], input=lines)
+    assert result.exit_code == 1
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert rows[0]["simulations"] == 20
+    assert "error" not in rows[0]
+    assert rows[1]["error"].startswith("ValueError")
+
+
+def test_failures_dont_stop_the_batch(monkeypatch):
+    """A scenario failing in any way should be reported and the rest still run.
+
+    Parameters
+    ----------
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+    """
+    model = __main__.ParameterizedRentOrOwn
+
+    def flaky(**arguments):
+        """Fail on cheap rent, like a result cache that can't be written.
+
+        Parameters
+        ----------
+        **arguments: dict
+            ParameterizedRentOrOwn arguments
+
+        Returns
+        -------
+        ParameterizedRentOrOwn
+            The model, if it doesn't fail
+
+        Raises
+        ------
+        OSError
+            For the cheap scenario
+        """
+        if arguments["monthly_rent"] == 1500:
+            raise OSError("disk full")
+        return model(**arguments)
+
+    monkeypatch.setattr(__main__, "ParameterizedRentOrOwn", flaky)
+    rows = csv.DictReader(io.StringIO(SCENARIOS))
+    results = list(__main__.run_scenarios(rows, {"number_of_simulations": 20}))
+    assert results[0] == {"scenario": "cheap", "error": "OSError: disk full"}
+    assert "error" not in results[1]
+
+
+def test_scenario_arguments():
+    """CSV text should be converted to what RentOrOwn expects."""
+    arguments = __main__.scenario_arguments(
+        {"scenario": "a", "mortgage_apr": "0.05", "seed": "[1, 2]", "tolerance": ""}
+    )
+    assert arguments == {"mortgage_apr": 0.05, "seed": [1, 2]}
+    with pytest.raises(ValueError):
+        __main__.scenario_arguments({"rent": "2000"})
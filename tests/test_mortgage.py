@@ -1,4 +1,6 @@
 """Tests for the mortgage class."""
+
+import numpy as np
 import pytest
 
 from rentorown import house
@@ -89,3 +91,149 @@ def test_correct_interest(mortgage250k):
     df = mortgage250k.amortize(payment_type="acc_bi_weekly")
     assert df["Interest"].sum().round(2) == 92_042.94
     assert df["Principal"].sum().round(2) == 250_000
+
+
+def test_schedule_matches_amortize(mortgage250k):
+    """Array schedule should add up to the same totals as the dataframe.
+
+    Parameters
+    ----------
+    mortgage250k: house.Mortgage
+        a 250k mortgage
+    """
+    for payment_type in ["monthly", "bi_weekly", "acc_bi_weekly"]:
+        sched = mortgage250k.schedule(addl_pmt=100, payment_type=payment_type)
+        df = mortgage250k.amortize(addl_pmt=100, payment_type=payment_type)
+        assert sched["Period"][0] == 1
+        assert sched["End_balance"][-1] == 0
+        assert sched["Interest"].sum().round(2) == df["Interest"].sum().round(2)
+        assert sched["Principal"].sum().round(2) == df["Principal"].sum().round(2)
+
+
+@pytest.mark.parametrize(
+    "terms, total_paid, total_interest",
+    [
+        ((542797.93, 19, 0.0845), 1_080_797.24, 537_999.31),
+        ((223512.89, 22, 0.0532), 377_746.40, 154_233.51),
+    ],
+)
+def test_stub_payments_match_baseline(terms, total_paid, total_interest):
+    """A few cents left over should be paid off with a stub, not a full payment.
+
+    Totals are from the period by period loop the schedule replaced.
+
+    Parameters
+    ----------
+    terms: tuple
+        principal, years and rate of the mortgage
+    total_paid: float
+        Sum of the payments
+    total_interest: float
+        Sum of the interest
+    """
+    df = house.Mortgage(*terms).amortize()
+    assert df["Payment"].sum().round(2) == total_paid
+    assert df["Interest"].sum().round(2) == total_interest
+    assert df["Payment"].iloc[-2] == pytest.approx(2.0)
+    assert (df["End_balance"] >= 0).all()
+
+
+def test_payment_dates():
+    """Monthly payments land each month, bi-weekly every two weeks."""
+    from datetime import date
+
+    monthly = house.Mortgage.payment_dates(3, start_date=date(2021, 1, 31))
+    assert [str(d) for d in monthly] == ["2021-01-31", "2021-02-28", "2021-03-31"]
+    bi_weekly = house.Mortgage.payment_dates(
+        2, payment_type="bi_weekly", start_date=date(2021, 1, 1)
+    )
+    assert [str(d) for d in bi_weekly] == ["2021-01-01", "2021-01-15"]
+
+
+def test_batch_amortize_matches_scalar():
+    """Batch amortization should match each mortgage amortized on its own."""
+    principals = [100000, 250000, 250000]
+    rates = [0.06, 0.03, 0.03]
+    payment_types = ["monthly", "bi_weekly", "acc_bi_weekly"]
+    batch = house.batch_amortize(principals, 25, rates, payment_types, addl_pmt=50)
+    for i, payment_type in enumerate(payment_types):
+        sched = house.Mortgage(principals[i], 25, rates[i]).schedule(
+            addl_pmt=50, payment_type=payment_type
+        )
+        n_periods = len(sched["Period"])
+        assert batch["payoff_period"][i] == n_periods
+        for col in ["Begin_balance", "Principal", "Interest", "End_balance"]:
+            assert (batch[col][i, :n_periods] == sched[col]).all()
+            assert not batch[col][i, n_periods:].any()
+
+
+def test_batch_amortize_bad_payment_type():
+    """Unknown payment schedules should be rejected."""
+    with pytest.raises(ValueError):
+        house.batch_amortize(100000, 25, 0.05, payment_type="weekly")
+
+
+@pytest.mark.parametrize("payment_type", ["monthly", "bi_weekly", "acc_bi_weekly"])
+def test_renewal_amortize(payment_type):
+    """Renewals should reprice the payment, the first term is a plain schedule.
+
+    Parameters
+    ----------
+    payment_type: str
+        type of payment plan
+    """
+    sched = house.Mortgage(250000, 25, 0.03).schedule(
+        addl_pmt=50, payment_type=payment_type
+    )
+    n_periods = len(sched["Period"])
+    rates = [[0.03, 0.03, 0.03], [0.03, 0.03, 0.06]]
+    fixed = house.renewal_amortize(250000, 25, rates[:1], 25, payment_type, 50)
+    renewed = house.renewal_amortize(250000, 25, rates, 5, payment_type, 50)
+    for col in ["Payment", "Interest", "Additional_payment", "End_balance"]:
+        assert (fixed[col][:n_periods, 0] == sched[col]).all()
+        assert not fixed[col][n_periods:].any()
+    term = 5 * house.PAYMENTS_PER_YEAR[payment_type]
+    assert (renewed["End_balance"][:term, 2] == sched["End_balance"][:term]).all()
+    assert (renewed["Payment"][term:, 2] > renewed["Payment"][term:, 1])[:10].all()
+    rows = np.arange(len(renewed["Payment"])) // 2
+    rolled = house.renewal_amortize(250000, 25, rates, 5, payment_type, 50, rows)
+    assert np.allclose(rolled["Payment"], renewed["Payment"].reshape(-1, 2, 3).sum(1))
+    assert (rolled["End_balance"] == renewed["End_balance"][1::2]).all()
+    with pytest.raises(ValueError):
+        house.renewal_amortize(100000, 25, 0.05, payment_type="weekly")
+
+
+def test_schedule_cache(mortgage100k):
+    """Repeated schedules come from the cache and can't be modified.
+
+    Parameters
+    ----------
+    mortgage100k: house.Mortgage
+        a 100k mortgage
+    """
+    house.amortization_cache.clear()
+    first = mortgage100k.schedule(payment_type="bi_weekly")
+    second = house.Mortgage(100000, 25, 0.06).schedule(payment_type="bi_weekly")
+    assert second is first
+    assert house.amortization_cache.stats()["hits"] == 1
+    with pytest.raises(ValueError):
+        first["End_balance"][0] = 0
+    df = mortgage100k.amortize(payment_type="bi_weekly")
+    df["End_balance"] = 0
+    assert mortgage100k.amortize(payment_type="bi_weekly")["End_balance"].iloc[0] > 0
+
+
+def test_cache_eviction():
+    """The least recently used schedules are dropped to stay under capacity."""
+    cache = house.AmortizationCache(max_bytes=2000)
+    for key in range(3):
+        cache.get_or_compute(key, lambda: {"x": np.zeros(100)})
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+    cache.get_or_compute(1, lambda: {"x": np.zeros(100)})
+    cache.get_or_compute(3, lambda: {"x": np.zeros(100)})
+    cache.get_or_compute(1, lambda: {"x": np.zeros(100)})
+    assert cache.stats()["hits"] == 2
+    cache.max_bytes = 800
+    assert len(cache) == 1
+    assert cache.nbytes == 800
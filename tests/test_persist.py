@@ -0,0 +1,128 @@
+"""Tests for saving and loading result bundles."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from rentorown import persist
+
+
+def test_bundle_round_trip(tmp_path):
+    """Arrays and metadata should come back as saved.
+
+    Parameters
+    ----------
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    """
+    arrays = {"values": np.arange(12.0).reshape(3, 4)}
+    persist.save_bundle(tmp_path, arrays, {"seed": np.int64(5)})
+    loaded, metadata = persist.load_bundle(tmp_path)
+    assert isinstance(loaded["values"], np.memmap)
+    assert np.array_equal(loaded["values"], arrays["values"])
+    assert metadata["seed"] == 5
+    in_memory, _ = persist.load_bundle(tmp_path, mmap_mode=None)
+    assert not isinstance(in_memory["values"], np.memmap)
+    metadata["format"] = persist.BUNDLE_FORMAT + 1
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    with pytest.raises(ValueError):
+        persist.load_bundle(tmp_path)
+
+
+def test_asset_dict_json():
+    """numpy.random distributions should survive, anything else is refused."""
+    asset = {"dist": np.random.normal, "dist_args": {"loc": 0.01, "scale": 0.02}}
+    saved = persist.asset_to_json(asset)
+    assert json.loads(json.dumps(saved))["dist"] == "numpy.random.normal"
+    assert persist.asset_from_json(saved) == asset
+    with pytest.raises(ValueError):
+        persist.asset_to_json({"dist": np.random.default_rng().normal})
+
+
+def _save_values(size):
+    """Make a save function for ResultCache.put.
+
+    Parameters
+    ----------
+    size: int
+        Number of float64 values to save
+
+    Returns
+    -------
+    callable
+        Saves a bundle with that many values to a directory
+    """
+    return lambda path: persist.save_bundle(path, {"values": np.ones(size)}, {})
+
+
+def test_content_hash():
+    """Equal inputs should hash the same whatever their numeric type."""
+    key = persist.content_hash({"rent": 2000, "rates": (0.05,)}, {"seed": 1})
+    assert key == persist.content_hash({"rates": [0.05], "rent": 2000.0}, {"seed": 1})
+    assert key != persist.content_hash({"rent": 2000, "rates": (0.05,)}, {"seed": 2})
+
+
+def test_result_cache(tmp_path):
+    """Entries should be found again, evicted least recently used first.
+
+    Parameters
+    ----------
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    """
+    cache = persist.ResultCache(tmp_path, version="1")
+    assert cache.get("a") is None
+    cache.put("a", _save_values(1000))
+    cache.put("b", _save_values(1000))
+    arrays, _ = cache.get("a")
+    assert np.array_equal(arrays["values"], np.ones(1000))
+    # b was used longest ago, so it goes first
+    os.utime(tmp_path / "b", (0, 0))
+    cache.max_bytes = cache.nbytes - 1
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+        "entries": 1,
+        "nbytes": cache.nbytes,
+        "max_bytes": cache.max_bytes,
+    }
+    cache.put("huge", _save_values(10_000))
+    assert len(cache) == 1
+    assert not any(path.name.startswith(".") for path in tmp_path.iterdir())
+
+
+def test_library_version(tmp_path, monkeypatch):
+    """The version should change with the source, installed or not.
+
+    Parameters
+    ----------
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+    """
+    version = persist.library_version()
+    assert version == persist.library_version()
+    (tmp_path / "module.py").write_text("x = 1\n")
+    monkeypatch.setattr(persist, "__file__", str(tmp_path / "persist.py"))
+    edited = persist.library_version()
+    assert edited != version
+    (tmp_path / "module.py").write_text("x = 2\n")
+    assert persist.library_version() != edited
+
+
+def test_result_cache_version(tmp_path):
+    """Opening a cache with another library version should empty it.
+
+    Parameters
+    ----------
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    """
+    persist.ResultCache(tmp_path, version="1").put("a", _save_values(10))
+    assert len(persist.ResultCache(tmp_path, version="1")) == 1
+    assert len(persist.ResultCache(tmp_path, version="2")) == 0
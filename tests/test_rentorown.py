@@ -0,0 +1,643 @@
+"""Tests for the rent or own model."""
+import subprocess  # noqa: S404
+import sys
+
+import numpy as np
+import pytest
+
+from rentorown import rentorown
+from rentorown.asset import annual_to_monthly_return
+from rentorown.persist import ResultCache
+
+
+class SmallChunkRentOrOwn(rentorown.ParameterizedRentOrOwn):
+    """Parameterized model with tiny chunks so a few simulations span several."""
+
+    simulation_chunk_size = 7
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    """Set up inputs for a modest rent or own scenario.
+
+    Returns
+    -------
+    dict
+        keyword arguments for ParameterizedRentOrOwn
+    """
+    return {
+        "monthly_rent": 2000,
+        "house_price": 500000,
+        "down_payment": 100000,
+        "mortgage_amortization_years": 25,
+        "mortgage_apr": 0.05,
+        "number_of_simulations": 30,
+    }
+
+
+def test_seeded_runs_reproduce(scenario):
+    """The same seed should give the same simulations.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    first = SmallChunkRentOrOwn(**scenario, seed=42)
+    second = SmallChunkRentOrOwn(**scenario, seed=42)
+    other = SmallChunkRentOrOwn(**scenario, seed=43)
+    assert first.own_net_worth.shape == (300, 30)
+    assert np.array_equal(first.own_net_worth, second.own_net_worth)
+    assert np.array_equal(first.rent_net_worth, second.rent_net_worth)
+    assert not np.array_equal(first.own_net_worth, other.own_net_worth)
+
+
+def test_shared_seed_sequence(scenario):
+    """Models built from one SeedSequence should draw the same paths.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    seed = np.random.SeedSequence(42)
+    first = SmallChunkRentOrOwn(**scenario, seed=seed)
+    first_own = first.own_net_worth
+    second = SmallChunkRentOrOwn(**scenario, seed=seed)
+    assert seed.n_children_spawned == 0
+    assert first.cache_key == second.cache_key
+    assert np.array_equal(second.own_net_worth, first_own)
+    assert np.array_equal(second.rent_net_worth, first.rent_net_worth)
+
+
+def test_workers_match_serial(scenario):
+    """Spreading chunks over processes shouldn't change the results.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    serial = SmallChunkRentOrOwn(**scenario, seed=42)
+    parallel = SmallChunkRentOrOwn(**scenario, seed=42, workers=2)
+    assert np.array_equal(serial.own_net_worth, parallel.own_net_worth)
+    assert np.array_equal(serial.rent_net_worth, parallel.rent_net_worth)
+
+
+def test_streaming_summary_matches_full(scenario):
+    """Summary only runs should describe the same simulations.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    full = SmallChunkRentOrOwn(**scenario, seed=42)
+    streamed = SmallChunkRentOrOwn(**scenario, seed=42, keep_simulations=False)
+    assert not hasattr(streamed, "own_net_worth")
+    assert np.allclose(streamed.summary.mean("own"), full.own_net_worth.mean(axis=1))
+    assert np.array_equal(
+        streamed.summary.prob_own_wins(),
+        (full.own_net_worth > full.rent_net_worth).mean(axis=1),
+    )
+
+
+def test_lean_memory_options(scenario):
+    """Intermediates are opt in and float32 runs stay in float32.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    lean = SmallChunkRentOrOwn(**scenario, seed=42)
+    debug = SmallChunkRentOrOwn(**scenario, seed=42, keep_intermediates=True)
+    assert not hasattr(lean, "riv")
+    assert np.array_equal(lean.rent_net_worth, debug.rent_net_worth)
+    assert debug.riv.shape == debug.rent_net_worth.shape
+    single = SmallChunkRentOrOwn(**scenario, seed=42, dtype=np.float32)
+    assert single.own_net_worth.dtype == np.float32
+    assert single.rent_net_worth.dtype == np.float32
+    assert np.allclose(single.own_net_worth, lean.own_net_worth, rtol=1e-4)
+
+
+def test_lazy_evaluation(scenario):
+    """Nothing is simulated until it's asked for, and then only what's needed.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    huge = dict(scenario, number_of_simulations=10**12)
+    model = SmallChunkRentOrOwn(**huge, seed=42)
+    assert model.mortgage_df.shape[0] == 300
+    model = SmallChunkRentOrOwn(**scenario, seed=42)
+    own = model.own_net_worth
+    assert "rent" not in model._cache
+    assert model.own_net_worth is own
+    full = SmallChunkRentOrOwn(**scenario, seed=42)
+    assert np.array_equal(full.rent_net_worth, model.rent_net_worth)
+
+
+def test_inputs_validated_up_front(scenario):
+    """Bad inputs should fail at construction, not on first use.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**scenario, mortgage_payment_schedule="weekly")
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**dict(scenario, down_payment=1000))
+
+
+def test_variance_reduction(scenario):
+    """Antithetic sampling and control variates should tighten estimates.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    more = dict(scenario, number_of_simulations=400)
+    plain = rentorown.ParameterizedRentOrOwn(**more, seed=1).estimate("rent")
+    reduced = rentorown.ParameterizedRentOrOwn(
+        **more, seed=1, sampling="antithetic"
+    ).estimate("rent", control_variates=True)
+    assert plain["simulations"] == reduced["simulations"] == 400
+    assert reduced["standard_error"] < plain["standard_error"] / 2
+    assert abs(reduced["estimate"] - plain["estimate"]) < 4 * plain["standard_error"]
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**scenario, seed=1).estimate("median")
+
+
+def test_sobol_model(scenario):
+    """Quasi Monte Carlo runs through the whole model.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    pytest.importorskip("scipy")
+    model = SmallChunkRentOrOwn(**scenario, seed=3, sampling="sobol")
+    again = SmallChunkRentOrOwn(**scenario, seed=3, sampling="sobol")
+    assert np.array_equal(model.rent_net_worth, again.rent_net_worth)
+    assert np.isfinite(model.estimate()["standard_error"])
+    # Scrambled Sobol points are only balanced in powers of 2
+    sizes = [size for size, _ in model._chunk_plan]
+    assert sum(sizes) == 30
+    assert all(size & (size - 1) == 0 for size in sizes)
+
+
+def test_adaptive_simulation_count(scenario):
+    """Stopping at a tolerance should be the same as asking for that many up front.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    inputs = {**scenario, "number_of_simulations": 700}
+    adaptive = SmallChunkRentOrOwn(
+        **inputs, seed=42, tolerance=0.5, tolerance_metric="prob_own_wins"
+    )
+    used = adaptive.simulations_used
+    assert 7 < used < 700
+    assert used % 7 == 0
+    lower, upper = adaptive.target_interval
+    assert upper - lower < 0.5
+    assert adaptive.own_net_worth.shape == (300, used)
+    fixed = SmallChunkRentOrOwn(**{**inputs, "number_of_simulations": used}, seed=42)
+    assert np.array_equal(adaptive.own_net_worth, fixed.own_net_worth)
+    assert np.array_equal(adaptive.rent_net_worth, fixed.rent_net_worth)
+    assert adaptive.estimate()["simulations"] == used
+    streamed = SmallChunkRentOrOwn(
+        **inputs,
+        seed=42,
+        tolerance=0.5,
+        tolerance_metric="prob_own_wins",
+        keep_simulations=False,
+    )
+    assert streamed.summary.n == used
+    capped = SmallChunkRentOrOwn(
+        **scenario, seed=42, tolerance=1, tolerance_metric="median_gap"
+    )
+    assert capped.simulations_used == 30
+    with pytest.raises(AttributeError):
+        SmallChunkRentOrOwn(**scenario).target_interval
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**scenario, tolerance_metric="mean")
+
+
+def test_stage_timings(scenario):
+    """Instrumented models should time each stage and pass them to the hook.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    seen = []
+    model = SmallChunkRentOrOwn(
+        **scenario, seed=42, timing_hook=lambda name, record: seen.append(name)
+    )
+    plain = SmallChunkRentOrOwn(**scenario, seed=42)
+    assert np.array_equal(model.own_net_worth, plain.own_net_worth)
+    model.summary
+    timings = model.timings
+    assert timings["own_returns"]["calls"] == 5
+    assert timings["own_net_worth"]["allocated_bytes"] > 0
+    assert {"amortization", "cash_flows", "assemble", "summary"} <= set(timings)
+    assert timings["rent_returns"]["calls"] == 5
+    assert len(seen) == sum(stage["calls"] for stage in timings.values())
+    with pytest.raises(AttributeError):
+        plain.timings
+
+
+@pytest.mark.parametrize("keep_intermediates", [False, True])
+def test_fused_matches(scenario, keep_intermediates):
+    """The fused kernels shouldn't change the simulations at all.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    keep_intermediates: bool
+        Whether the renter's side has to take the NumPy path anyway
+    """
+    arguments = {**scenario, "seed": 42, "keep_intermediates": keep_intermediates}
+    plain = SmallChunkRentOrOwn(**arguments)
+    fused = SmallChunkRentOrOwn(**arguments, fused=True)
+    assert np.array_equal(fused.own_net_worth, plain.own_net_worth)
+    assert np.array_equal(fused.house_appreciation, plain.house_appreciation)
+    assert np.array_equal(fused.rent_net_worth, plain.rent_net_worth)
+    assert fused.estimate(control_variates=True) == plain.estimate(
+        control_variates=True
+    )
+
+
+def test_correlated_assets(scenario):
+    """Correlated house and investment returns should move together.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    arguments = {**scenario, "seed": 42, "asset_correlation": 0.8}
+    model = SmallChunkRentOrOwn(**arguments)
+    parallel = SmallChunkRentOrOwn(**arguments, workers=2)
+    fused = SmallChunkRentOrOwn(**arguments, fused=True)
+    assert np.array_equal(parallel.own_net_worth, model.own_net_worth)
+    assert np.array_equal(fused.rent_net_worth, model.rent_net_worth)
+    for kwargs, low, high in (({"seed": 42}, -0.1, 0.1), (arguments, 0.7, 1)):
+        debug = SmallChunkRentOrOwn(**{**scenario, **kwargs}, keep_intermediates=True)
+        house = np.diff(np.log(debug.house_appreciation), axis=0).ravel()
+        invest = np.diff(np.log(debug.ap), axis=0).ravel()
+        assert low < np.corrcoef(house, invest)[0, 1] < high
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**scenario, asset_correlation=1.5)
+    # Assets without dist_args get the same defaults as distreturns draws with
+    defaults = rentorown.RentOrOwn(
+        **scenario,
+        housing_asset_dict={"dist_args": {"loc": 0.004, "scale": 0.0136}},
+        investment_asset_dict={},
+        asset_correlation=0.5,
+    )._correlated
+    assert defaults["means"][1] == 0.006
+    assert defaults["stdevs"][1] == 0.06
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"asset_correlation": 0.5}, {"sampling": "sobol"}], ids=["corr", "sobol"]
+)
+def test_joint_draw_once(scenario, kwargs, monkeypatch):
+    """Sides drawn together should share one draw per chunk.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    kwargs: dict
+        Inputs that make the sides share a draw
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+    """
+    if kwargs.get("sampling") == "sobol":
+        pytest.importorskip("scipy")
+    calls = []
+    joint_returns = rentorown._joint_returns
+
+    def counted(*args):
+        calls.append(args)
+        return joint_returns(*args)
+
+    monkeypatch.setattr(rentorown, "_joint_returns", counted)
+    model = SmallChunkRentOrOwn(**scenario, seed=5, **kwargs)
+    own, rent = model.own_net_worth, model.rent_net_worth
+    assert len(calls) == len(model._chunk_plan)
+    # Drawing one side on its own gets the same paths as drawing both
+    alone = rentorown._simulate_chunk(
+        {"rent": (model._asset_dicts["rent"], model._chunk_plan[0][1]["rent"])},
+        model._chunk_plan[0][0],
+        model._simulation_periods,
+        model._cash_flows,
+        correlated=model._correlated,
+        sampling=model._sampling,
+    )
+    assert np.allclose(alone["rent_net_worth"], rent[:, : model._chunk_plan[0][0]])
+    assert np.isfinite(own).all()
+
+
+def test_sensitivities(scenario):
+    """Bumps on shared paths should match separately seeded models exactly.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    model = SmallChunkRentOrOwn(**scenario, seed=42)
+    inputs = ("monthly_rent", "down_payment", "investment_return")
+    sensitivities = model.sensitivities(inputs=inputs, steps={"monthly_rent": 50})
+    base = model.own_net_worth[-1] - model.rent_net_worth[-1]
+    assert sensitivities["base"]["median_gap"] == pytest.approx(np.median(base))
+    # The same seed draws the same paths, so full models give the same answer
+    up, down = (
+        SmallChunkRentOrOwn(**{**scenario, "monthly_rent": rent}, seed=42)
+        for rent in (2050, 1950)
+    )
+    gaps = [np.mean(m.own_net_worth[-1] - m.rent_net_worth[-1]) for m in (up, down)]
+    assert sensitivities["monthly_rent"]["mean_gap"] == pytest.approx(
+        (gaps[0] - gaps[1]) / 100
+    )
+    assert sensitivities["monthly_rent"]["mean_gap"] > 0
+    assert sensitivities["investment_return"]["median_gap"] < 0
+    assert set(sensitivities["down_payment"]) == {
+        "value",
+        "step",
+        "median_gap",
+        "mean_gap",
+        "prob_own_wins",
+    }
+    # An asset without dist_args is bumped from the mean distreturns draws with
+    default = rentorown.RentOrOwn(
+        **scenario,
+        housing_asset_dict={"dist_args": {"loc": 0.004, "scale": 0.0136}},
+        investment_asset_dict={},
+        seed=42,
+    ).sensitivities(inputs=("investment_return",))["investment_return"]
+    assert default["value"] == 0.006
+    assert default["step"] == pytest.approx(0.00006)
+    with pytest.raises(ValueError):
+        model.sensitivities(inputs=("number_of_simulations",))
+    with pytest.raises(ValueError):
+        model.sensitivities(inputs=("additional_monthly_costs",))
+
+
+def test_breakeven(scenario):
+    """The breakeven rent should be where owning wins half the time.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    model = SmallChunkRentOrOwn(**scenario, seed=42)
+    solved = model.breakeven("monthly_rent", metric="median_gap", xtol=0.01)
+    low, high = solved["bracket"]
+    assert low <= solved["value"] <= high
+    assert high - low <= 0.01
+    assert solved["passes"] < 10
+    rent = solved["value"]
+    below, above = (
+        SmallChunkRentOrOwn(**{**scenario, "monthly_rent": rent + step}, seed=42)
+        for step in (-1, 1)
+    )
+    assert np.median(below.own_net_worth[-1] - below.rent_net_worth[-1]) < 0
+    assert np.median(above.own_net_worth[-1] - above.rent_net_worth[-1]) > 0
+    probability = model.breakeven("mortgage_apr", bracket=(0.01, 0.2))
+    assert 0.01 < probability["value"] < 0.2
+    with pytest.raises(ValueError):
+        model.breakeven("monthly_rent", bracket=(10_000, 20_000))
+
+
+def test_breakeven_default_bracket(scenario):
+    """Doubling the house price can't push the down payment under 5%.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    cheap = {**scenario, "down_payment": 40000, "monthly_rent": 1500}
+    model = SmallChunkRentOrOwn(**cheap, seed=42)
+    low, high = model._default_bracket("house_price")
+    assert low == scenario["house_price"] / 2
+    assert 0.999 * 800000 < high <= 800000
+    solved = model.breakeven("house_price")
+    assert low < solved["value"] < high
+
+
+def test_breakeven_zero_input(scenario):
+    """A zero input can't be scaled into a bracket.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    model = rentorown.RentOrOwn(
+        **scenario,
+        housing_asset_dict={"dist_args": {"loc": 0.0, "scale": 0.0136}},
+        investment_asset_dict={"dist_args": {"loc": 0.0051, "scale": 0.0266}},
+        additional_monthly_costs=0,
+        seed=42,
+    )
+    assert model._default_bracket("housing_return") == pytest.approx([-0.0408, 0.0408])
+    solved = model.breakeven("housing_return")
+    assert -0.0408 < solved["value"] < 0.0408
+    with pytest.raises(ValueError, match="bracket"):
+        model.breakeven("additional_monthly_costs")
+
+
+def test_sweep(scenario):
+    """A sweep should summarize each scenario as its own model would.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    model = SmallChunkRentOrOwn(**scenario, seed=42)
+    grid = {"mortgage_apr": [0.04, 0.06], "monthly_rent": [1500, 2000, 2500]}
+    table = model.sweep(grid, batch_size=4)
+    assert len(table) == 6
+    assert list(table.columns[:3]) == ["mortgage_apr", "monthly_rent", "median_gap"]
+    row = table.iloc[4]
+    single = SmallChunkRentOrOwn(**{**scenario, **row[list(grid)]}, seed=42)
+    own, rent = single.own_net_worth[-1], single.rent_net_worth[-1]
+    assert row["prob_own_wins"] == np.mean(own > rent)
+    assert row["own_median"] == np.median(own)
+    assert row["rent_p95"] == pytest.approx(np.quantile(rent, 0.95))
+    listed = model.sweep([{"investment_return": 0.006}, {}])
+    assert listed["mean_gap"][0] < listed["mean_gap"][1]
+    with pytest.raises(ValueError):
+        model.sweep({"seed": [1, 2]})
+
+
+def test_renewing_mortgage(scenario, tmp_path):
+    """Renewals should give each simulation its own mortgage balance.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    """
+    arguments = {**scenario, "seed": 42, "mortgage_payment_schedule": "bi_weekly"}
+    fixed = SmallChunkRentOrOwn(**arguments)
+    # Never renewing within the amortization is the same as a fixed rate
+    one_term = SmallChunkRentOrOwn(**arguments, mortgage_term_years=25)
+    assert np.array_equal(one_term.own_net_worth, fixed.own_net_worth)
+    assert np.allclose(one_term.rent_net_worth, fixed.rent_net_worth)
+    rates = {"dist_args": {"loc": 0.0, "scale": 0.02}}
+    renewing = SmallChunkRentOrOwn(
+        **arguments, mortgage_term_years=5, mortgage_rate_dict=rates
+    )
+    debt = renewing.house_appreciation - renewing.own_net_worth
+    assert np.allclose(debt[:59], fixed._mortgage_schedule["End_balance"][:59, None])
+    assert np.unique(debt[120]).size > 1
+    fused = SmallChunkRentOrOwn(
+        **arguments, mortgage_term_years=5, mortgage_rate_dict=rates, fused=True
+    )
+    assert np.array_equal(fused.rent_net_worth, renewing.rent_net_worth)
+    renewing.save(tmp_path)
+    loaded = rentorown.RentOrOwn.load(tmp_path)
+    assert loaded._parameters["mortgage_rate_dict"] == rates
+    with pytest.raises(ValueError):
+        SmallChunkRentOrOwn(**scenario, mortgage_term_years=0)
+
+
+def test_random_inflation(scenario):
+    """Inflation and rent growth paths should vary by simulation, not by chunk.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    arguments = {**scenario, "seed": 42}
+    monthly = annual_to_monthly_return(0.02)
+    steady = SmallChunkRentOrOwn(
+        **arguments, inflation_dict={"dist_args": {"loc": monthly, "scale": 0}}
+    )
+    fixed = SmallChunkRentOrOwn(**arguments)
+    assert np.array_equal(steady.own_net_worth, fixed.own_net_worth)
+    assert np.allclose(steady.rent_net_worth, fixed.rent_net_worth)
+    random = {
+        "inflation_dict": {"dist_args": {"loc": monthly, "scale": 0.003}},
+        "rent_growth_dict": {"dist_args": {"loc": monthly, "scale": 0.005}},
+    }
+    first = SmallChunkRentOrOwn(**arguments, **random)
+    again = SmallChunkRentOrOwn(**arguments, **random, workers=2)
+    assert np.array_equal(first.rent_net_worth, again.rent_net_worth)
+    assert not np.allclose(first.rent_net_worth, fixed.rent_net_worth)
+    # Only the renter's side depends on the costs
+    assert np.array_equal(first.own_net_worth, fixed.own_net_worth)
+
+
+def test_import_is_light():
+    """Importing the model shouldn't load plotting or pandas, or touch the locale."""
+    code = (
+        "import locale, sys\n"
+        "before = locale.setlocale(locale.LC_ALL)\n"
+        "import rentorown.rentorown\n"
+        "assert locale.setlocale(locale.LC_ALL) == before\n"
+        "heavy = {'matplotlib', 'numba', 'pandas'} & set(sys.modules)\n"
+        "assert not heavy, heavy\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)  # noqa: S603
+
+
+def test_quantile_bands(scenario):
+    """Bands should be cached, and the streaming ones close to the exact ones.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    """
+    model = SmallChunkRentOrOwn(**scenario, seed=42)
+    bands = model.quantile_bands
+    assert model.quantile_bands is bands
+    assert np.array_equal(bands["quantiles"], model.band_quantiles)
+    assert np.allclose(bands["own"][2], np.median(model.own_net_worth, axis=1))
+    streamed = SmallChunkRentOrOwn(**scenario, seed=42, keep_simulations=False)
+    spread = bands["rent"][-1] - bands["rent"][0]
+    assert np.all(
+        np.abs(streamed.quantile_bands["rent"][2] - bands["rent"][2]) <= spread
+    )
+
+
+def test_save_and_load(scenario, tmp_path):
+    """A loaded model should give back the saved simulations, memory mapped.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    """
+    model = SmallChunkRentOrOwn(**scenario, seed=42, keep_intermediates=True)
+    model.save(tmp_path / "bundle")
+    loaded = SmallChunkRentOrOwn.load(tmp_path / "bundle")
+    assert isinstance(loaded, SmallChunkRentOrOwn)
+    assert isinstance(loaded.own_net_worth, np.memmap)
+    assert np.array_equal(loaded.own_net_worth, model.own_net_worth)
+    assert np.array_equal(loaded.riv, model.riv)
+    assert loaded.estimate(control_variates=True) == model.estimate(
+        control_variates=True
+    )
+    assert loaded.mortgage_df.equals(model.mortgage_df)
+    assert loaded.seed_entropy == model.seed_entropy
+    lean = SmallChunkRentOrOwn(**scenario, keep_simulations=False)
+    with pytest.raises(AttributeError):
+        lean.save(tmp_path / "lean")
+
+
+def test_result_cache(scenario, tmp_path, monkeypatch):
+    """A model seen before should come from the cache without simulating.
+
+    Parameters
+    ----------
+    scenario: dict
+        scenario fixture
+    tmp_path: pathlib.Path
+        pytest temporary directory
+    monkeypatch: pytest.MonkeyPatch
+        pytest monkeypatch fixture
+    """
+    cache = ResultCache(tmp_path)
+    first = SmallChunkRentOrOwn(**scenario, seed=42, result_cache=cache)
+    expected = first.own_net_worth
+    assert cache.stats()["misses"] == 1 and len(cache) == 1
+    same = {**scenario, "monthly_rent": 2000.0}
+    second = SmallChunkRentOrOwn(**same, seed=42, result_cache=cache)
+    assert second.cache_key == first.cache_key
+    monkeypatch.setattr(rentorown, "_simulate_chunk", None)
+    assert np.array_equal(second.own_net_worth, expected)
+    assert np.array_equal(second.rent_net_worth, first.rent_net_worth)
+    assert cache.hits == 1
+    other = SmallChunkRentOrOwn(**scenario, seed=43, result_cache=cache)
+    assert other.cache_key != first.cache_key
+    unseeded = SmallChunkRentOrOwn(**scenario, result_cache=cache)
+    monkeypatch.undo()
+    assert unseeded.own_net_worth.shape == expected.shape
+    assert len(cache) == 1
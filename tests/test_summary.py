@@ -0,0 +1,94 @@
+"""Tests for the streaming summary."""
+import numpy as np
+import pytest
+
+from rentorown import summary
+
+
+@pytest.fixture(scope="module")
+def net_worths():
+    """Simulate own and rent net worth to summarize.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        periods x simulations own and rent net worth
+    """
+    rng = np.random.default_rng(0)
+    own = rng.normal(100, 10, size=(5, 2000)).cumsum(axis=0)
+    rent = rng.normal(100, 20, size=(5, 2000)).cumsum(axis=0)
+    return own, rent
+
+
+def test_chunks_match_whole(net_worths):
+    """Summarizing in chunks should match statistics on the whole array.
+
+    Parameters
+    ----------
+    net_worths: tuple of np.ndarray
+        net worth fixture
+    """
+    own, rent = net_worths
+    stats = summary.StreamingSummary()
+    for start in range(0, 2000, 300):
+        stats.update(own[:, start : start + 300], rent[:, start : start + 300])
+    assert stats.n == 2000
+    assert np.allclose(stats.mean("own"), own.mean(axis=1))
+    assert np.allclose(stats.variance("rent"), rent.var(axis=1, ddof=1))
+    assert np.array_equal(stats.prob_own_wins(), (own > rent).mean(axis=1))
+    median = stats.quantile("own", 0.5)
+    assert np.allclose(median, np.median(own, axis=1), rtol=0.01)
+    assert stats.quantile("rent", [0.25, 0.75]).shape == (2, 5)
+    counts, edges = stats.histogram("own")
+    assert counts.sum() == 2000
+    assert len(edges) == len(counts) + 1
+
+
+def test_bad_side(net_worths):
+    """Only own and rent can be summarized.
+
+    Parameters
+    ----------
+    net_worths: tuple of np.ndarray
+        net worth fixture
+    """
+    stats = summary.StreamingSummary()
+    with pytest.raises(ValueError):
+        stats.mean("own")
+    stats.update(*net_worths)
+    with pytest.raises(ValueError):
+        stats.mean("lease")
+
+
+def test_confidence_interval(net_worths):
+    """Intervals should bracket the statistic and tighten with more data.
+
+    Parameters
+    ----------
+    net_worths: tuple of np.ndarray
+        net worth fixture
+    """
+    own, _ = net_worths
+    assert summary.normal_quantile(0.975) == pytest.approx(1.959964, abs=1e-6)
+    for statistic, centre in (("mean", own[-1].mean()), ("median", np.median(own[-1]))):
+        lower, upper = summary.confidence_interval(own[-1], statistic=statistic)
+        assert lower < centre < upper
+        small = summary.confidence_interval(own[-1, :200], statistic=statistic)
+        assert small[1] - small[0] > upper - lower
+    assert np.isnan(summary.confidence_interval([1.0], statistic="median")[0])
+    with pytest.raises(ValueError):
+        summary.confidence_interval(own[-1], statistic="mode")
+
+
+def test_quantile_bands(net_worths):
+    """Partial selection should give the same quantiles as numpy.
+
+    Parameters
+    ----------
+    net_worths: tuple of np.ndarray
+        net worth fixture
+    """
+    own, _ = net_worths
+    quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+    bands = summary.quantile_bands(own, quantiles, block=2)
+    assert np.allclose(bands, np.quantile(own, quantiles, axis=1))